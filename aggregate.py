@@ -0,0 +1,246 @@
+"""
+Month-end rollups over a batch of invoices.
+
+Inputs are parsed-invoice JSONL files (`batch.py -f jsonl`, or the jsonl output
+format of a run) and/or saved captures (files, directories, globs), which are
+parsed as batch.py does; with --cache, unchanged captures are not parsed again.
+
+    python aggregate.py extracted_data.jsonl
+    python aggregate.py captures/2026-09/ --cache --json month_end.json
+
+Reports, always per currency (amounts are never added across currencies):
+  * invoice count, total and outstanding balance by currency, status and customer,
+  * invoices whose line items do not add up to their subtotal (or total),
+  * invoices without a usable total.
+The invoices are first loaded into columns (array('q') of integer minor units,
+see money.py); every rollup is then one pass over those arrays, or np.add.at
+over int64 views of them when NumPy is installed.
+"""
+import argparse
+import json
+import os
+import sys
+from array import array
+
+from extractor import normalize_money
+from money import format_minor
+
+# Statuses whose whole total is still owed when the page shows no "Amount remaining"
+OUTSTANDING_STATUSES = ('open', 'past due', 'uncollectible')
+# Never owed, whatever "Amount remaining" shows (not issued yet / cancelled)
+SETTLED_STATUSES = ('draft', 'void')
+TOP_CUSTOMERS = 20
+HAS_TOTAL, HAS_ITEMS = 1, 2
+
+
+class InvoiceColumns:
+    """
+    Column store of the fields the rollups need; append() one parsed invoice
+    at a time. Text fields are dictionary-encoded (labels[kind][code]).
+    """
+
+    KINDS = ('status', 'customer', 'currency')
+
+    def __init__(self):
+        self.numbers = []
+        self.codes = {kind: array('q') for kind in self.KINDS}
+        self.labels = {kind: [] for kind in self.KINDS}
+        self._index = {kind: {} for kind in self.KINDS}
+        self.total = array('q')
+        self.outstanding = array('q')
+        self.expected = array('q')  # What the line items should add up to: subtotal, else total
+        self.items = array('q')
+        self.flags = array('q')
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def _encode(self, kind, value):
+        index = self._index[kind]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self.labels[kind])
+            self.labels[kind].append(value)
+        self.codes[kind].append(code)
+
+    def append(self, data):
+        if 'currency_code' not in data:
+            # Parsed before amounts were normalized (PARSER_VERSION < 3)
+            normalize_money(data)
+        status = data.get('status', 'Unknown')
+        customer = data.get('billed_to_name', 'N/A')
+        if customer == 'N/A':
+            customer = data.get('billed_to_email', 'N/A')
+        self.numbers.append(data.get('invoice_number', 'N/A'))
+        self._encode('status', status)
+        self._encode('customer', customer)
+        self._encode('currency', data.get('currency_code', 'N/A'))
+
+        total = data.get('total_cents')
+        remaining = data.get('remaining_cents')
+        state = ' '.join(status.lower().split())
+        if state in SETTLED_STATUSES:
+            remaining = 0
+        elif remaining is None:
+            remaining = total if total is not None and state in OUTSTANDING_STATUSES else 0
+        subtotal = data.get('subtotal_cents')
+        amounts = [item.get('amount_cents') for item in data.get('line_items', [])]
+        has_items = bool(amounts) and None not in amounts
+        self.total.append(total or 0)
+        self.outstanding.append(remaining)
+        self.expected.append(subtotal if subtotal is not None else total or 0)
+        self.items.append(sum(amounts) if has_items else 0)
+        self.flags.append((HAS_TOTAL if total is not None else 0) | (HAS_ITEMS if has_items else 0))
+
+
+def _have_numpy():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _python_group_sums(keys, groups, columns):
+    counts = [0] * groups
+    sums = [[0] * groups for _ in columns]
+    for i, key in enumerate(keys):
+        counts[key] += 1
+        for column, out in zip(columns, sums):
+            out[key] += column[i]
+    return counts, sums
+
+
+def _numpy_group_sums(keys, groups, columns):
+    import numpy as np
+    index = np.frombuffer(keys, dtype=np.int64)
+    counts = np.bincount(index, minlength=groups)
+    sums = []
+    for column in columns:
+        out = np.zeros(groups, dtype=np.int64)
+        np.add.at(out, index, np.frombuffer(column, dtype=np.int64))
+        sums.append(out.tolist())
+    return counts.tolist(), sums
+
+
+def group_sums(keys, groups, columns, use_numpy=None):
+    """
+    Per-group count and sums of each column in `columns` (array('q')), keys
+    being group indices in range(groups). use_numpy: None = if installed.
+    """
+    if not len(keys):
+        return [0] * groups, [[0] * groups for _ in columns]
+    if use_numpy or use_numpy is None and _have_numpy():
+        return _numpy_group_sums(keys, groups, columns)
+    return _python_group_sums(keys, groups, columns)
+
+
+def _rollup(cols, kind, use_numpy):
+    """Count / total / outstanding per (kind, currency) pair, largest outstanding first."""
+    currencies = len(cols.labels['currency'])
+    currency = cols.codes['currency']
+    if kind == 'currency':
+        keys, groups = currency, currencies
+    else:
+        keys = array('q', (code * currencies + cur for code, cur in zip(cols.codes[kind], currency)))
+        groups = len(cols.labels[kind]) * currencies
+    counts, (totals, outstanding) = group_sums(keys, groups, [cols.total, cols.outstanding], use_numpy)
+    rows = []
+    for key, count in enumerate(counts):
+        if not count:
+            continue
+        code = cols.labels['currency'][key % currencies]
+        row = {'currency': code, 'invoices': count, 'total_cents': totals[key],
+               'outstanding_cents': outstanding[key]}
+        if kind != 'currency':
+            row = {kind: cols.labels[kind][key // currencies], **row}
+        rows.append(row)
+    rows.sort(key=lambda row: (-row['outstanding_cents'], -row['total_cents']))
+    return rows
+
+
+def aggregate(cols, use_numpy=None, top_customers=TOP_CUSTOMERS):
+    """Returns the rollups of an InvoiceColumns as a JSON-serializable dict."""
+    mismatches = []
+    missing_total = []
+    currency_labels = cols.labels['currency']
+    for i, flags in enumerate(cols.flags):
+        if not flags & HAS_TOTAL:
+            missing_total.append(cols.numbers[i])
+        elif flags & HAS_ITEMS and cols.items[i] != cols.expected[i]:
+            mismatches.append({'invoice_number': cols.numbers[i],
+                               'currency': currency_labels[cols.codes['currency'][i]],
+                               'expected_cents': cols.expected[i], 'items_cents': cols.items[i],
+                               'difference_cents': cols.items[i] - cols.expected[i]})
+    customers = _rollup(cols, 'customer', use_numpy)
+    return {
+        'invoices': len(cols),
+        'by_currency': _rollup(cols, 'currency', use_numpy),
+        'by_status': _rollup(cols, 'status', use_numpy),
+        'by_customer': customers[:top_customers] if top_customers else customers,
+        'customers': len(customers),
+        'line_item_mismatches': mismatches,
+        'missing_total': missing_total,
+    }
+
+
+def format_report(summary):
+    """Plain-text report of an aggregate() summary."""
+    lines = [f"[Aggregate] {summary['invoices']} invoices | {len(summary['by_currency'])} currencies | "
+             f"{summary['customers']} customers | {len(summary['line_item_mismatches'])} line-item mismatches | "
+             f"{len(summary['missing_total'])} without a total"]
+
+    def table(title, rows, label):
+        lines.append("")
+        lines.append(title)
+        lines.append(f"  {label.title() if label else '':<32}{'invoices':>9}{'total':>22}{'outstanding':>22}")
+        for row in rows:
+            name = str(row[label])[:31] if label else ''
+            lines.append(f"  {name:<32}{row['invoices']:>9}"
+                         f"{format_minor(row['total_cents'], row['currency']):>22}"
+                         f"{format_minor(row['outstanding_cents'], row['currency']):>22}")
+
+    table("By currency", summary['by_currency'], 'currency')
+    table("By status", summary['by_status'], 'status')
+    table(f"By customer (top {len(summary['by_customer'])} by outstanding)", summary['by_customer'], 'customer')
+    if summary['line_item_mismatches']:
+        lines.append("")
+        lines.append("Line items not adding up to the subtotal/total")
+        for m in summary['line_item_mismatches']:
+            lines.append(f"  {m['invoice_number']:<24} expected {format_minor(m['expected_cents'], m['currency'])}"
+                         f" | items {format_minor(m['items_cents'], m['currency'])}"
+                         f" | difference {format_minor(m['difference_cents'], m['currency'])}")
+    if summary['missing_total']:
+        lines.append("")
+        lines.append(f"Without a total: {', '.join(summary['missing_total'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totals, outstanding balances and line-item checks over invoices.")
+    parser.add_argument('inputs', nargs='+', help="Parsed .jsonl files, capture files, directories or globs")
+    parser.add_argument('--cache', nargs='?', const='parse_cache.db', default=None, metavar='DB',
+                        help="Parse cache for captures (default file parse_cache.db)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Parser processes for captures")
+    parser.add_argument('--top', type=int, default=TOP_CUSTOMERS, help="Customers listed (0 = all)")
+    parser.add_argument('--json', metavar='PATH', help="Also write the summary (minor units) as JSON")
+    parser.add_argument('--numpy', action=argparse.BooleanOptionalAction, default=None,
+                        help="Sum with NumPy (default: when installed)")
+    args = parser.parse_args(argv)
+
+    from batch import iter_records
+    logger = lambda msg: print(msg, file=sys.stderr, flush=True)
+    cols = InvoiceColumns()
+    for data in iter_records(args.inputs, args.cache, args.workers, logger):
+        cols.append(data)
+    summary = aggregate(cols, use_numpy=args.numpy, top_customers=args.top)
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1, ensure_ascii=False)
+        logger(f"[Aggregate] Summary: {os.path.abspath(args.json)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,230 +1,449 @@
-import time
 import os
 import math
-# import sys # Removed
-import pyautogui
-import pyperclip
-import winsound # Added
+import sys
+import time
+from capture_archive import ARCHIVE_DIR, ORIGINAL_PAGE_TAB, CaptureArchive, new_archive_path
 from clicker import perform_clicks
-from extractor import parse_invoice_text, format_to_csv_block
+from dedup_store import DEDUP_DB, DedupStore
+from extraction_pipeline import ExtractionPipeline
+from parse_cache import PARSE_CACHE_DB, ParseCache
+from prefetch import PREFETCH_LOW_WATER, PREFETCH_MAX_WINDOW, PREFETCH_WINDOW, TAB_SWITCH_DELAY, TabPrefetcher
+from readiness import PageReadiness
+from reconcile import load_reconciler, reconciliation_path
+from report_writer import ReportWriter, open_writer, output_path_for, set_aside_partial
+from run_journal import JOURNAL_FILE, RunJournal, load_journal
+from tracing import METRICS_FILE, TRACE_DIR, Tracer, get_tracer, new_trace_path, set_tracer
 from config_manager import load_config
+from ui_driver import get_driver
 
 # Configuration
-OUTPUT_FILE = "extracted_data.csv"
-PAGE_LOAD_WAIT = 1.0  # Seconds to wait for a tab to load content
-PAGE_LOAD_WAIT = 1.0  # Seconds to wait for a tab to load content
+OUTPUT_FILE = "extracted_data.csv"  # Report path; other formats derive theirs from it (see output_path_for)
+# DEDUP_DB (seen_invoices.db) remembers accepted invoices across runs
+# PARSE_CACHE_DB (parse_cache.db) keeps parse results keyed by capture digest
+# ARCHIVE_DIR (capture_archive/) keeps the raw captures of every session for offline replay
+# TRACE_DIR (traces/) gets one JSONL span trace per session; METRICS_FILE there is the
+# Prometheus textfile snapshot unless "metrics_textfile" points elsewhere
+# JOURNAL_FILE (run_journal.jsonl) records every finished tab and batch; removed once a run completes
+PAGE_LOAD_WAIT = 1.0  # Initial estimate of a tab's load time (adapted per session)
+SELECT_DELAY = 0.05  # Between Ctrl+A and Ctrl+C
+CLIPBOARD_POLL = 0.05  # Clipboard polling interval after Ctrl+C
+CLIPBOARD_TIMEOUT = 1.0  # Give up on a copy that never reaches the clipboard
+LIST_SCROLL_PIXELS = 100  # Default list scroll per wheel click (calibrated by the setup wizard)
+SCROLL_SETTLE = 0.5  # After scrolling the list page
+WRITER_SYNC_EVERY = 1  # Invoices per fsync / SQLite commit; a tab takes seconds, a sync milliseconds
 
 def play_sound():
-    """Plays a system beep using winsound (Windows-specific)."""
-    try:
-        winsound.MessageBeep()
-    except Exception:
-        pass
+    """Plays the completion beep through the active UI driver."""
+    get_driver().beep()
 
 def save_data(all_data):
     """Saves the collected data blocks to the CSV file."""
-    csv_content = ""
+    writer = ReportWriter(OUTPUT_FILE)
     for data in all_data:
-        csv_content += format_to_csv_block(data) + "\n"
-    
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write(csv_content)
-    
-    return os.path.abspath(OUTPUT_FILE)
+        writer.write(data)
+    return writer.finalize()
 
-def perform_initial_tab_load(tab_count, logger=print):
+def copy_page():
     """
-    Cycles through all opened tabs to trigger loading, then returns to the first tab.
+    Select All + Copy on the current tab, polling the clipboard until the copy
+    lands instead of sleeping a fixed amount. Returns the stripped text ("" on timeout).
     """
-    logger(f"  [Init] cycling through {tab_count} tabs to trigger loading...")
-    
-    # Cycle through all tabs to load them
-    for i in range(tab_count):
-        pyautogui.hotkey('ctrl', 'tab')
-        # Small delay to let the browser register the tab switch and start rendering
-        time.sleep(0.3) 
-        
-    logger("  [Init] Returning to first tab, then moving to first invoice...")
-    # Jump to the first tab, then one forward to start
-    pyautogui.hotkey('ctrl', '2')
-    time.sleep(0.5)
-    logger("  [Init] Returning to first tab, then moving to first invoice...")
-    # Jump to the first tab, then one forward to start
-    pyautogui.hotkey('ctrl', '2')
-    time.sleep(0.5)
+    driver = get_driver()
+    with get_tracer().span('copy'):
+        # Clear clipboard to avoid reading stale data
+        driver.copy("")
+        driver.hotkey('ctrl', 'a')
+        driver.sleep(SELECT_DELAY)
+        driver.hotkey('ctrl', 'c')
+
+        deadline = driver.now() + CLIPBOARD_TIMEOUT
+        while True:
+            content = driver.paste()
+            if content or driver.now() >= deadline:
+                return content.strip()
+            driver.sleep(CLIPBOARD_POLL)
 
-def run_automation_logic(row_count, logger=print):
+def create_readiness(config=None):
+    """Builds the adaptive page-readiness tracker from the configured wait bounds."""
+    config = config or load_config()
+    driver = get_driver()
+    return PageReadiness(
+        min_wait=config.get("page_wait_min", 0.1),
+        max_wait=config.get("page_wait_max", 2.0),
+        initial_estimate=PAGE_LOAD_WAIT,
+        clock=driver.now,
+        sleep=driver.sleep,
+    )
+
+def create_tracer(config=None):
+    """Span tracer for one session (None when "trace" is off in the config)."""
+    config = config or load_config()
+    if not config.get("trace", True):
+        return None
+    return Tracer(new_trace_path(TRACE_DIR), clock=get_driver().now)
+
+def run_automation_logic(row_count, logger=print, resume=False):
     """
     The main logic for the automation, callable from an external GUI.
     logger: A function to output text (defaults to print).
+    resume: continue the interrupted run recorded in JOURNAL_FILE (row_count is then ignored).
     """
-    
-    # Calculate clicks (Rows + 15%)
-    click_count = math.ceil(row_count * 1.15)
-    logger(f"Target Rows: {row_count} | Performing {click_count} clicks (+15% buffer)")
+    config = load_config()
+    point = None
+    if resume:
+        point = load_journal(JOURNAL_FILE)
+        if point is None:
+            logger(f"[Resume] Nothing to resume ({JOURNAL_FILE} not found).")
+            return
+    tracer = create_tracer(config)
+    previous_tracer = set_tracer(tracer)
+    try:
+        run_session(row_count, config, logger, resume=point)
+    finally:
+        set_tracer(previous_tracer)
+        if tracer is not None:
+            tracer.close()
+            tracer.log_summary(logger)
+            metrics_path = config.get("metrics_textfile") or os.path.join(TRACE_DIR, METRICS_FILE)
+            try:
+                logger(f"[Trace] metrics: {tracer.write_prometheus(metrics_path)}")
+            except OSError as e:
+                logger(f"[Trace] Could not write metrics to {metrics_path}: {e}")
+
+def scroll_list_to(first_row, scrolled_clicks, config):
+    """
+    Scrolls the list page (under the mouse) so that row `first_row` is at or just
+    below start_y. Returns (scroll clicks now applied, y offset of that row from start_y).
+    """
+    pixels = config.get("scroll_pixels", LIST_SCROLL_PIXELS)
+    target = first_row * config.get("vertical_spacing", 23.5)
+    clicks = int(target // pixels)
+    if clicks != scrolled_clicks:
+        driver = get_driver()
+        # Negative scrolls move the page down
+        driver.scroll(-(clicks - scrolled_clicks))
+        driver.sleep(SCROLL_SETTLE)
+    return clicks, target - clicks * pixels
+
+def close_harvested_tabs(count):
+    """Closes the last `count` tabs (Ctrl+9 selects the last one) and returns to the list page."""
+    driver = get_driver()
+    for _ in range(count):
+        driver.hotkey('ctrl', '9')
+        driver.sleep(TAB_SWITCH_DELAY)
+        driver.hotkey('ctrl', 'w')
+        driver.sleep(TAB_SWITCH_DELAY)
+    driver.hotkey('ctrl', '1')
+    driver.sleep(TAB_SWITCH_DELAY)
+
+def run_session(row_count, config, logger=print, resume=None):
+    """
+    One automation session: countdown, then clicks and extraction loop (once, or
+    per batch of rows with "batch_size" set), and output.
+    resume: a ResumePoint (see run_journal.py) to continue an interrupted run from;
+    the browser must still be as that run left it.
+    """
+    tracer = get_tracer()
+
+    output_format = config.get("output_format", "report")
+    output_path = output_path_for(output_format, OUTPUT_FILE)
+    # Batched mode: click a batch of rows, harvest (and close) those tabs, scroll, repeat
+    batch_size = config.get("batch_size", 0)
+    if resume is not None:
+        row_count, batch_size = resume.row_count, resume.batch_size
+        output_format, output_path = resume.output_format, resume.output_path
+    batched = 0 < batch_size < row_count
+    if batched:
+        logger(f"Target Rows: {row_count} | in batches of {batch_size} (+15% buffer each)")
+    else:
+        # Calculate clicks (Rows + 15%)
+        logger(f"Target Rows: {row_count} | Performing {math.ceil(row_count * 1.15)} clicks (+15% buffer)")
+    if resume is not None:
+        logger(f"[Resume] Run of {resume.started}: {resume.rows_done} rows and "
+               f"{resume.tabs_seen + resume.tabs_done} tabs done, {resume.written} invoices written. "
+               f"Leave the browser as the interrupted run left it.")
+
+    # Optional ERP / ledger export to reconcile this run's invoices against (loaded
+    # before the countdown, so a bad file is reported while the user is still here)
+    reconciler = load_reconciler(config.get("extra_file_path", ""), logger)
+    if reconciler is not None and resume is not None:
+        for invoice in resume.invoices:
+            reconciler.add(invoice)
+        for invoice in resume.earlier:
+            reconciler.mark_extracted(invoice['invoice_number'], invoice['internal_id'])
 
     # 2. Countdown & Capture Original Page
     logger("\nIMPORTANT: Please switch to your browser NOW.")
     logger("Capturing 'Original Page' state in 5 seconds...")
-    for i in range(5, 0, -1):
-        logger(f"{i}...")
-        time.sleep(1)
+    with tracer.span('countdown'):
+        for i in range(5, 0, -1):
+            logger(f"{i}...")
+            get_driver().sleep(1)
     logger(" Capturing...")
 
+    # Each accepted invoice is written out and synced immediately (OUTPUT_FILE.partial
+    # for the report), so a crash mid-run keeps everything extracted so far; a
+    # resumed run appends to it.
+    if resume is None:
+        set_aside_interrupted(output_format, output_path, logger)
+    writer = open_writer(output_format, output_path, fsync_every=WRITER_SYNC_EVERY, append=resume is not None)
+    journal = RunJournal(JOURNAL_FILE, append=resume is not None, written=resume.written if resume else 0)
+    if resume is None:
+        journal.start(row_count, batch_size, output_format, output_path)
+    # Parsing, de-duplication and writing run on a worker thread, overlapping
+    # with the page-load waits and navigation of the next tab.
+    persistent_dedup = config.get("persistent_dedup", True)
+    seen_ids = DedupStore(DEDUP_DB) if persistent_dedup else set()
+    if persistent_dedup:
+        logger(f"[Dedup] {len(seen_ids)} invoices already known from previous runs.")
+    if resume is not None:
+        for key in resume.keys:
+            if key not in seen_ids:
+                seen_ids.add(key)
+        if persistent_dedup:
+            seen_ids.commit()
+    cache = None
+    if config.get("parse_cache", True):
+        cache = ParseCache(PARSE_CACHE_DB, max_mb=config.get("parse_cache_mb", 256))
+    pipeline = ExtractionPipeline(writer, logger, seen_ids=seen_ids, cache=cache, journal=journal,
+                                  reconciler=reconciler)
+    readiness = create_readiness(config)
+    archive = CaptureArchive(new_archive_path(ARCHIVE_DIR)) if config.get("archive_captures", True) else None
+    close_tabs = batched and config.get("close_harvested_tabs", True)
+    completed = False
+    try:
+        first_row = scrolled_clicks = 0
+        tabs_seen = 0  # Tabs harvested so far (numbers tabs across batches)
+        open_tabs = 0  # Tabs of earlier batches still open
+        pending = None  # Resumed batch whose clicks were already done
+        if resume is not None:
+            first_row, scrolled_clicks = resume.rows_done, resume.scrolled_clicks
+            tabs_seen, open_tabs = resume.tabs_seen, resume.open_tabs
+            pending = resume.batch
+            if pending is not None:
+                # The list is still scrolled to the interrupted batch
+                scrolled_clicks = pending['scrolled_clicks']
+        while first_row < row_count:
+            rows = min(batch_size, row_count - first_row) if batched else row_count
+            if batched:
+                logger(f"\n=== Batch: rows {first_row + 1}-{first_row + rows} of {row_count} ===")
+            if pending is None:
+                y_offset = 0.0
+                if first_row:
+                    scrolled_clicks, y_offset = scroll_list_to(first_row, scrolled_clicks, config)
+                orig_pg, clicks = click_rows(rows, y_offset, config, logger, archive, tabs_seen)
+                journal.batch(first_row, rows, clicks, tabs_seen, open_tabs, scrolled_clicks)
+                done = 0
+            else:
+                # Back on the list page of the interrupted batch; its tabs are still open
+                get_driver().hotkey('ctrl', '1')
+                with tracer.span('original_capture'):
+                    orig_pg = copy_page()
+                clicks, done = pending['clicks'], resume.tabs_done
+                pending = None
+                logger(f"[Resume] Skipping the {done} tabs of this batch already harvested.")
+            harvested = done + harvest_tabs(orig_pg, open_tabs, clicks, config, pipeline, readiness, logger,
+                                            archive, tabs_seen, done)
+            tabs_seen += harvested
+            first_row += rows
+            if close_tabs:
+                with tracer.span('close_tabs', count=harvested):
+                    close_harvested_tabs(harvested)
+            else:
+                open_tabs += harvested
+            journal.batch_done(first_row, tabs_seen, open_tabs, scrolled_clicks)
+            if batched and not harvested:
+                logger("[Batch] No tabs opened in this batch: end of the list.")
+                break
+        completed = True
+    finally:
+        # Let the worker drain everything already captured
+        pipeline.close()
+        pipeline.log_summary()
+        readiness.log_summary(logger)
+        if persistent_dedup:
+            seen_ids.close()
+        if cache is not None:
+            cache.close()
+        if archive is not None:
+            archive.close()
+            archive.log_summary(logger)
+        if not completed:
+            # Keep what was written (and the journal) for --resume
+            writer.abort()
+            journal.close()
+            logger("[Resume] Interrupted; continue with the Resume button or `python automation.py --resume`.")
+
+    # 5. Save Results
+    if writer.count or resume is not None and resume.written:
+        saved_path = writer.finalize()
+        logger(f"\nSUCCESS! Data saved to:\n{saved_path}")
+        play_sound()
+    else:
+        writer.abort(keep_partial=False)
+        logger("\nNo unique data was extracted.")
+    if reconciler is not None:
+        diff_path = reconciler.write_diff(reconciliation_path(output_path))
+        reconciler.log_summary(logger)
+        logger(f"[Reconcile] Diff: {diff_path}")
+    journal.complete()
+
+def set_aside_interrupted(output_format, output_path, logger=print):
+    """
+    Starting over instead of resuming: keeps the partial output of the
+    interrupted run (and any other left at output_path) under a timestamped
+    name, since the dedup store already knows its invoices and later runs
+    would skip them. Its journal is then discarded.
+    """
+    point = load_journal(JOURNAL_FILE)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    outputs = [(output_format, output_path)]
+    if point is not None:
+        if point.started:
+            stamp = point.started.replace("-", "").replace(":", "").replace(" ", "-")
+        if (point.output_format, point.output_path) not in outputs:
+            outputs.append((point.output_format, point.output_path))
+    for fmt, path in outputs:
+        kept = set_aside_partial(fmt, path, f"interrupted-{stamp}")
+        if kept:
+            logger(f"[Resume] Starting over; the interrupted run's output is kept in:\n{kept}")
+    if os.path.exists(JOURNAL_FILE):
+        logger(f"[Resume] The interrupted run in {JOURNAL_FILE} is discarded.")
+
+def click_rows(rows, y_offset, config, logger=print, archive=None, tab_offset=0):
+    """
+    Captures the list page and Ctrl+Clicks `rows` rows (+15%) starting y_offset
+    pixels below start_y. Returns (list page text, clicks performed).
+    """
+    tracer = get_tracer()
+    click_count = math.ceil(rows * 1.15)
+
     # Capture logic
-    pyautogui.hotkey('ctrl', 'a')
-    time.sleep(0.5)
-    pyautogui.hotkey('ctrl', 'c')
-    time.sleep(0.5)
-    orig_pg = pyperclip.paste().strip()
+    with tracer.span('original_capture'):
+        orig_pg = copy_page()
+    if archive is not None:
+        archive.append(orig_pg, ORIGINAL_PAGE_TAB)
     logger("Original page captured. Starting Clicker sequence...")
     
     # 3. Perform Clicks
-    perform_clicks(click_count)
+    with tracer.span('clicks', count=click_count):
+        plan = perform_clicks(click_count, seed=config.get("click_seed"),
+                              budget=config.get("click_budget") or None, y_offset=y_offset)
+    if tracer.trace_path:
+        # Planned vs. measured click timings, next to the session trace
+        suffix = f".clicks-{tab_offset}.csv" if tab_offset else ".clicks.csv"
+        logger(f"Click plan: {plan.export(os.path.splitext(tracer.trace_path)[0] + suffix)}")
+    return orig_pg, click_count
+
+def harvest_tabs(orig_pg, open_tabs, click_count, config, pipeline, readiness, logger=print, archive=None,
+                 tab_offset=0, done=0):
+    """
+    Runs the extraction loop over the tabs opened by `click_count` clicks.
+    open_tabs: tabs left open by earlier batches; done: tabs of this batch already
+    harvested (a resumed run). Both are skipped over.
+    Returns the number of tabs harvested.
+    """
+    tracer = get_tracer()
 
     # 4. Extraction Loop
-    logger("\n--- Starting Extraction Loop (Reverse Order) ---")
+    logger("\n--- Starting Extraction Loop ---")
     
     # --- PRE-LOOP INITIALIZATION ---
-    # Trigger loading for ALL tabs before starting processing
-    perform_initial_tab_load(click_count, logger)
+    # Touch the first window of tabs so they start loading, and land on the first one
+    prefetcher = TabPrefetcher(open_tabs + click_count, window=config.get("prefetch_window", PREFETCH_WINDOW),
+                               low_water=config.get("prefetch_low_water", PREFETCH_LOW_WATER),
+                               max_window=config.get("prefetch_max_window", PREFETCH_MAX_WINDOW))
+    with tracer.span('initial_load', window=prefetcher.window):
+        prefetcher.skip(open_tabs + done)
+        prefetcher.advance()
+    try:
+        with tracer.span('extraction_loop'):
+            return run_extraction_loop(orig_pg, pipeline, readiness, prefetcher, logger, archive,
+                                       tab_offset + done, resumed=done > 0)
+    finally:
+        prefetcher.log_summary(logger)
 
-    collected_data = []
-    seen_ids = set() # Global de-duplication
-    tab_index = 0
+def run_extraction_loop(orig_pg, pipeline, readiness, prefetcher, logger=print, archive=None, tab_offset=0,
+                        resumed=False):
+    """
+    UI side of the extraction loop: captures each tab and moves to the next
+    through `prefetcher`, which keeps the tabs ahead loading.
+    Raw captures are handed to `pipeline` (and appended to `archive`, if given);
+    tabs are numbered from tab_offset + 1. Returns the number of tabs visited
+    when the original page comes back.
+    resumed: the loop starts partway through the tabs, so the original page
+    showing up means the end, even on the first tab.
+    """
+    driver = get_driver()
+    tracer = get_tracer()
+    tab_index = tab_offset
     
-    has_moved_past_start = False
+    has_moved_past_start = resumed
 
     while True:
         tab_index += 1
-        logger(f"Processing tab {tab_index}...")
+        tracer.tab = tab_index
+        logger(f"Processing tab {tab_index}... (parse queue: {pipeline.depth})")
         
-        # A. Wait for content
-        time.sleep(PAGE_LOAD_WAIT)
-
-        # B. Copy Content (With Progressive Retry Logic)
-        def capture_with_retries():
-            # Retry delays as requested
-            delays = [0.2, 0.4, 0.6, 0.8, 1.0]
-            
-            for attempt, delay in enumerate(delays + [None]): # + [None] for the final attempt
-                # Clear clipboard to avoid reading stale data
-                pyperclip.copy("")
-                
-                # Perform Copy
-                pyautogui.hotkey('ctrl', 'a')
-                time.sleep(0.5) 
-                pyautogui.hotkey('ctrl', 'c')
-                time.sleep(0.5)
-                
-                content = pyperclip.paste().strip()
-                
-                # Immediate success if it matches original page (Stop condition)
-                if content == orig_pg:
-                    return content
-
-                # Check for "Partial Load" (Too short or too few lines)
-                is_loaded = True
-                if not content:
-                    is_loaded = False
-                elif len(content) < 250:
-                    # logger(f"    (Content too short: {len(content)} chars)")
-                    is_loaded = False
-                elif content.count('\n') < 25:
-                    # logger(f"    (Too few lines: {content.count('\n')})")
-                    is_loaded = False
-
-                if is_loaded:
-                # Immediate success if it matches original page (Stop condition)
-                    if content == orig_pg:
-                        return content
-
-                # Check for "Partial Load" (Too short or too few lines)
-                is_loaded = True
-                if not content:
-                    is_loaded = False
-                elif len(content) < 250:
-                    # logger(f"    (Content too short: {len(content)} chars)")
-                    is_loaded = False
-                elif content.count('\n') < 25:
-                    # logger(f"    (Too few lines: {content.count('\n')})")
-                    is_loaded = False
-
-                if is_loaded:
-                    return content
-                
-                # If content is invalid and we have delays left, wait and retry
-                # If content is invalid and we have delays left, wait and retry
-                if delay is not None:
-                    logger(f"  -> Page not fully loaded (Partial/Blank). Retrying in {delay}s (Attempt {attempt+1}/5)...")
-                    logger(f"  -> Page not fully loaded (Partial/Blank). Retrying in {delay}s (Attempt {attempt+1}/5)...")
-                    time.sleep(delay)
-            
-            return "" # Give up
-
-        current_content = capture_with_retries()
+        # A/B. Wait for content and copy it (adaptive readiness, see readiness.py)
+        capture_start = driver.now()
+        with tracer.span('capture') as span:
+            current_content = readiness.wait_for_page(copy_page, orig_pg, logger)
+            span['retries'] = max(0, readiness.last_attempts - 1)
+            span['chars'] = len(current_content)
+        pipeline.stats.record('capture', driver.now() - capture_start)
+        if archive is not None and current_content:
+            archive.append(current_content, tab_index)
 
         if not current_content:
-            logger("  -> Failed to capture content after 5 retries. Skipping tab.")
-            # We don't break, just continue to next iteration but perform warmup/nav first
+            logger("  -> Failed to capture content within the readiness budget. Skipping tab.")
+            tracer.outcome(tab_index, 'failed', retries=max(0, readiness.last_attempts - 1))
+            # We don't break, just continue to next iteration but navigate first
         
         # D. STOP CONDITION
         is_original_page = (current_content == orig_pg)
         
         if is_original_page:
+            if not has_moved_past_start and tab_index - tab_offset > 1:
+                # Still on the list page after moving forward: no tab was opened
+                logger(">> No new tabs to process.")
+                tracer.outcome(tab_index, 'stop')
+                return 0
             if not has_moved_past_start:
                  logger("  -> Content matches Original Page, but strictly inside first few checks. Continuing...")
             else:
                 logger(">> LOOP COMPLETE: Returned to original page.")
-                break
+                tracer.outcome(tab_index, 'stop')
+                return tab_index - tab_offset - 1
         else:
             has_moved_past_start = True
+            if current_content:
+                prefetcher.page_loaded(readiness.last_ready_on_arrival)
         
-        # E. DE-DUPLICATION and PARSING
-        if current_content:
-            parsed_data = parse_invoice_text(current_content)
-            inv_id = parsed_data.get('invoice_number', 'N/A')
-            
-            # Use invoice number as primary key.
-            # If N/A, fallback to a stable fingerprint (Total + Billed To + Items)
-            if inv_id != 'N/A':
-                 unique_key = inv_id
-            else:
-                 total = parsed_data.get('total_amount', 'N/A')
-                 billed = parsed_data.get('billed_to_name', 'N/A')
-                 items_str = str(parsed_data.get('line_items', []))
-                 unique_key = f"FINGERPRINT|{total}|{billed}|{items_str}"
-            
-            if unique_key in seen_ids:
-                logger(f"  -> Duplicate found ({unique_key if inv_id != 'N/A' else 'Fingerprint'}). Skipping.")
-            else:
-                seen_ids.add(unique_key)
-                collected_data.append(parsed_data)
-                logger(f"  -> Extracted: {inv_id}")
+        # E. DE-DUPLICATION and PARSING (handed off to the worker thread)
+        # The list page itself is never an invoice
+        if current_content and not is_original_page:
+            with tracer.span('enqueue'):
+                pipeline.submit(tab_index, current_content)
                 
-        # F. Navigate Forward (Next Tab) with Wiggle (Forward 3, Back 2)
-        # Net movement: +1 (The immediate next tab)
-        # Purpose: Trigger loading of subsequent tabs
-        pyautogui.hotkey('ctrl', 'tab')
-        time.sleep(0.05)
-        pyautogui.hotkey('ctrl', 'tab')
-        time.sleep(0.05)
-        pyautogui.hotkey('ctrl', 'tab')
-        time.sleep(0.05)
-        pyautogui.hotkey('ctrl', 'shift', 'tab')
-        time.sleep(0.05)
-        pyautogui.hotkey('ctrl', 'shift', 'tab')
-        time.sleep(0.8) 
+        # F. Navigate to the next tab, touching further tabs when the prefetch window runs low
+        # No fixed settle here: the next tab's readiness wait covers rendering
+        nav_start = driver.now()
+        with tracer.span('navigate') as span:
+            span['touched'] = prefetcher.advance()
+        pipeline.stats.record('navigate', driver.now() - nav_start)
 
-    # 5. Save Results
-    if collected_data:
-        saved_path = save_data(collected_data)
-        logger(f"\nSUCCESS! Data saved to:\n{saved_path}")
-        play_sound()
-    else:
-        logger("\nNo unique data was extracted.")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--resume" in argv:
+        run_automation_logic(0, resume=True)
+        return
+    if load_journal(JOURNAL_FILE) is not None:
+        answer = input(f"An interrupted run can be resumed ({JOURNAL_FILE}). Resume it? [Y/n]: ").strip().lower()
+        if answer in ("", "y", "yes"):
+            run_automation_logic(0, resume=True)
+            return
 
-def main():
     # Load Config
     config = load_config()
     default_rows = config.get("row_count", 20)
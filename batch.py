@@ -0,0 +1,316 @@
+"""
+Offline batch extraction over saved Ctrl+A captures.
+
+Usage:
+    python extractor.py CAPTURES_DIR [MORE_DIRS_OR_GLOBS ...] -o extracted_data.csv
+    python batch.py "archive/2025-*/**/*.txt" --workers 8 --order completion
+    python batch.py captures/ --format sqlite -o invoices.db
+    python batch.py captures/ --cache -o extracted_data.csv   # re-runs skip unchanged captures
+    python batch.py captures/ --profile -o extracted_data.csv  # cProfile + stage counters (profiling.py)
+    python batch.py captures/ -o extracted_data.csv --reconcile ledger.csv  # diff against an ERP export
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from extractor import parse_invoice_text
+from parse_cache import MAX_CACHE_MB, PARSE_CACHE_DB, ParseCache, capture_digest
+from profiling import PROFILE_DIR, Profiler, profile_settings
+from reconcile import Reconciler, reconciliation_path
+from report_writer import OUTPUT_FORMATS, RENDERERS, STREAM_FORMATS, open_writer
+
+CAPTURE_EXTENSIONS = ('.txt',)
+PROGRESS_INTERVAL = 2.0  # Seconds between progress lines
+
+
+def expand_inputs(inputs):
+    """
+    Expands directories (recursively), glob patterns and plain file paths into
+    a sorted, de-duplicated list of capture files.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _dirs, files in os.walk(item):
+                for name in files:
+                    if name.lower().endswith(CAPTURE_EXTENSIONS):
+                        paths.append(os.path.join(root, name))
+        elif glob.has_magic(item):
+            paths.extend(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+        else:
+            paths.append(item)
+    return sorted(dict.fromkeys(paths))
+
+
+def read_capture(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def parse_file(path, cache=None):
+    """
+    Parses one capture file, consulting `cache` (a ParseCache) first if given.
+    Returns (path, parsed_data, error, lookup); exactly one of parsed_data/error
+    is None. lookup is None without a cache, else (digest, hit, capture_bytes).
+    """
+    try:
+        content = read_capture(path)
+        if cache is None:
+            return path, parse_invoice_text(content), None, None
+        digest = capture_digest(content)
+        nbytes = len(content.encode('utf-8'))
+        data = cache.get(digest, nbytes)
+        if data is not None:
+            return path, data, None, (digest, True, nbytes)
+        return path, parse_invoice_text(content), None, (digest, False, nbytes)
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}", None
+
+
+_worker_cache = None
+
+
+def _parse_chunk(paths, cache_path=None):
+    """Worker entry point: one pool task handles a whole chunk of files."""
+    global _worker_cache
+    if cache_path and _worker_cache is None:
+        # Workers only read; the parent process stores new entries
+        _worker_cache = ParseCache(cache_path, readonly=True)
+    return [parse_file(path, _worker_cache if cache_path else None) for path in paths]
+
+
+def _chunks(paths, chunksize):
+    for i in range(0, len(paths), chunksize):
+        yield paths[i:i + chunksize]
+
+
+def iter_results(paths, workers=None, chunksize=16, order='input', cache=None):
+    """
+    Yields parse_file() results for every path.
+    Chunks are submitted to a process pool with a bounded number in flight, so
+    memory stays proportional to workers * chunksize, not to the number of files.
+    order: 'input' keeps the path order, 'completion' yields chunks as they finish.
+    cache: a ParseCache; worker processes open their own read-only view of it.
+    """
+    if workers == 1:
+        for path in paths:
+            yield parse_file(path, cache)
+        return
+    # Imported here: multiprocessing costs more at startup than parsing a few files
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    cache_path = cache.path if cache is not None else None
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    chunks = _chunks(paths, max(1, chunksize))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def refill():
+            while len(pending) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                pending.append(pool.submit(_parse_chunk, chunk, cache_path))
+
+        refill()
+        while pending:
+            if order == 'completion':
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+            else:
+                yield from pending.popleft().result()
+            refill()
+
+
+def iter_records(inputs, cache_path=None, workers=None, logger=print):
+    """
+    Yields parsed invoices from JSONL files (one record per line, e.g. a jsonl
+    run output) and from captures (files, directories, globs) parsed through
+    iter_results. Per-file errors are logged and skipped.
+    """
+    captures = []
+    for item in inputs:
+        if item.endswith('.jsonl') and os.path.isfile(item):
+            with open(item, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            captures.append(item)
+    paths = expand_inputs(captures)
+    if not paths:
+        return
+    if workers is None and len(paths) <= 16:
+        workers = 1
+    cache = ParseCache(cache_path) if cache_path else None
+    try:
+        for path, data, error, lookup in iter_results(paths, workers, cache=cache):
+            if error is not None:
+                logger(f"[Batch] ERROR {path}: {error}")
+                continue
+            if lookup is not None and not lookup[1]:
+                cache.put(lookup[0], data)
+            yield data
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_batch(inputs, output=None, workers=None, chunksize=16, order='input', logger=None, fmt='report',
+              cache_path=None, cache_mb=MAX_CACHE_MB, profile_dir=None, profile_memory=False,
+              reconciler=None, reconcile_path=None):
+    """
+    Parses every capture under `inputs` and streams the records to `output`
+    (a path, written by the `fmt` sink from report_writer, or stdout when None
+    for the report / jsonl formats) as results arrive.
+    cache_path: a parse cache file; unchanged captures are not parsed again.
+    profile_dir: profile the run (see profiling.py) and write the .pstats file there.
+    reconciler: a reconcile.Reconciler fed every parsed invoice; its diff is
+    written to reconcile_path at the end.
+    Per-file errors are logged and counted; they never stop the batch.
+    Returns a stats dictionary.
+    """
+    if logger is None:
+        logger = lambda msg: print(msg, file=sys.stderr, flush=True)
+
+    paths = expand_inputs(inputs)
+    stats = {'files': len(paths), 'parsed': 0, 'errors': 0, 'elapsed': 0.0}
+    if not paths:
+        logger("[Batch] No capture files found.")
+        return stats
+
+    if workers is None and len(paths) <= chunksize:
+        # A single chunk gains nothing from a process pool, which takes longer to start than to parse it
+        workers = 1
+
+    profiler = None
+    if profile_dir:
+        # cProfile and the stage counters only see the process they run in
+        if workers != 1:
+            logger("[Profile] Profiling runs in-process (--workers 1).")
+        workers = 1
+        profiler = Profiler(profile_dir, label="batch", memory=profile_memory)
+
+    logger(f"[Batch] {len(paths)} files | workers: {workers or os.cpu_count()} | order: {order}")
+    writer = open_writer(fmt, output, fsync_every=500) if output else None
+    render = RENDERERS.get(fmt)
+    cache = ParseCache(cache_path, max_mb=cache_mb) if cache_path else None
+    in_process = workers == 1
+    start = time.perf_counter()
+    last_report = start
+    if profiler is not None:
+        profiler.start()
+    try:
+        for done, (path, data, error, lookup) in enumerate(
+                iter_results(paths, workers, chunksize, order, cache), 1):
+            if error is not None:
+                stats['errors'] += 1
+                logger(f"[Batch] ERROR {path}: {error}")
+            else:
+                stats['parsed'] += 1
+                if lookup is not None:
+                    digest, hit, nbytes = lookup
+                    if not in_process:
+                        cache.record(hit, nbytes)
+                    if not hit:
+                        cache.put(digest, data)
+                if writer:
+                    writer.write(data)
+                else:
+                    sys.stdout.write(render(data) + "\n")
+                if reconciler is not None:
+                    reconciler.add(data)
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                rate = done / (now - start)
+                logger(f"[Batch] {done}/{len(paths)} files | {rate:.1f} invoices/s | {stats['errors']} errors")
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if cache is not None:
+            cache.close()
+    if writer:
+        writer.finalize()
+    else:
+        sys.stdout.flush()
+
+    stats['elapsed'] = time.perf_counter() - start
+    rate = stats['parsed'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    logger(f"[Batch] Done: {stats['parsed']} parsed, {stats['errors']} errors "
+           f"in {stats['elapsed']:.2f}s ({rate:.1f} invoices/s)")
+    if cache is not None:
+        cache.log_summary(logger)
+        stats['cache_hits'] = cache.hits
+    if output:
+        logger(f"[Batch] Output: {os.path.abspath(output)}")
+    if reconciler is not None:
+        diff_path = reconciler.write_diff(reconcile_path)
+        reconciler.log_summary(logger)
+        logger(f"[Reconcile] Diff: {diff_path}")
+    if profiler is not None:
+        profiler.report(logger)
+    return stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Re-extract invoices from saved page captures.")
+    parser.add_argument('inputs', nargs='+', help="Capture files, directories or glob patterns")
+    parser.add_argument('-o', '--output', help="Output file, or directory for --format csv (default: stdout)")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='report',
+                        help="report (INVOICE REPORT blocks), csv (tidy tables), jsonl or sqlite")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 1 = in-process)")
+    parser.add_argument('--chunksize', type=int, default=16, help="Files per pool task (default 16)")
+    parser.add_argument('--order', choices=['input', 'completion'], default='input',
+                        help="Emit results in input order or as they complete")
+    parser.add_argument('--cache', nargs='?', const=PARSE_CACHE_DB, default=None, metavar='DB',
+                        help=f"Reuse parse results of unchanged captures (default file {PARSE_CACHE_DB})")
+    parser.add_argument('--cache-mb', type=float, default=MAX_CACHE_MB,
+                        help=f"Parse cache size limit in MiB (default {MAX_CACHE_MB})")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_DIR, default=None, metavar='DIR',
+                        help=f"Profile the run in-process; .pstats goes to DIR (default {PROFILE_DIR}/)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="With profiling, also sample allocations with tracemalloc")
+    parser.add_argument('--reconcile', metavar='CSV',
+                        help="Reconcile the invoices against this ERP / ledger export (see reconcile.py)")
+    parser.add_argument('--reconcile-out', metavar='PATH',
+                        help="Reconciliation diff (default: next to the output, or to the reference)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.output is None and args.format not in STREAM_FORMATS:
+        parser.error(f"--format {args.format} needs -o/--output")
+    profile_dir, profile_memory = profile_settings(args.profile, args.profile_memory)
+    reconciler = None
+    if args.reconcile:
+        try:
+            reconciler = Reconciler(args.reconcile, logger=lambda msg: print(msg, file=sys.stderr, flush=True))
+        except (OSError, ValueError) as e:
+            parser.error(f"--reconcile {args.reconcile}: {e}")
+    reconcile_path = args.reconcile_out or reconciliation_path(args.output or args.reconcile)
+    stats = run_batch(args.inputs, args.output, args.workers, args.chunksize, args.order, fmt=args.format,
+                      cache_path=args.cache, cache_mb=args.cache_mb,
+                      profile_dir=profile_dir, profile_memory=profile_memory,
+                      reconciler=reconciler, reconcile_path=reconcile_path)
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+End-to-end benchmark of run_automation_logic against the simulated browser.
+
+Runs the real click -> prefetch -> capture -> parse -> write loop on a virtual
+clock, so a 200-tab session takes well under a second of wall time. Reports the
+simulated session time (what the operator would wait) and per-tab cost.
+
+Run from the project root:
+    python benchmarks/bench_automation.py --rows 200 --latency 0.5 1.5 --seed 7
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import automation  # noqa: E402
+from config_manager import load_config  # noqa: E402
+from ui_driver import SimulatedBrowser, set_driver  # noqa: E402
+
+SAMPLES = ['sample1.txt', 'sample2.txt', 'sample3.txt', 'sample4.txt']
+
+
+def make_rows(count):
+    """Distinct invoice pages built from the samples (each gets its own invoice number and in_ ID)."""
+    templates = []
+    for name in SAMPLES:
+        with open(os.path.join(ROOT, name), 'r', encoding='utf-8') as f:
+            text = f.read()
+        number = re.search(r'Invoice number\s+(\S+)', text).group(1)
+        internal_id = re.search(r'\bID\s+(in_\w+)', text).group(1)
+        templates.append((text, number, internal_id))
+    rows = []
+    for i in range(count):
+        text, number, internal_id = templates[i % len(templates)]
+        text = text.replace(internal_id, f"{internal_id[:-5]}{i:05d}")
+        rows.append(text.replace(number, f"{number}-{i:05d}"))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated end-to-end automation benchmark.")
+    parser.add_argument('--rows', type=int, default=100, help="Invoices in the list (default 100)")
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.8],
+                        help="Tab load latency in seconds, or MIN MAX for a uniform draw")
+    parser.add_argument('--partial-mode', choices=['partial', 'blank'], default='partial')
+    parser.add_argument('--background-loading', action='store_true',
+                        help="Tabs start loading when opened instead of when first activated")
+    parser.add_argument('--prefetch-window', type=int, default=None,
+                        help="Override the configured prefetch window (tabs kept loading ahead)")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Override the configured batch size (rows clicked and harvested per batch)")
+    parser.add_argument('--interrupt-after', type=int, default=None, metavar='COPIES',
+                        help="Interrupt the run at this clipboard read, then resume it from the journal")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--quiet', action='store_true', help="Hide the automation log")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = load_config()
+    if args.prefetch_window is not None:
+        config = dict(config, prefetch_window=args.prefetch_window)
+    if args.batch_size is not None:
+        config = dict(config, batch_size=args.batch_size)
+    automation.load_config = lambda: config
+    latency = args.latency[0] if len(args.latency) == 1 else tuple(args.latency[:2])
+    browser = SimulatedBrowser(
+        make_rows(args.rows),
+        start_y=config.get("start_y", 0),
+        row_height=config.get("vertical_spacing", 23.5),
+        load_latency=latency,
+        background_loading=args.background_loading,
+        partial_mode=args.partial_mode,
+        seed=args.seed,
+    )
+    previous = set_driver(browser)
+
+    out_dir = tempfile.mkdtemp(prefix="bench_automation_")
+    automation.OUTPUT_FILE = os.path.join(out_dir, "extracted_data.csv")
+    automation.DEDUP_DB = os.path.join(out_dir, "seen_invoices.db")
+    automation.PARSE_CACHE_DB = os.path.join(out_dir, "parse_cache.db")
+    automation.ARCHIVE_DIR = os.path.join(out_dir, "capture_archive")
+    automation.TRACE_DIR = os.path.join(out_dir, "traces")
+    automation.JOURNAL_FILE = os.path.join(out_dir, "run_journal.jsonl")
+    logger = (lambda msg: None) if args.quiet else print
+    quiet = contextlib.redirect_stdout(io.StringIO()) if args.quiet else contextlib.nullcontext()
+
+    if args.interrupt_after:
+        paste = browser.paste
+        reads = [0]
+
+        def interrupting_paste():
+            reads[0] += 1
+            if reads[0] == args.interrupt_after:
+                raise KeyboardInterrupt("simulated interruption")
+            return paste()
+        browser.paste = interrupting_paste
+
+    wall_start = time.perf_counter()
+    try:
+        with quiet:
+            try:
+                automation.run_automation_logic(args.rows, logger)
+            except KeyboardInterrupt:
+                print(f"\n=== Interrupted at clipboard read {args.interrupt_after}; resuming ===")
+                automation.run_automation_logic(args.rows, logger, resume=True)
+    finally:
+        set_driver(previous)
+    wall = time.perf_counter() - wall_start
+
+    simulated = browser.now()
+    tabs = browser.counters['tabs_opened']
+    print("\n=== Simulated session ===")
+    print(f"rows: {args.rows} | tabs opened: {tabs} (max open {browser.counters['max_open_tabs']}, "
+          f"closed {browser.counters['tabs_closed']}) | hotkeys: {browser.counters['hotkeys']} | "
+          f"copies: {browser.counters['copies']}")
+    print(f"simulated time: {simulated:.1f}s | per tab: {simulated / max(tabs, 1):.2f}s | "
+          f"per 100 invoices: {simulated / max(args.rows, 1) * 100:.1f}s")
+    print(f"wall time: {wall:.2f}s | output: {automation.OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
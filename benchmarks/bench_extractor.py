@@ -0,0 +1,159 @@
+"""
+Throughput and regression benchmark for the extractor.
+
+Measures each stage (split, field extraction, line items, formatting, and the
+full parse) over synthetic corpora of different shapes, reporting invoices/s,
+MB/s and peak traced memory. Before timing anything it checks the parser output
+against the golden digests in benchmarks/golden/, so a speedup that changes
+results fails loudly.
+
+Run from the project root:
+    python benchmarks/bench_extractor.py                  # verify goldens + all profiles
+    python benchmarks/bench_extractor.py --profile huge   # one profile
+    python benchmarks/bench_extractor.py --update-golden  # after an intended output change
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from extractor import (  # noqa: E402
+    extract_fields, extract_line_items, find_block_spans, format_to_csv_block, parse_invoice_text,
+)
+from synth_invoices import generate_corpus, generate_invoice, NOISE_KINDS, STATUSES  # noqa: E402
+
+GOLDEN_FILE = os.path.join(HERE, 'golden', 'extractor_golden.json')
+SAMPLES = ['sample1.txt', 'sample2.txt', 'sample3.txt', 'sample4.txt']
+GOLDEN_SEED = 20250101
+
+# name: (seed, count, (min_items, max_items))
+PROFILES = {
+    'typical': (1, 500, (1, 10)),
+    'large': (2, 40, (100, 1000)),
+    'huge': (3, 3, (10000, 10000)),
+}
+
+
+# --- Golden outputs ---
+
+def golden_cases():
+    """Yields (case_name, page_text): the samples plus a fixed synthetic spread."""
+    for name in SAMPLES:
+        with open(os.path.join(ROOT, name), 'r', encoding='utf-8') as f:
+            yield name, f.read()
+    index = 0
+    for items in (1, 2, 5, 50, 500):
+        for status in STATUSES:
+            text, _ = generate_invoice(GOLDEN_SEED, index, items=items, status=status)
+            yield f"synthetic_{index:03d}_{status}_{items}", text
+            index += 1
+    for kind in NOISE_KINDS:
+        text, _ = generate_invoice(GOLDEN_SEED, index, items=3, noise=(kind,))
+        yield f"synthetic_{index:03d}_{kind}", text
+        index += 1
+    text, _ = generate_invoice(GOLDEN_SEED, index, items=10000)
+    yield f"synthetic_{index:03d}_10000_items", text
+
+
+def output_digest(text):
+    parsed = parse_invoice_text(text)
+    payload = json.dumps({'parsed': parsed, 'csv': format_to_csv_block(parsed)},
+                         sort_keys=True, ensure_ascii=False, default=dict)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def check_golden(update=False):
+    current = {name: output_digest(text) for name, text in golden_cases()}
+    if update:
+        os.makedirs(os.path.dirname(GOLDEN_FILE), exist_ok=True)
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"[Golden] Updated {len(current)} digests in {GOLDEN_FILE}")
+        return True
+
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    mismatched = sorted(name for name in expected if current.get(name) != expected[name])
+    missing = sorted(set(current) - set(expected))
+    for name in mismatched:
+        print(f"[Golden] MISMATCH {name}")
+    for name in missing:
+        print(f"[Golden] no golden digest for {name} (run --update-golden)")
+    ok = not mismatched and not missing
+    print(f"[Golden] {len(expected) - len(mismatched)}/{len(expected)} cases identical")
+    return ok
+
+
+# --- Stage benchmarks ---
+
+def _measure(fn, inputs, size_of):
+    """Runs fn over inputs once for timing, once under tracemalloc for the peak."""
+    start = time.perf_counter_ns()
+    for item in inputs:
+        fn(item)
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+    total_bytes = sum(size_of(item) for item in inputs)
+
+    tracemalloc.start()
+    for item in inputs:
+        fn(item)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, total_bytes, peak
+
+
+def bench_profile(name):
+    seed, count, items = PROFILES[name]
+    texts = [text for _name, text in generate_corpus(seed, count, items=items)]
+    spans = [find_block_spans(text) for text in texts]
+    parsed = [parse_invoice_text(text) for text in texts]
+    text_bytes = lambda t: len(t.encode('utf-8'))
+
+    stages = [
+        ('split', lambda t: find_block_spans(t), texts, text_bytes),
+        ('fields', lambda ts: extract_fields(*ts), list(zip(texts, spans)), lambda ts: text_bytes(ts[0])),
+        ('line_items', lambda ts: extract_line_items(*ts), list(zip(texts, spans)), lambda ts: text_bytes(ts[0])),
+        ('format', format_to_csv_block, parsed, lambda d: len(format_to_csv_block(d))),
+        ('parse', parse_invoice_text, texts, text_bytes),
+    ]
+
+    print(f"\n=== {name}: {count} invoices, {items[0]}-{items[1]} line items ===")
+    print(f"{'stage':<12}{'invoices/s':>14}{'MB/s':>10}{'total ms':>11}{'peak KiB':>11}")
+    for stage, fn, inputs, size_of in stages:
+        elapsed, total_bytes, peak = _measure(fn, inputs, size_of)
+        rate = len(inputs) / elapsed if elapsed else float('inf')
+        mbps = total_bytes / elapsed / 1e6 if elapsed else float('inf')
+        print(f"{stage:<12}{rate:>14.1f}{mbps:>10.1f}{elapsed * 1000:>11.1f}{peak / 1024:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractor throughput / regression benchmark.")
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                        help="Profile(s) to run (default: all)")
+    parser.add_argument('--update-golden', action='store_true',
+                        help="Rewrite the golden digests from the current parser")
+    parser.add_argument('--skip-golden', action='store_true')
+    args = parser.parse_args()
+
+    if args.update_golden:
+        check_golden(update=True)
+        return 0
+    if not args.skip_golden and not check_golden():
+        print("[Golden] Parser output changed; not benchmarking.")
+        return 1
+    for name in args.profile or list(PROFILES):
+        bench_profile(name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Startup benchmark: import cost of each entry point, measured with
+`python -X importtime` in fresh interpreters, and time to first parse of the
+batch CLI (`python batch.py sample1.txt` minus a bare interpreter start).
+
+Also checks that the extraction / output layer stays headless: importing it
+must not load the UI driver, pyautogui, pyperclip, winsound or tkinter.
+
+Run from the project root:
+    python benchmarks/bench_importtime.py [--repeat N] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules usable without a display or the automation dependencies
+HEADLESS_MODULES = ['extractor', 'report_writer', 'extraction_pipeline', 'parse_cache', 'dedup_store',
+                    'capture_archive', 'batch', 'profiling', 'money', 'records', 'aggregate', 'reconcile']
+ENTRY_MODULES = HEADLESS_MODULES + ['automation', 'gui_launcher']
+GUI_MODULES = {'pyautogui', 'pyperclip', 'winsound', 'tkinter', 'ui_driver', 'clicker', 'automation'}
+FIRST_PARSE_TARGET_MS = 50.0
+SAMPLE = 'sample1.txt'
+
+
+def _run(args):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True)
+
+
+def importtime(module):
+    """
+    Imports `module` in a fresh interpreter under -X importtime.
+    Returns (cumulative us of the module, [(self us, name)]) or None if the import fails.
+    """
+    proc = _run(['-X', 'importtime', '-c', f'import {module}'])
+    if proc.returncode != 0:
+        return None
+    total, selfs = 0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        selfs.append((int(self_us), name.strip()))
+        if name == module:
+            total = int(cumulative)
+    return total, selfs
+
+
+def loaded_gui_modules(module):
+    proc = _run(['-c', f'import sys, {module}; print(",".join(sorted(set(sys.modules) & {GUI_MODULES!r})))'])
+    return proc.stdout.strip() if proc.returncode == 0 else "import failed"
+
+
+def wall_ms(args, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time / startup benchmark.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement (best is kept)")
+    parser.add_argument('--top', type=int, default=5, help="Slowest imported modules listed per entry point")
+    parser.add_argument('--module', action='append', help="Entry module(s) to measure (default: all)")
+    args = parser.parse_args()
+
+    print(f"{'module':<22}{'import ms':>10}  slowest imports (self ms)")
+    for module in args.module or ENTRY_MODULES:
+        runs = [importtime(module) for _ in range(args.repeat)]
+        runs = [run for run in runs if run is not None]
+        if not runs:
+            print(f"{module:<22}{'n/a':>10}  (import failed)")
+            continue
+        total, selfs = min(runs)
+        slowest = ", ".join(f"{name} {us / 1000:.1f}" for us, name in sorted(selfs, reverse=True)[:args.top])
+        print(f"{module:<22}{total / 1000:>10.1f}  {slowest}")
+
+    leaks = {module: loaded_gui_modules(module) for module in HEADLESS_MODULES}
+    leaks = {module: names for module, names in leaks.items() if names}
+    if leaks:
+        for module, names in leaks.items():
+            print(f"NOT HEADLESS: importing {module} loads {names}")
+    else:
+        print(f"Headless: none of {', '.join(sorted(GUI_MODULES))} loaded by the extraction layer")
+
+    interpreter = wall_ms(['-c', 'pass'], args.repeat)
+    cli = wall_ms(['batch.py', SAMPLE, '-f', 'jsonl'], args.repeat)
+    first_parse = cli - interpreter
+    verdict = "ok" if first_parse <= FIRST_PARSE_TARGET_MS else "OVER TARGET"
+    print(f"batch CLI, first parse: {first_parse:.1f} ms beyond interpreter start "
+          f"({cli:.1f} ms total, bare interpreter {interpreter:.1f} ms) | "
+          f"target {FIRST_PARSE_TARGET_MS:.0f} ms: {verdict}")
+    return 1 if leaks else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Memory benchmark for holding a batch of parsed invoices.
+
+Parses `--distinct` synthetic pages once, then holds `--count` invoices built
+from them. Each held invoice gets its own string objects, as a fresh parse
+would produce. The batch is held in two shapes:
+  dicts    nested dicts and lists, as parse_invoice_text returned before records.py
+  records  Invoice / Dates / LineItem records with interned repeated values
+It reports the deep size of each batch: every distinct object reachable from
+it, counted once, by sys.getsizeof. Allocator overhead is not included.
+
+Run from the project root:
+    python benchmarks/bench_records.py --count 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from extractor import parse_invoice_text  # noqa: E402
+from records import Dates, Invoice, Record  # noqa: E402
+from synth_invoices import generate_corpus  # noqa: E402
+
+
+def _fresh(value):
+    """
+    Plain-dict copy of a parsed invoice with new string values, like a separate
+    parse. Keys stay shared: the parser took them from literals.
+    """
+    if isinstance(value, str):
+        return value[:1] + value[1:] if len(value) > 1 else value
+    if isinstance(value, (Record, Dates, dict)):
+        return {key: _fresh(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fresh(item) for item in value]
+    return value
+
+
+def deep_size(root):
+    """(total bytes, bytes in str objects) of every distinct object reachable from root."""
+    seen = set()
+    stack = [root]
+    total = strings = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        total += size
+        if isinstance(obj, str):
+            strings += size
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, Record):
+            stack.extend(getattr(obj, name) for name in obj.__slots__)
+        elif isinstance(obj, Dates):
+            stack.extend((obj._labels, obj._values))
+    return total, strings
+
+
+SHAPES = {
+    'dicts': _fresh,
+    'records': lambda record: Invoice.from_dict(_fresh(record)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parsed-invoice memory benchmark.")
+    parser.add_argument('--count', type=int, default=100000, help="Invoices held")
+    parser.add_argument('--distinct', type=int, default=1000, help="Distinct pages parsed")
+    parser.add_argument('--items', type=int, nargs=2, default=[1, 10], metavar=('MIN', 'MAX'))
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    parsed = [parse_invoice_text(text)
+              for _name, text in generate_corpus(args.seed, args.distinct, items=tuple(args.items))]
+    items = sum(len(parsed[i % len(parsed)]['line_items']) for i in range(args.count))
+    print(f"{args.count} invoices, {items} line items")
+    print(f"{'shape':<10}{'MiB':>9}{'str MiB':>9}{'B/invoice':>11}{'build s':>9}")
+    for shape, build in SHAPES.items():
+        gc.collect()
+        start = time.perf_counter()
+        batch = [build(parsed[i % len(parsed)]) for i in range(args.count)]
+        elapsed = time.perf_counter() - start
+        total, strings = deep_size(batch)
+        print(f"{shape:<10}{total / 2**20:>9.1f}{strings / 2**20:>9.1f}"
+              f"{total / args.count:>11.0f}{elapsed:>9.2f}")
+        del batch
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
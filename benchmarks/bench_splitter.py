@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: single-pass split_into_blocks vs the original multi-scan splitter.
+
+Run from the project root:
+    python benchmarks/bench_splitter.py [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extractor import split_into_blocks  # noqa: E402
+
+SAMPLES = ['sample1.txt', 'sample2.txt', 'sample3.txt', 'sample4.txt']
+
+
+def legacy_split_into_blocks(text):
+    """The original splitter: one finditer per marker plus two extra searches."""
+    blocks = {}
+    primary_markers = [
+        ('recent_activity', r'^\s*Recent activity'),
+        ('summary', r'^\s*Summary\s*$'),
+        ('description', r'^\s*Description\s*\n\s*Qty'),
+        ('payments', r'^\s*Payments'),
+        ('logs', r'^\s*Logs'),
+        ('events', r'^\s*Events'),
+        ('details', r'^\s*Details\s*\n\s*ID'),
+        ('metadata', r'^\s*Metadata'),
+    ]
+    positions_with_names = []
+    for name, pattern in primary_markers:
+        for match in re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL):
+            positions_with_names.append((match.start(), name))
+    positions_with_names.sort(key=lambda x: x[0])
+    full_markers_list = [(0, 'header')] + positions_with_names
+    for i in range(len(full_markers_list)):
+        start_idx, block_name = full_markers_list[i]
+        if i + 1 < len(full_markers_list):
+            end_idx = full_markers_list[i+1][0]
+        else:
+            end_idx = len(text)
+        blocks[block_name] = text[start_idx:end_idx].strip()
+    details_start_match = re.search(r'Details\s*\n\s*ID', text, re.IGNORECASE | re.DOTALL)
+    if details_start_match:
+        potential_details_block = text[details_start_match.start():].strip()
+        next_header_match = re.search(r'\n(Kastle AI|Developers|Metadata)', potential_details_block, re.IGNORECASE)
+        if next_header_match:
+            blocks['details'] = potential_details_block[:next_header_match.start()].strip()
+        else:
+            blocks['details'] = potential_details_block.strip()
+    return blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help="Calls per sample (default 2000)")
+    args = parser.parse_args()
+
+    print(f"{'sample':<14}{'legacy us':>12}{'new us':>12}{'speedup':>10}")
+    for name in SAMPLES:
+        with open(os.path.join(ROOT, name), 'r', encoding='utf-8') as f:
+            text = f.read()
+        if legacy_split_into_blocks(text) != split_into_blocks(text):
+            print(f"{name:<14} OUTPUT MISMATCH")
+            continue
+        legacy = timeit.timeit(lambda: legacy_split_into_blocks(text), number=args.repeat)
+        new = timeit.timeit(lambda: split_into_blocks(text), number=args.repeat)
+        print(f"{name:<14}{legacy / args.repeat * 1e6:>12.1f}{new / args.repeat * 1e6:>12.1f}{legacy / new:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
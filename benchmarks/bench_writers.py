@@ -0,0 +1,61 @@
+"""
+Load benchmark for the output sinks in report_writer.py.
+
+Parses a small synthetic corpus once, then writes `--count` records (cycling
+through it) to every output format and reports records/s and output size.
+
+Run from the project root:
+    python benchmarks/bench_writers.py --count 100000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from extractor import parse_invoice_text  # noqa: E402
+from report_writer import OUTPUT_FORMATS, open_writer, output_path_for  # noqa: E402
+from synth_invoices import generate_corpus  # noqa: E402
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output sink load benchmark.")
+    parser.add_argument('--count', type=int, default=100000, help="Records written per format")
+    parser.add_argument('--distinct', type=int, default=1000, help="Distinct parsed invoices cycled through")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, action='append',
+                        help="Format(s) to run (default: all)")
+    parser.add_argument('--seed', type=int, default=4)
+    args = parser.parse_args()
+
+    records = [parse_invoice_text(text) for _name, text in generate_corpus(args.seed, args.distinct)]
+    work_dir = tempfile.mkdtemp(prefix="bench_writers_")
+    try:
+        print(f"{'format':<8}{'records/s':>12}{'total s':>10}{'MiB':>9}")
+        for fmt in args.format or OUTPUT_FORMATS:
+            path = output_path_for(fmt, os.path.join(work_dir, "extracted_data.csv"))
+            start = time.perf_counter()
+            writer = open_writer(fmt, path, fsync_every=500)
+            for i in range(args.count):
+                writer.write(records[i % len(records)])
+            writer.finalize()
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:<8}{args.count / elapsed:>12.0f}{elapsed:>10.2f}{_size(path) / 2**20:>9.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Synthetic Stripe-style invoice page dumps, modelled on sample1-4.txt.
+
+Every page is fully determined by (seed, index) and the keyword options, so the
+same corpus can be regenerated for benchmarks and golden-output checks.
+
+    python benchmarks/synth_invoices.py OUT_DIR --count 1000 --items 1 50
+"""
+import argparse
+import os
+import random
+import string
+
+STATUSES = ['Open', 'Paid', 'Draft', 'Void', 'Uncollectible', 'Past due']
+CURRENCIES = [
+    ('USD - US Dollar', '$'),
+    ('EUR - Euro', '€'),
+    ('GBP - British Pound', '£'),
+    ('CAD - Canadian Dollar', 'CA$'),
+]
+CUSTOMERS = [
+    'Cardinal Financial Company Limited Partnership', 'Servbank, N.A', 'Spring EQ, LLC',
+    'Northwind Traders', 'Contoso Mortgage Corp', 'Fabrikam Lending, Inc.', 'Acme Home Loans',
+]
+PRODUCTS = [
+    'Kastle AI Platform Subscription', 'Aged Lead Transfers', 'Tier 1: Core Voice',
+    'Usage - Outbound minutes', 'Usage - SMS segments', 'Onboarding fee', 'Live Transfer Credits',
+]
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+NOISE_KINDS = ('duplicate_headers', 'missing_summary', 'missing_details', 'missing_description')
+
+NAV_TAIL = """Kastle AI
+Home
+Balances
+Transactions
+Customers
+Product catalog
+Shortcuts
+Revenue recovery
+Reports
+Invoices
+Products
+Payments
+Billing
+Reporting
+More
+Search
+Test mode
+
+Developers"""
+
+
+def _money(symbol, cents):
+    return f"{symbol}{cents // 100:,}.{cents % 100:02d}"
+
+
+def _stamp(rng, with_year=True):
+    month = rng.choice(MONTHS)
+    day = rng.randint(1, 28)
+    hour = rng.randint(1, 12)
+    minute = rng.randint(0, 59)
+    ampm = rng.choice(['AM', 'PM'])
+    year = f", {rng.choice([2024, 2025, 2026])}" if with_year else ""
+    return f"{month} {day}{year}, {hour}:{minute:02d} {ampm}"
+
+
+def _log_stamp(rng):
+    return f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/25, {rng.randint(1, 12)}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} PM"
+
+
+def _token(rng, n):
+    return ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(n))
+
+
+def generate_invoice(seed, index, items=1, events=3, logs=3, status=None, currency=None, noise=()):
+    """
+    Returns (page_text, facts) for one synthetic invoice.
+    facts holds the values the page was built from (invoice number, total, ...).
+    noise: any of NOISE_KINDS.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    status = status or rng.choice(STATUSES)
+    currency_name, symbol = currency or rng.choice(CURRENCIES)
+    customer = rng.choice(CUSTOMERS)
+    email = f"{rng.choice(['ap', 'billing', 'accounts.payable', 'finance'])}@{customer.split()[0].lower().strip(',.')}.com"
+    prefix = _token(rng, 8).upper()
+    number = f"{prefix}-DRAFT" if status == 'Draft' else f"{prefix}-{index % 10000:04d}"
+    internal_id = f"in_{_token(rng, 24)}"
+
+    item_lines = []
+    total = 0
+    for _ in range(items):
+        qty = rng.choice([1, 1, 1, 2, 5, 14, 120, 2500])
+        unit = rng.choice([50, 125, 1000, 5000, 100000, 875000])
+        amount = qty * unit
+        total += amount
+        item_lines += [
+            rng.choice(PRODUCTS),
+            f"{rng.choice(MONTHS)} {rng.randint(1, 28)} - {rng.choice(MONTHS)} {rng.randint(1, 28)}, 2025",
+            str(qty),
+            _money(symbol, unit),
+            _money(symbol, amount),
+        ]
+    total_str = _money(symbol, total)
+
+    header = ["Skip to content", "Invoices", number, status, f"Billed to {customer} · {total_str}"]
+    if status != 'Draft':
+        header += [f"https://invoice.stripe.com/i/acct_{_token(rng, 16)}/live_{_token(rng, 60)}?s=db", "Download PDF"]
+
+    recent = ["Recent activity"]
+    if status != 'Draft':
+        recent += ["Invoice was finalized", _stamp(rng)]
+    recent += ["Invoice payment page was created" if status != 'Draft' else _stamp(rng)]
+
+    summary = [
+        "Summary", "Billed to", customer, email, "Billing details", "—",
+        "Invoice number", number, "Currency", currency_name,
+        "Due date", _stamp(rng, with_year=rng.random() < 0.5),
+        "Billing method", "Send invoice", "Memo", "Tax calculation", "No tax rate applied",
+    ]
+
+    description = ["Description", "Qty", "Unit price", "Amount"] + item_lines + [
+        "Subtotal", total_str, "Total excluding tax", total_str, "Tax", "-",
+        "Total", total_str, "Amount paid", _money(symbol, total if status == 'Paid' else 0),
+        "Amount remaining", _money(symbol, 0 if status == 'Paid' else total),
+        "Tax calculation", "No tax rate applied.",
+        "Learn how to calculate tax automatically on all your future invoices.",
+        "Accounting", "Use Revenue Recognition to automate accrual accounting for invoices.", "",
+        "Go to Revenue Recognition",
+    ]
+
+    payments = ["Payments", "No payments yet",
+                "When you add or receive payments on this invoice, they will appear here.",
+                "Credit notes", "No credit notes",
+                "When you add credit notes on this invoice, they will appear here."]
+
+    log_lines = ["Logs"]
+    for _ in range(logs):
+        log_lines += [f"POST /v1/invoices/{internal_id}", "200 OK", _log_stamp(rng)]
+    if not logs:
+        log_lines.append("No logs")
+
+    event_lines = ["Events"]
+    for _ in range(events):
+        event_lines += [rng.choice([
+            f"{email}'s invoice has changed",
+            f"An invoice item for {total_str} was created for ii_{_token(rng, 24)}",
+            "A draft invoice was created",
+        ]), _log_stamp(rng)]
+
+    details = ["Details", "ID", internal_id, "Created", _stamp(rng, with_year=False)]
+    if status not in ('Draft',):
+        details += ["Finalized", _stamp(rng, with_year=False)]
+    if status == 'Void':
+        details += ["Voided", _stamp(rng, with_year=False)]
+    details += ["Metadata", "No metadata", ""]
+
+    sections = {
+        'summary': summary, 'description': description, 'details': details,
+    }
+    for kind in noise:
+        if kind.startswith('missing_'):
+            sections[kind[len('missing_'):]] = []
+    if 'duplicate_headers' in noise:
+        payments = payments + ["Payments", "Summary"]
+
+    page = (header + recent + sections['summary'] + sections['description'] + payments
+            + log_lines + event_lines + sections['details'] + [NAV_TAIL, f"{internal_id[:22]}..."])
+    facts = {
+        'invoice_number': number, 'status': status, 'total_amount': total_str,
+        'currency': currency_name, 'internal_id': internal_id, 'items': items,
+    }
+    return '\n'.join(page), facts
+
+
+def generate_corpus(seed, count, items=(1, 10), events=(1, 20), logs=(0, 10), noise_rate=0.0):
+    """Yields (name, page_text) pairs with item/event/log counts drawn per invoice."""
+    rng = random.Random(seed)
+    for index in range(count):
+        noise = tuple(k for k in NOISE_KINDS if rng.random() < noise_rate)
+        text, _facts = generate_invoice(
+            seed, index,
+            items=rng.randint(*items), events=rng.randint(*events), logs=rng.randint(*logs),
+            noise=noise,
+        )
+        yield f"synthetic_{seed}_{index:06d}.txt", text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic invoice captures to a directory.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--items', type=int, nargs=2, default=[1, 10], metavar=('MIN', 'MAX'))
+    parser.add_argument('--noise', type=float, default=0.0, help="Per-kind noise probability")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, text in generate_corpus(args.seed, args.count, items=tuple(args.items), noise_rate=args.noise):
+        with open(os.path.join(args.out_dir, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(f"Wrote {args.count} captures to {os.path.abspath(args.out_dir)}")
+
+
+if __name__ == '__main__':
+    main()
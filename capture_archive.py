@@ -0,0 +1,213 @@
+"""
+Append-only archive of raw tab captures, so a live session can be re-extracted
+offline after a parser fix instead of repeating the browser run.
+
+Each session writes two files:
+    <name>.seg  compressed captures back to back (one zlib or lzma frame each)
+    <name>.idx  fixed-size entries: offset, stored and raw length, timestamp,
+                tab index (0 = the original page), codec and capture digest
+The index is memory-mapped when reading, so any record can be fetched directly.
+
+    python capture_archive.py list capture_archive/20261017-093000
+    python capture_archive.py replay capture_archive/20261017-093000 -o replayed.csv
+"""
+import lzma
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+from extraction_pipeline import ExtractionPipeline
+from parse_cache import ParseCache, capture_digest
+from report_writer import OUTPUT_FORMATS, open_writer
+
+ARCHIVE_DIR = "capture_archive"
+ORIGINAL_PAGE_TAB = 0
+
+# offset, stored length, raw length, timestamp, tab index, codec, digest (+ padding to 48 bytes)
+INDEX_ENTRY = struct.Struct('<QIIdiB16s3x')
+CODECS = {'zlib': 0, 'lzma': 1}
+_CODEC_NAMES = {code: name for name, code in CODECS.items()}
+
+
+def _compress(data, codec):
+    if codec == CODECS['lzma']:
+        return lzma.compress(data, preset=1)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data, codec):
+    if codec == CODECS['lzma']:
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+def new_archive_path(directory=ARCHIVE_DIR):
+    """Base path (without extension) for a new session archive."""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, time.strftime("%Y%m%d-%H%M%S"))
+
+
+class CaptureArchive:
+    """
+    Writer side. append(content, tab_index) compresses one capture onto the
+    segment file, then records it in the index. Both are flushed per record;
+    a crash can at worst leave an unindexed tail in the segment, which readers ignore.
+    """
+
+    def __init__(self, base_path, codec='zlib'):
+        self.base_path = base_path
+        self.codec = CODECS[codec]
+        self.count = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._seg = open(base_path + ".seg", "ab")
+        self._idx = open(base_path + ".idx", "ab")
+
+    def append(self, content, tab_index):
+        raw = content.encode('utf-8')
+        stored = _compress(raw, self.codec)
+        offset = self._seg.seek(0, os.SEEK_END)
+        self._seg.write(stored)
+        self._seg.flush()
+        self._idx.write(INDEX_ENTRY.pack(offset, len(stored), len(raw), time.time(), tab_index,
+                                         self.codec, capture_digest(content)))
+        self._idx.flush()
+        self.count += 1
+        self.raw_bytes += len(raw)
+        self.stored_bytes += len(stored)
+
+    def log_summary(self, logger=print):
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+        logger(f"[Archive] {self.count} captures -> {self.base_path}.seg | "
+               f"{self.raw_bytes / 2**20:.2f} MiB raw, {self.stored_bytes / 2**20:.2f} MiB stored ({ratio:.1f}x)")
+
+    def close(self):
+        for f in (self._seg, self._idx):
+            if not f.closed:
+                os.fsync(f.fileno())
+                f.close()
+
+
+class ArchiveReader:
+    """
+    Random access to an archive: len(reader), reader.entry(i) -> index fields,
+    reader[i] -> capture text. Iterating yields (entry, text) in capture order.
+    """
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self._seg = open(base_path + ".seg", "rb")
+        self._idx_file = open(base_path + ".idx", "rb")
+        size = os.fstat(self._idx_file.fileno()).st_size
+        # A torn final entry (crash mid-write) is ignored
+        self._count = size // INDEX_ENTRY.size
+        self._index = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return self._count
+
+    def entry(self, i):
+        """Returns a dict of the index fields of record i."""
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        offset, length, raw_length, timestamp, tab_index, codec, digest = \
+            INDEX_ENTRY.unpack_from(self._index, i * INDEX_ENTRY.size)
+        return {'offset': offset, 'length': length, 'raw_length': raw_length, 'timestamp': timestamp,
+                'tab_index': tab_index, 'codec': _CODEC_NAMES.get(codec, codec), 'digest': digest}
+
+    def __getitem__(self, i):
+        entry = self.entry(i)
+        self._seg.seek(entry['offset'])
+        stored = self._seg.read(entry['length'])
+        return _decompress(stored, CODECS[entry['codec']]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.entry(i), self[i]
+
+    def close(self):
+        if isinstance(self._index, mmap.mmap):
+            self._index.close()
+        self._idx_file.close()
+        self._seg.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _strip_ext(path):
+    root, ext = os.path.splitext(path)
+    return root if ext in ('.seg', '.idx') else path
+
+
+def replay(base_path, output, fmt='report', cache_path=None, logger=print):
+    """
+    Feeds every archived capture (except copies of the original page) back through the
+    extraction pipeline: fast path, de-duplication, parse cache and output sink.
+    Returns the pipeline.
+    """
+    writer = open_writer(fmt, output, fsync_every=500)
+    cache = ParseCache(cache_path) if cache_path else None
+    pipeline = ExtractionPipeline(writer, logger, cache=cache)
+    start = time.perf_counter()
+    with ArchiveReader(base_path) as reader:
+        # The loop ends by capturing the original page again; skip it like the live stop check
+        entries = [reader.entry(i) for i in range(len(reader))]
+        original = {e['digest'] for e in entries if e['tab_index'] == ORIGINAL_PAGE_TAB}
+        try:
+            for i, entry in enumerate(entries):
+                if entry['digest'] not in original:
+                    pipeline.submit(entry['tab_index'], reader[i])
+        finally:
+            pipeline.close()
+            if cache is not None:
+                cache.close()
+    elapsed = time.perf_counter() - start
+
+    if writer.count:
+        logger(f"[Replay] Output: {writer.finalize()}")
+    else:
+        writer.abort(keep_partial=False)
+        logger("[Replay] No unique data was extracted.")
+    pipeline.log_summary()
+    logger(f"[Replay] {len(reader)} archived captures in {elapsed:.2f}s")
+    return pipeline
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or replay a capture archive.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_cmd = sub.add_parser('list', help="Show the index of an archive")
+    list_cmd.add_argument('archive', help="Archive base path (with or without .seg/.idx)")
+    replay_cmd = sub.add_parser('replay', help="Re-extract every capture of an archive")
+    replay_cmd.add_argument('archive', help="Archive base path (with or without .seg/.idx)")
+    replay_cmd.add_argument('-o', '--output', default="replayed_data.csv")
+    replay_cmd.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='report')
+    replay_cmd.add_argument('--cache', default=None, metavar='DB', help="Parse cache file to consult")
+    args = parser.parse_args(argv)
+
+    base_path = _strip_ext(args.archive)
+    if args.command == 'list':
+        with ArchiveReader(base_path) as reader:
+            print(f"{len(reader)} captures in {base_path}.seg")
+            for i in range(len(reader)):
+                e = reader.entry(i)
+                tab = "original" if e['tab_index'] == ORIGINAL_PAGE_TAB else f"tab {e['tab_index']}"
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e['timestamp']))
+                print(f"{i:>6}  {stamp}  {tab:<9} {e['raw_length']:>8} B -> {e['length']:>7} B "
+                      f"{e['codec']:<5} {e['digest'].hex()}")
+    elif args.command == 'replay':
+        replay(base_path, args.output, args.format, args.cache)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,100 +1,219 @@
-import pyautogui
+import csv
 import random
-import time
-
-def human_random(
-    base_delay=521, std_dev=81, min_delay=200, max_delay=1176,
-    outlier_chance=0.16, outlier_factor=2.4, recursion_limit=100
+from collections import namedtuple
+from log_pump import DEBUG, log
+from tracing import get_tracer
+from ui_driver import get_driver
+
+# Human-like delay distribution (milliseconds): a normal around BASE_DELAY with
+# occasional outliers shifted by OUTLIER_FACTOR standard deviations, truncated
+# to [MIN_DELAY, MAX_DELAY] by resampling.
+BASE_DELAY = 521
+DELAY_STD_DEV = 81
+MIN_DELAY = 200
+MAX_DELAY = 1176
+OUTLIER_CHANCE = 0.16
+OUTLIER_FACTOR = 2.4
+MAX_RESAMPLE_ROUNDS = 100  # Values still out of range after this many rounds fall back to BASE_DELAY
+
+# Click targets
+SESSION_JITTER_X = 10  # Per-session shift of the X center
+X_STD_DEV = 15
+X_CLAMP = 50  # Max X deviation from the session center
+Y_MARGIN = 0  # Max vertical offset for randomization
+MOVE_DURATION = (0.1, 0.3)  # Mouse move duration range (seconds)
+
+ClickStep = namedtuple('ClickStep', 'x y move_duration delay')
+
+
+def _python_delays(count, rng, base_delay, std_dev, min_delay, max_delay, outlier_chance, outlier_factor):
+    delays = [base_delay] * count
+    pending = range(count)
+    for _ in range(MAX_RESAMPLE_ROUNDS):
+        retry = []
+        for i in pending:
+            delay = rng.gauss(base_delay, std_dev)
+            if rng.random() < outlier_chance:
+                delay += outlier_factor * std_dev if rng.random() < 0.5 else -outlier_factor * std_dev
+            if min_delay <= delay <= max_delay:
+                delays[i] = delay
+            else:
+                retry.append(i)
+        pending = retry
+        if not pending:
+            break
+    return delays
+
+
+def _numpy_delays(count, rng, base_delay, std_dev, min_delay, max_delay, outlier_chance, outlier_factor):
+    import numpy as np
+    gen = np.random.default_rng(rng.getrandbits(64))
+    delays = np.full(count, float(base_delay))
+    pending = np.arange(count)
+    for _ in range(MAX_RESAMPLE_ROUNDS):
+        n = len(pending)
+        draws = gen.normal(base_delay, std_dev, n)
+        shift = np.where(gen.random(n) < 0.5, outlier_factor * std_dev, -outlier_factor * std_dev)
+        draws += np.where(gen.random(n) < outlier_chance, shift, 0.0)
+        ok = (draws >= min_delay) & (draws <= max_delay)
+        delays[pending[ok]] = draws[ok]
+        pending = pending[~ok]
+        if not len(pending):
+            break
+    return delays.tolist()
+
+
+def sample_delays(
+    count, rng=random, base_delay=BASE_DELAY, std_dev=DELAY_STD_DEV, min_delay=MIN_DELAY,
+    max_delay=MAX_DELAY, outlier_chance=OUTLIER_CHANCE, outlier_factor=OUTLIER_FACTOR, use_numpy=False
 ):
     """
-    Returns a human-like delay in seconds.
-    Uses recursive resampling instead of clamping.
+    Draws `count` human-like delays in seconds (rounded to ms) from the
+    truncated normal/outlier mixture. Out-of-range draws are redrawn in batch
+    rounds. use_numpy draws with NumPy arrays (None: only if it is installed).
     """
-    if recursion_limit <= 0:
-        return round(base_delay / 1000, 3)
-
-    delay = random.gauss(base_delay, std_dev)
+    params = (base_delay, std_dev, min_delay, max_delay, outlier_chance, outlier_factor)
+    delays = None
+    if use_numpy or use_numpy is None:
+        try:
+            delays = _numpy_delays(count, rng, *params)
+        except ImportError:
+            if use_numpy:
+                raise
+    if delays is None:
+        delays = _python_delays(count, rng, *params)
+    return [round(delay / 1000, 3) for delay in delays]
 
-    if random.random() < outlier_chance:
-        if random.random() < 0.5:
-            delay += outlier_factor * std_dev
-        else:
-            delay -= outlier_factor * std_dev
 
-    # Corrected recursive call from human_delay to human_random
-    if delay < min_delay or delay > max_delay:
-        return human_random(
-            base_delay=base_delay, std_dev=std_dev, min_delay=min_delay,
-            max_delay=max_delay, outlier_chance=outlier_chance,
-            outlier_factor=outlier_factor, recursion_limit=recursion_limit - 1,
-        )
-
-    return round(delay / 1000, 3)
+def human_random(
+    base_delay=BASE_DELAY, std_dev=DELAY_STD_DEV, min_delay=MIN_DELAY, max_delay=MAX_DELAY,
+    outlier_chance=OUTLIER_CHANCE, outlier_factor=OUTLIER_FACTOR
+):
+    """
+    Returns a single human-like delay in seconds (see sample_delays).
+    """
+    return sample_delays(1, random, base_delay, std_dev, min_delay, max_delay, outlier_chance, outlier_factor)[0]
 
-def click_at(x, y):
-    """Moves the mouse to the specified coordinates and performs a Ctrl+Click."""
-    pyautogui.moveTo(x, y, duration=random.uniform(0.1, 0.3))
-    pyautogui.keyDown('ctrl')
-    pyautogui.click()
-    pyautogui.keyUp('ctrl')
-    print(f"Ctrl+Clicked at: ({round(x, 2)}, {round(y, 2)})")
 
-from config_manager import load_config
+class ClickPlan:
+    """
+    The whole click sequence, computed before the first click: one ClickStep
+    (target, mouse move duration, delay after the click) per row.
+    perform_clicks() records when each click actually started and ended, so
+    export() can put the planned and real timings side by side.
+    """
 
-def perform_clicks(num_clicks=23):
+    def __init__(self, steps, seed=None):
+        self.steps = steps
+        self.seed = seed
+        self.actual = []  # (click start, click end, delay end), seconds since the first click
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def planned_seconds(self):
+        return sum(step.move_duration + step.delay for step in self.steps)
+
+    @property
+    def actual_seconds(self):
+        return self.actual[-1][2] if self.actual else 0.0
+
+    def export(self, path):
+        """Writes the plan (and the measured timings, once executed) as CSV."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            out = csv.writer(f)
+            out.writerow(['click', 'x', 'y', 'move_duration', 'delay', 'planned_start',
+                          'actual_start', 'actual_click', 'actual_delay'])
+            planned_start = 0.0
+            for i, step in enumerate(self.steps):
+                row = [i, round(step.x, 2), round(step.y, 2), round(step.move_duration, 3), step.delay,
+                       round(planned_start, 3)]
+                if i < len(self.actual):
+                    start, clicked, done = self.actual[i]
+                    row += [round(start, 3), round(clicked - start, 3), round(done - clicked, 3)]
+                out.writerow(row)
+                planned_start += step.move_duration + step.delay
+        return path
+
+
+def build_click_plan(num_clicks, config, seed=None, budget=None, use_numpy=False, y_offset=0.0):
     """
-    Performs a series of human-like clicks in a vertical list using configured coordinates.
+    Precomputes targets and delays for `num_clicks` rows from the configured
+    coordinates, the first row y_offset pixels below start_y. seed makes the plan
+    reproducible; budget (seconds) shrinks the delays proportionally (never
+    below MIN_DELAY) when the plan would take longer.
     """
-    config = load_config()
-    
-    # Base coordinates from config
+    rng = random.Random(seed) if seed is not None else random
     start_x = config.get("start_x", 0)
-    y_orig = config.get("start_y", 0)
+    y_orig = config.get("start_y", 0) + y_offset
     row_height = config.get("vertical_spacing", 23.5)
-    
-    # Parameters for clicking
-    y_margin = 0      # Max vertical offset for randomization
-
-    # X-axis logic
-    # We use the captured start_x as the center. 
-    # Add a small session-based random offset to the X center to vary slightly between runs.
-    randomized_session_center_x = start_x + random.uniform(-10, 10)
 
-    # Standard deviations for normal distribution
-    x_std_dev = 15
-    y_std_dev = y_margin / 2
+    # Small session-based random offset so the X center varies slightly between runs
+    center_x = start_x + rng.uniform(-SESSION_JITTER_X, SESSION_JITTER_X)
+    y_std_dev = Y_MARGIN / 2
 
-    print(f"--- Clicking Automation Starting ---")
-    print(f"Randomized session X-center for all clicks: {randomized_session_center_x:.2f}")
-    print(f"Performing {num_clicks} clicks now...")
+    delays = sample_delays(num_clicks, rng, use_numpy=use_numpy)
+    moves = [rng.uniform(*MOVE_DURATION) for _ in range(num_clicks)]
+    if budget and num_clicks:
+        available = budget - sum(moves)
+        if available < sum(delays):
+            scale = max(available, 0.0) / sum(delays)
+            delays = [max(MIN_DELAY / 1000, round(delay * scale, 3)) for delay in delays]
 
+    steps = []
     for i in range(num_clicks):
-        # Calculate mean coordinates for this row
         mean_y = y_orig + (i * row_height)
-        mean_x = randomized_session_center_x
+        # Clamp to the row's margin and to the session click zone
+        x = max(center_x - X_CLAMP, min(rng.gauss(center_x, X_STD_DEV), center_x + X_CLAMP))
+        y = max(mean_y - Y_MARGIN, min(rng.gauss(mean_y, y_std_dev), mean_y + Y_MARGIN))
+        steps.append(ClickStep(x, y, moves[i], delays[i]))
+    return ClickPlan(steps, seed)
 
-        # Generate coordinates using a normal distribution
-        target_x = random.gauss(mean_x, x_std_dev)
-        target_y = random.gauss(mean_y, y_std_dev)
 
-        # Clamp y deviation to the max y_margin
-        target_y = max(mean_y - y_margin, min(target_y, mean_y + y_margin))
-        # Clamp x deviation to the session click zone (e.g. +/- 50 pixels)
-        target_x = max(mean_x - 50, min(target_x, mean_x + 50))
+def click_at(x, y, duration=None):
+    """Moves the mouse to the specified coordinates and performs a Ctrl+Click."""
+    driver = get_driver()
+    driver.move_to(x, y, duration=random.uniform(*MOVE_DURATION) if duration is None else duration)
+    driver.key_down('ctrl')
+    driver.click()
+    driver.key_up('ctrl')
 
-        # Perform the click
-        click_at(target_x, target_y)
+from config_manager import load_config
 
-        # Wait for a human-like delay
-        delay = human_random()
-        print(f"Waited for {delay} seconds.")
-        time.sleep(delay)
+def perform_clicks(num_clicks=23, plan=None, seed=None, budget=None, y_offset=0.0):
+    """
+    Performs a series of human-like clicks in a vertical list using configured coordinates.
+    The click plan is built up front (see build_click_plan) unless one is given;
+    returns it with the measured timings filled in.
+    """
+    config = load_config()
+    if plan is None:
+        plan = build_click_plan(num_clicks, config, seed=seed, budget=budget,
+                                use_numpy=config.get("click_plan_numpy", False), y_offset=y_offset)
 
-    print(f"All {num_clicks} clicks completed.")
+    driver = get_driver()
+    tracer = get_tracer()
+    print(f"--- Clicking Automation Starting ---")
+    print(f"Performing {len(plan)} clicks now (planned {plan.planned_seconds:.1f}s)...")
+
+    origin = driver.now()
+    for i, step in enumerate(plan.steps):
+        start = driver.now() - origin
+        with tracer.span('click', index=i):
+            click_at(step.x, step.y, step.move_duration)
+        clicked = driver.now() - origin
+        log(f"Ctrl+Clicked at: ({round(step.x, 2)}, {round(step.y, 2)}), waiting {step.delay}s", DEBUG)
+        with tracer.span('click_delay', index=i):
+            driver.sleep(step.delay)
+        plan.actual.append((start, clicked, driver.now() - origin))
+
+    print(f"All {len(plan)} clicks completed in {plan.actual_seconds:.1f}s (planned {plan.planned_seconds:.1f}s).")
+    return plan
 
 if __name__ == '__main__':
     try:
         # Re-enabled the actual click automation
         perform_clicks()
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
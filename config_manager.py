@@ -8,7 +8,26 @@ DEFAULT_CONFIG = {
     "start_y": 0,
     "vertical_spacing": 23.5,
     "row_count": 20,
-    "extra_file_path": ""
+    "extra_file_path": "",
+    "page_wait_min": 0.1,
+    "page_wait_max": 2.0,
+    "persistent_dedup": True,
+    "output_format": "report",
+    "parse_cache": True,
+    "parse_cache_mb": 256,
+    "archive_captures": True,
+    "trace": True,
+    "metrics_textfile": "",
+    "click_seed": None,
+    "click_budget": 0,
+    "click_plan_numpy": False,
+    "prefetch_window": 4,
+    "prefetch_low_water": 2,
+    "prefetch_max_window": 12,
+    "batch_size": 0,
+    "scroll_pixels": 100,
+    "close_harvested_tabs": True,
+    "log_level": "info"
 }
 
 def load_config():
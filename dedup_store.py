@@ -0,0 +1,167 @@
+"""
+Persistent de-duplication index shared across automation runs.
+
+Keys are invoice numbers, or a fixed-size fingerprint digest for invoices that
+have none. The whole key set is loaded into memory once at startup, so lookups
+during the run are plain set hits; new keys are appended to a SQLite table in
+WAL mode when commit() is called, i.e. once their invoices are safely written.
+
+    python dedup_store.py list [--limit 50]
+    python dedup_store.py prune --days 90
+    python dedup_store.py compact
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+DEDUP_DB = "seen_invoices.db"
+
+
+def dedup_key(parsed_data):
+    """
+    Use invoice number as primary key.
+    If N/A, fallback to a fixed-size digest of the normalized total, billed-to
+    name and line items.
+    """
+    inv_id = parsed_data.get('invoice_number', 'N/A')
+    if inv_id != 'N/A':
+        return inv_id
+    total = parsed_data.get('total_amount', 'N/A').strip()
+    billed = ' '.join(parsed_data.get('billed_to_name', 'N/A').split()).lower()
+    items = '\x1e'.join(
+        '\x1f'.join(' '.join(str(item.get(k, '')).split()) for k in
+                    ('description', 'period', 'qty', 'unit_price', 'amount'))
+        for item in parsed_data.get('line_items', [])
+    )
+    digest = hashlib.blake2b(f"{total}\x1d{billed}\x1d{items}".encode('utf-8'), digest_size=16)
+    return f"FP:{digest.hexdigest()}"
+
+
+class DedupStore:
+    """
+    Set-like view of every invoice key ever accepted.
+    `key in store` is an in-memory lookup. store.add(key) takes effect in memory
+    at once but is only persisted by the next commit(); keys not committed by
+    then are forgotten when the store is closed, so an invoice whose output was
+    lost is extracted again by the next run. Safe to use from the extraction
+    worker thread.
+    """
+
+    def __init__(self, path=DEDUP_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " key TEXT PRIMARY KEY,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._keys = {row[0] for row in self._conn.execute("SELECT key FROM seen")}
+        self._pending = []  # Added, not committed yet
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key):
+        with self._lock:
+            self._keys.add(key)
+            self._pending.append(key)
+
+    def commit(self, count=None):
+        """Persists the first `count` keys added since the last commit (default: all of them)."""
+        now = time.time()
+        with self._lock:
+            if count is None:
+                count = len(self._pending)
+            keys, self._pending = self._pending[:count], self._pending[count:]
+            if not keys:
+                return
+            self._conn.executemany(
+                "INSERT INTO seen (key, first_seen, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_seen = excluded.last_seen",
+                [(key, now, now) for key in keys],
+            )
+            self._conn.commit()
+
+    def touch(self, key):
+        """Records that a known key was seen again (keeps it from being pruned)."""
+        with self._lock:
+            self._conn.execute("UPDATE seen SET last_seen = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def entries(self, limit=None):
+        """Returns (key, first_seen, last_seen) rows, newest first."""
+        sql = "SELECT key, first_seen, last_seen FROM seen ORDER BY last_seen DESC"
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def prune(self, older_than_days):
+        """Forgets keys not seen within the last `older_than_days` days. Returns the count removed."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            removed = [row[0] for row in self._conn.execute(
+                "SELECT key FROM seen WHERE last_seen < ?", (cutoff,))]
+            self._conn.execute("DELETE FROM seen WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+            self._keys.difference_update(removed)
+        return len(removed)
+
+    def compact(self):
+        """Checkpoints the WAL and rebuilds the database file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def close(self):
+        """Closes the database; uncommitted keys are not persisted."""
+        with self._lock:
+            self._pending = []
+            self._conn.commit()
+            self._conn.close()
+
+
+def _format_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or maintain the persistent dedup index.")
+    parser.add_argument('--db', default=DEDUP_DB, help=f"Index file (default {DEDUP_DB})")
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_cmd = sub.add_parser('list', help="Show known keys, newest first")
+    list_cmd.add_argument('--limit', type=int, default=50)
+    prune_cmd = sub.add_parser('prune', help="Forget keys not seen for N days")
+    prune_cmd.add_argument('--days', type=float, required=True)
+    sub.add_parser('compact', help="Checkpoint the WAL and VACUUM")
+    args = parser.parse_args(argv)
+
+    store = DedupStore(args.db)
+    try:
+        if args.command == 'list':
+            print(f"{len(store)} keys in {args.db}")
+            for key, first_seen, last_seen in store.entries(args.limit):
+                print(f"{key:<40} first {_format_time(first_seen)}  last {_format_time(last_seen)}")
+        elif args.command == 'prune':
+            print(f"Pruned {store.prune(args.days)} keys; {len(store)} remain.")
+        elif args.command == 'compact':
+            store.compact()
+            print(f"Compacted {args.db}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
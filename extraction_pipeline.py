@@ -0,0 +1,273 @@
+import queue
+import threading
+import time
+
+from dedup_store import dedup_key
+from extractor import parse_invoice_text, quick_identifiers
+from parse_cache import capture_digest
+from reconcile import invoice_fields
+from tracing import get_tracer
+
+QUEUE_SIZE = 8  # Raw captures allowed to wait for the parser
+WORKER_CHECK_INTERVAL = 0.5  # How often a blocked submit() checks that the worker is still alive
+
+
+class StageStats:
+    """Thread-safe per-stage counters: calls, total and max seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def summary_lines(self):
+        with self._lock:
+            items = list(self.stages.items())
+        lines = []
+        for stage, (count, total, peak) in items:
+            avg = total / count if count else 0.0
+            lines.append(f"  {stage:<10} {count:>5} calls | total {total:7.2f}s | "
+                         f"avg {avg * 1000:8.1f} ms | max {peak * 1000:8.1f} ms")
+        return lines
+
+
+class ExtractionPipeline:
+    """
+    Consumer side of the automation loop.
+
+    The UI thread only captures and navigates; it hands each raw capture to
+    submit(), which places it on a bounded queue. A worker thread parses,
+    de-duplicates and writes accepted invoices, so parsing of tab N overlaps
+    with the page-load waits of tab N+1. When the queue is full, submit()
+    blocks, which keeps the UI thread from racing far ahead of the parser;
+    if the worker has died, submit() raises instead of waiting forever.
+
+    A DedupStore key is committed, and the journal records its tab, only once
+    the writer reports the invoice as synced (on disk): an invoice lost with
+    an unsynced write is neither skipped as a duplicate by later runs nor
+    counted as harvested by a resumed one.
+    """
+
+    def __init__(self, writer, logger=print, maxsize=QUEUE_SIZE, stats=None, seen_ids=None, cache=None,
+                 journal=None, reconciler=None):
+        self.writer = writer
+        self.logger = logger
+        self.stats = stats or StageStats()
+        # Optional RunJournal: every finished tab is recorded, so a resumed run skips it
+        self.journal = journal
+        # Optional Reconciler: every accepted invoice is checked against the reference export
+        self.reconciler = reconciler
+        # Optional ParseCache: captures parsed in earlier runs are not parsed again
+        self.cache = cache
+        # Global de-duplication: a DedupStore persists keys across runs,
+        # a plain set only de-duplicates within this run.
+        self.seen_ids = seen_ids if seen_ids is not None else set()
+        # Fast path: raw-capture digests and internal IDs of invoices already handled
+        self.seen_digests = set()
+        self.seen_internal_ids = set()
+        self._unsynced = []  # writer.count after each write whose key is not committed yet
+        self._held = []  # Journal tab records waiting for those writes to be synced
+        self.journal_error = None  # First failed journal write; no tab is journaled after it
+        self.accepted = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.full_parses = 0
+        self.avoided = {'digest': 0, 'invoice_number': 0, 'internal_id': 0}
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="extraction-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, tab_index, content):
+        """
+        Queues one raw capture; blocks while the queue is full. Raises
+        RuntimeError when the worker is no longer running.
+        """
+        start = time.perf_counter()
+        self._put((tab_index, content))
+        self.stats.record('enqueue', time.perf_counter() - start)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def _put(self, item):
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError("the extraction worker has stopped; captures can no longer be processed")
+            try:
+                self._queue.put(item, timeout=WORKER_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            tab_index, content = item
+            tracer = get_tracer()
+            try:
+                with tracer.span('process', tab=tab_index):
+                    outcome, key, invoice = self._process(tab_index, content)
+            except Exception as e:
+                outcome, key, invoice = 'error', None, None
+                self.errors += 1
+                self.logger(f"  -> [Tab {tab_index}] Extraction error: {e}")
+                try:
+                    tracer.outcome(tab_index, 'error', reason=type(e).__name__)
+                except Exception as trace_error:
+                    self.logger(f"  -> [Tab {tab_index}] Could not trace the error: {trace_error}")
+            if self.journal is not None and self.journal_error is None:
+                self._held.append((tab_index, outcome, key, self.writer.count, invoice))
+                self._release_journal()
+
+    def classify(self, content):
+        """
+        Pre-parse fast path. Returns (verdict, reason, digest, key, internal_id):
+        verdict 'seen' when the capture is a known invoice (no parse needed),
+        'new' when only a full parse can tell. internal_id is the page's in_ ID
+        when it was read ('N/A' otherwise).
+        """
+        digest = capture_digest(content)
+        if digest in self.seen_digests:
+            return 'seen', 'digest', digest, None, 'N/A'
+        inv_id, internal_id = quick_identifiers(content)
+        if inv_id != 'N/A' and inv_id in self.seen_ids:
+            return 'seen', 'invoice_number', digest, inv_id, internal_id
+        # The in_ ID survives finalization (a draft gets a new number), so it
+        # only stands in for pages that have no invoice number at all.
+        if inv_id == 'N/A' and internal_id in self.seen_internal_ids:
+            return 'seen', 'internal_id', digest, None, internal_id
+        return 'new', None, digest, None, internal_id
+
+    def _skip_duplicate(self, tab_index, key, label):
+        self.duplicates += 1
+        get_tracer().outcome(tab_index, 'duplicate', reason=label)
+        if key is not None and hasattr(self.seen_ids, 'touch'):
+            self.seen_ids.touch(key)
+        self.logger(f"  -> [Tab {tab_index}] Duplicate found ({label}). Skipping.")
+
+    def _process(self, tab_index, content):
+        """
+        Parses, de-duplicates and writes one capture. Returns (outcome, dedup key,
+        the invoice's reconcile.invoice_fields when it was written, its number
+        and in_ ID when it is a duplicate the reconciler was told about, else None).
+        """
+        start = time.perf_counter()
+        verdict, reason, digest, key, internal_id = self.classify(content)
+        self.stats.record('classify', time.perf_counter() - start)
+        if verdict == 'seen':
+            self.avoided[reason] += 1
+            self.seen_digests.add(digest)
+            earlier = None
+            if self.reconciler is not None and reason == 'invoice_number':
+                # Possibly extracted by an earlier run; digest and in_ ID hits are this run's
+                earlier = self._mark_extracted(key, internal_id)
+            self._skip_duplicate(tab_index, key, key or reason)
+            return 'duplicate', key, earlier
+
+        start = time.perf_counter()
+        parsed_data = self.cache.get(digest, len(content.encode('utf-8'))) if self.cache is not None else None
+        if parsed_data is None:
+            parsed_data = parse_invoice_text(content)
+            self.full_parses += 1
+            if self.cache is not None:
+                self.cache.put(digest, parsed_data)
+        self.stats.record('parse', time.perf_counter() - start)
+
+        inv_id = parsed_data.get('invoice_number', 'N/A')
+        unique_key = dedup_key(parsed_data)
+        self.seen_digests.add(digest)
+        if inv_id == 'N/A' and parsed_data.get('internal_id', 'N/A') != 'N/A':
+            self.seen_internal_ids.add(parsed_data['internal_id'])
+        if unique_key in self.seen_ids:
+            earlier = None
+            if self.reconciler is not None:
+                earlier = self._mark_extracted(inv_id, parsed_data.get('internal_id', 'N/A'))
+            self._skip_duplicate(tab_index, unique_key, unique_key if inv_id != 'N/A' else 'Fingerprint')
+            return 'duplicate', unique_key, earlier
+
+        start = time.perf_counter()
+        self.writer.write(parsed_data)
+        self.stats.record('write', time.perf_counter() - start)
+        self.seen_ids.add(unique_key)
+        self._unsynced.append(self.writer.count)
+        self._commit_synced()
+        invoice = invoice_fields(parsed_data)
+        if self.reconciler is not None:
+            self.reconciler.add(invoice)
+        self.accepted += 1
+        get_tracer().outcome(tab_index, 'new', invoice_number=inv_id)
+        self.logger(f"  -> [Tab {tab_index}] Extracted: {inv_id}")
+        return 'new', unique_key, invoice
+
+    def _mark_extracted(self, inv_id, internal_id):
+        """A duplicate still counts as extracted for the reconciliation; returns its identifiers."""
+        self.reconciler.mark_extracted(inv_id, internal_id)
+        return {'invoice_number': inv_id, 'internal_id': internal_id}
+
+    def _commit_synced(self):
+        """Commits the dedup keys of the invoices the writer has synced."""
+        synced = self.writer.synced
+        done = 0
+        while done < len(self._unsynced) and self._unsynced[done] <= synced:
+            done += 1
+        if not done:
+            return
+        del self._unsynced[:done]
+        if hasattr(self.seen_ids, 'commit'):
+            self.seen_ids.commit(done)
+
+    def _release_journal(self):
+        """
+        Journals the held tab records once no write before them is left unsynced.
+        A failed journal write is logged and stops the journaling (the run goes
+        on; a resume would harvest the unjournaled tabs again).
+        """
+        if self._unsynced or self.journal_error is not None:
+            return
+        try:
+            for record in self._held:
+                self.journal.tab(*record)
+        except Exception as e:
+            self.journal_error = e
+            self.logger(f"[Journal] Could not write the run journal: {e}. Tabs are no longer journaled.")
+        self._held = []
+
+    def close(self):
+        """
+        Waits for every queued capture to be processed, stops the worker, then
+        syncs the writer and commits the remaining keys and journal records.
+        A worker that already died leaves its queued captures unprocessed.
+        """
+        if self._thread.is_alive():
+            try:
+                self._put(None)
+            except RuntimeError:
+                pass  # Died while the queue was full
+        self._thread.join()
+        self.writer.sync()
+        self._commit_synced()
+        if self.journal is not None:
+            self._release_journal()
+
+    def log_summary(self):
+        self.logger(f"\n[Pipeline] accepted: {self.accepted} | duplicates: {self.duplicates} | "
+                    f"errors: {self.errors} | max queue depth: {self.max_depth}")
+        avoided = sum(self.avoided.values())
+        self.logger(f"[FastPath] full parses: {self.full_parses} | avoided: {avoided} "
+                    f"(digest {self.avoided['digest']}, invoice number {self.avoided['invoice_number']}, "
+                    f"internal ID {self.avoided['internal_id']})")
+        if self.cache is not None:
+            self.cache.log_summary(self.logger)
+        for line in self.stats.summary_lines():
+            self.logger(line)
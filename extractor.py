@@ -1,195 +1,446 @@
+import functools
 import re
+from collections import namedtuple
 
-def split_into_blocks(text):
+from money import currency_code, parse_quantity, to_minor_units
+from records import Dates, Invoice, LineItem
+
+# Bump whenever parse_invoice_text output changes; cached parses are keyed by it
+PARSER_VERSION = "3"
+
+# --- Profiling hook ---
+# While a profiling.Profiler is installed, calls to the stage functions below go
+# through it (per-stage counters, memory samples); otherwise they cost one check.
+_profiler = None
+
+
+def set_profiler(profiler):
+    """Installs a profiler for the extractor stages (None removes it)."""
+    global _profiler
+    _profiler = profiler
+
+
+def _stage(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(arg):
+        if _profiler is None:
+            return func(arg)
+        return _profiler.call(name, func, arg)
+    return wrapper
+
+
+# --- Block markers ---
+# Pattern: (block_name, regex_for_start_of_block)
+# Every marker sits at the start of a line, relaxed to allow optional leading
+# whitespace; the shared '^\s*' prefix is factored out below.
+BLOCK_MARKERS = [
+    ('recent_activity', r'Recent activity'),
+    ('summary', r'Summary\s*$'),
+    ('description', r'Description\s*\n\s*Qty'),
+    ('payments', r'Payments'),
+    ('logs', r'Logs'),
+    ('events', r'Events'),
+    ('details', r'Details\s*\n\s*ID'),
+    ('metadata', r'Metadata'),
+]
+
+# All markers compiled once into a single alternation with one named group per
+# block, so the whole page is walked in a single finditer pass.
+_BLOCK_MARKER_RE = re.compile(
+    r'^\s*(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in BLOCK_MARKERS) + ')',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Fallback for pages whose 'Details' header is not at the start of a line
+_DETAILS_START_RE = re.compile(r'Details\s*\n\s*ID', re.IGNORECASE)
+
+# Next major header after 'Details' (only the tail after Details is scanned)
+_DETAILS_END_RE = re.compile(r'\n(Kastle AI|Developers|Metadata)', re.IGNORECASE)
+
+
+def _strip_span(text, start, end):
+    """Narrows (start, end) so that text[start:end] == text[start:end].strip()."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def find_block_spans(text):
     """
-    Splits the raw text into logical blocks based on headers.
-    Returns a dictionary of block_name -> content.
+    Locates the logical blocks of the raw text in a single pass.
+    Returns a dictionary of block_name -> (start, end) offsets into text,
+    already trimmed of surrounding whitespace.
     """
-    blocks = {}
-    
-    # Define primary markers for block starts
-    # Pattern: (block_name, regex_for_start_of_block)
-    # relaxed to allow optional leading whitespace
-    primary_markers = [
-        ('recent_activity', r'^\s*Recent activity'),
-        ('summary', r'^\s*Summary\s*$'),
-        ('description', r'^\s*Description\s*\n\s*Qty'),
-        ('payments', r'^\s*Payments'),
-        ('logs', r'^\s*Logs'),
-        ('events', r'^\s*Events'),
-        ('details', r'^\s*Details\s*\n\s*ID'),
-        ('metadata', r'^\s*Metadata'),
-    ]
-    
-    # Collect all marker positions and their names
-    positions_with_names = []
-    for name, pattern in primary_markers:
-        # Use finditer to find all occurrences if a pattern might repeat
-        for match in re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL):
-            positions_with_names.append((match.start(), name))
-            
-    # Sort markers by their starting position
-    positions_with_names.sort(key=lambda x: x[0])
-    
-    # Add a pseudo-marker for the very beginning of the text
-    full_markers_list = [(0, 'header')] + positions_with_names
-    
-    # Iterate through the sorted markers to define block boundaries
-    for i in range(len(full_markers_list)):
-        start_idx, block_name = full_markers_list[i]
-        
-        # The end of the current block is the start of the next block, or end of text
-        if i + 1 < len(full_markers_list):
-            end_idx = full_markers_list[i+1][0]
-        else:
-            end_idx = len(text) # Last block goes to the end
-            
-        blocks[block_name] = text[start_idx:end_idx].strip()
-        
+    # Collect marker positions in text order; finditer already yields them sorted
+    markers = [(0, 'header')]
+    details_start = None
+    for match in _BLOCK_MARKER_RE.finditer(text):
+        name = match.lastgroup
+        if name == 'details' and details_start is None:
+            details_start = match.start()
+        markers.append((match.start(), name))
+
+    # The end of each block is the start of the next one, or end of text.
+    # Later occurrences of a repeated header overwrite earlier ones.
+    spans = {}
+    text_len = len(text)
+    for i, (start_idx, block_name) in enumerate(markers):
+        end_idx = markers[i + 1][0] if i + 1 < len(markers) else text_len
+        spans[block_name] = _strip_span(text, start_idx, end_idx)
+
     # --- Refine Details block ending ---
-    details_start_match = re.search(r'Details\s*\n\s*ID', text, re.IGNORECASE | re.DOTALL)
-    if details_start_match:
-        potential_details_block = text[details_start_match.start():].strip()
-        
-        # Find next major header after 'Details' within this potential block
-        next_header_match = re.search(r'\n(Kastle AI|Developers|Metadata)', potential_details_block, re.IGNORECASE)
-        if next_header_match:
-            blocks['details'] = potential_details_block[:next_header_match.start()].strip()
-        else:
-            blocks['details'] = potential_details_block.strip()
-            
-    return blocks
+    if details_start is None:
+        details_start_match = _DETAILS_START_RE.search(text)
+        if details_start_match:
+            details_start = details_start_match.start()
+    if details_start is not None:
+        next_header_match = _DETAILS_END_RE.search(text, details_start)
+        end_idx = next_header_match.start() if next_header_match else text_len
+        spans['details'] = _strip_span(text, details_start, end_idx)
 
+    return spans
 
-def parse_invoice_text(text):
+
+@_stage
+def split_into_blocks(text):
     """
-    Parses the raw text from a Stripe invoice page (Ctrl+A copy) using block-based extraction
-    with global fallbacks.
+    Splits the raw text into logical blocks based on headers.
+    Returns a dictionary of block_name -> content.
     """
-    blocks = split_into_blocks(text)
-    data = {}
-    
-    # --- Helper: extract with fallback ---
-    
-    # --- Helper: extract with fallback ---
-    def extract_field(regex, block_name, global_fallback=True):
-        # 1. Try block
-        block_content = blocks.get(block_name, '')
-        match = re.search(regex, block_content, re.IGNORECASE)
-        if match:
-            return match
-            
-        # 2. Try global if requested
-        if global_fallback:
-            match = re.search(regex, text, re.IGNORECASE)
-            if match:
-                return match
-        return None
+    return {name: text[start:end] for name, (start, end) in find_block_spans(text).items()}
+
+
+# --- Value shapes ---
+# Quantities and money as displayed: "$1,700.00", "-€12.50", "CA$5.00", "1,234.56 EUR"
+_QTY = r'\d[\d,]*(?:\.\d+)?'
+_MONEY = r'-?(?:[^\d\s-]{1,4}\d[\d,]*(?:\.\d+)?|\d[\d,]*\.\d{2,})(?:[^\S\n]?[A-Z]{3})?'
+
+
+# --- Field specs ---
+
+def _clean_date(value):
+    """Dates and due dates drop their commas so they survive the CSV block."""
+    return value.strip().replace(',', ' ')
+
+
+def _title(value):
+    return value.title()
+
+
+def _strip(value):
+    return value.strip()
 
+
+FieldSpec = namedtuple(
+    'FieldSpec',
+    ['name', 'block', 'pattern', 'group', 'post', 'fallback', 'ignore_case', 'default', 'section'],
+    defaults=(1, None, True, True, 'N/A', None),
+)
+FieldSpec.__doc__ = """
+One extracted field.
+name: output key. block: owning block, or None for a global-only field.
+pattern: regex; 'group' selects the value (0 = whole match).
+post: optional post-processing of the matched value.
+fallback: whether a block miss may be retried against the full text.
+default: value on a miss (None = key omitted). section: nested dict key, if any.
+"""
+
+# Order matters only for output key order. records.Invoice lists the same fields, in this order.
+FIELD_SPECS = [
     # --- 1. Global Fields ---
-    status_match = re.search(r'\b(Void|Open|Paid|Draft|Uncollectible|Past\s+due)\b', text, re.IGNORECASE)
-    data['status'] = status_match.group(1).title() if status_match else "Unknown"
-    
-    total_match = re.search(r'Total\s*\n\s*(\$[\d,]+\.\d{2})', text, re.MULTILINE)
-    data['total_amount'] = total_match.group(1) if total_match else "N/A"
-    
+    FieldSpec('status', None, r'\b(Void|Open|Paid|Draft|Uncollectible|Past\s+due)\b',
+              post=_title, default='Unknown'),
+    FieldSpec('total_amount', None, rf'Total\s*\n\s*({_MONEY})', ignore_case=False),
     # Payment Page Link (extracted for internal logic if needed, but not output to CSV)
-    link_match = re.search(r'(https://invoice\.stripe\.com/i/[^\s]+)', text)
-    data['payment_page'] = link_match.group(1) if link_match else "N/A"
+    FieldSpec('payment_page', None, r'(https://invoice\.stripe\.com/i/[^\s]+)', ignore_case=False),
 
     # --- 2. Summary Fields (with Global Fallback) ---
-    
-    # Invoice Number
     # Match newline OR (optional colon + spaces)
-    inv_match = extract_field(r'Invoice number\s*(?:[\r\n]+|:?\s+)([A-Z0-9-]+)', 'summary')
-    data['invoice_number'] = inv_match.group(1) if inv_match else "N/A"
-    
-    # Due Date
-    due_match = extract_field(r'Due date\s+(.+)', 'summary')
-    if due_match:
-        data['due_date'] = due_match.group(1).strip().replace(',', ' ')
-    else:
-        data['due_date'] = "N/A"
-        
+    FieldSpec('invoice_number', 'summary', r'Invoice number\s*(?:[\r\n]+|:?\s+)([A-Z0-9-]+)'),
+    FieldSpec('due_date', 'summary', r'Due date\s+(.+)', post=_clean_date),
     # Billed To Email (Global search is usually safer for emails)
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    data['billed_to_email'] = email_match.group(0) if email_match else "N/A"
-    
-    # Billed To Name
-    # This is tricky globally because "Billed to" might appear multiple times or be ambiguous.
-    # We stick to block first, then try global "Billed to\nName" pattern.
-    billed_match = extract_field(r'Billed to\s+(.+)', 'summary')
-    data['billed_to_name'] = billed_match.group(1).strip() if billed_match else "N/A"
-    
-    # Currency
-    curr_match = extract_field(r'Currency\s+(.+)', 'summary')
-    data['currency'] = curr_match.group(1).strip() if curr_match else "N/A"
+    FieldSpec('billed_to_email', None, r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+              group=0, ignore_case=False),
+    # "Billed to" might appear multiple times; stick to the block first.
+    FieldSpec('billed_to_name', 'summary', r'Billed to\s+(.+)', post=_strip),
+    FieldSpec('currency', 'summary', r'Currency\s+(.+)', post=_strip),
+
+    # --- 2b. Totals footer of the Description block (with Global Fallback) ---
+    FieldSpec('subtotal', 'description', rf'Subtotal\s*\n\s*({_MONEY})', ignore_case=False),
+    FieldSpec('amount_remaining', 'description', rf'Amount remaining\s*\n\s*({_MONEY})', ignore_case=False),
 
     # --- 3. Details Fields (with Global Fallback) ---
-    
-    # Internal ID
-    id_match = extract_field(r'ID\s+(in_[a-zA-Z0-9]+)', 'details')
-    data['internal_id'] = id_match.group(1) if id_match else "N/A"
-    
-    # Dates
-    dates = {}
-    target_dates = ['Created', 'Finalized', 'Voided']
-    
-    for key in target_dates:
-        # Try finding "Key\nValue" pattern
-        date_match = extract_field(rf'{key}\s+(.+)', 'details')
-        if date_match:
-            raw_date = date_match.group(1).strip()
-            dates[key] = raw_date.replace(',', ' ')
-            
+    FieldSpec('internal_id', 'details', r'ID\s+(in_[a-zA-Z0-9]+)'),
+    FieldSpec('Created', 'details', r'Created\s+(.+)', post=_clean_date, default=None, section='dates'),
+    FieldSpec('Finalized', 'details', r'Finalized\s+(.+)', post=_clean_date, default=None, section='dates'),
+    FieldSpec('Voided', 'details', r'Voided\s+(.+)', post=_clean_date, default=None, section='dates'),
+]
+
+# Per-field counters: hit in owning block / hit via global fallback / miss
+FIELD_STATS = {spec.name: {'hits': 0, 'fallbacks': 0, 'misses': 0} for spec in FIELD_SPECS}
+
+
+def reset_field_stats():
+    """Zeroes the per-field hit/fallback/miss counters."""
+    for counters in FIELD_STATS.values():
+        for key in counters:
+            counters[key] = 0
+
+
+def _compile_spec(spec):
+    flags = re.IGNORECASE if spec.ignore_case else 0
+    return spec, re.compile(spec.pattern, flags)
+
+
+# Compiled once at import: fields grouped by owning block, plus the global-only ones.
+# Each block's fields run as bounded searches over the block's offsets (no copies).
+# A single alternation per block was measured slower under CPython's re, since it
+# disables the literal-prefix skip each individual pattern gets.
+_BLOCK_MATCHERS = {}
+for _spec in FIELD_SPECS:
+    if _spec.block:
+        _BLOCK_MATCHERS.setdefault(_spec.block, []).append(_compile_spec(_spec))
+_GLOBAL_MATCHER = [_compile_spec(spec) for spec in FIELD_SPECS if spec.block is None]
+_QUICK_MATCHERS = {
+    spec.name: (spec, regex)
+    for matcher in _BLOCK_MATCHERS.values()
+    for spec, regex in matcher
+    if spec.name in ('invoice_number', 'internal_id')
+}
+_FALLBACK_MATCHERS = [
+    (spec, compiled)
+    for matcher in _BLOCK_MATCHERS.values()
+    for spec, compiled in matcher
+    if spec.fallback
+]
+
+
+def quick_identifiers(text):
+    """
+    Cheap pre-parse scan for (invoice_number, internal_id), "N/A" when absent.
+    Runs the two field patterns over the raw capture without splitting blocks,
+    so it costs a fraction of parse_invoice_text. Used to spot known invoices.
+    """
+    found = []
+    for name in ('invoice_number', 'internal_id'):
+        spec, regex = _QUICK_MATCHERS[name]
+        match = regex.search(text)
+        found.append(match.group(spec.group) if match else 'N/A')
+    return tuple(found)
+
+
+def extract_fields(text, spans=None):
+    """
+    Extracts every FIELD_SPECS field from the raw text.
+    Each block is searched only within its own offsets; global fields and the
+    block misses that allow fallback are then resolved together against the full text.
+    """
+    if spans is None:
+        spans = find_block_spans(text)
+
+    found = {}
+    for block_name, matcher in _BLOCK_MATCHERS.items():
+        if block_name not in spans:
+            continue
+        start, end = spans[block_name]
+        for spec, regex in matcher:
+            match = regex.search(text, start, end)
+            if match:
+                found[spec.name] = match.group(spec.group)
+    block_hits = set(found)
+
+    # --- Global pass: global-only fields plus fallbacks for block misses ---
+    global_pass = list(_GLOBAL_MATCHER)
+    global_pass.extend(
+        (spec, regex) for spec, regex in _FALLBACK_MATCHERS if spec.name not in found
+    )
+    for spec, regex in global_pass:
+        match = regex.search(text)
+        if match:
+            found[spec.name] = match.group(spec.group)
+
+    data = {}
+    for spec in FIELD_SPECS:
+        counters = FIELD_STATS[spec.name]
+        target = data.setdefault(spec.section, {}) if spec.section else data
+        if spec.name in found:
+            value = found[spec.name]
+            if spec.block is None or spec.name in block_hits:
+                counters['hits'] += 1
+            else:
+                counters['fallbacks'] += 1
+            target[spec.name] = spec.post(value) if spec.post else value
+        else:
+            counters['misses'] += 1
+            if spec.default is not None:
+                target[spec.name] = spec.default
+    return data
+
+
+@_stage
+def parse_invoice_text(text):
+    """
+    Parses the raw text from a Stripe invoice page (Ctrl+A copy) using block-based extraction
+    with global fallbacks. Returns an Invoice record, readable like the former dict (see records.py).
+    """
+    spans = find_block_spans(text)
+    data = extract_fields(text, spans)
+
+    # Dates (Due is mirrored from the summary field)
+    dates = data.pop('dates', {})
     if data['due_date'] != 'N/A':
         dates['Due'] = data['due_date']
-        
-    data['dates'] = dates
+
+    data['dates'] = Dates(dates)
 
     # --- 4. Description Block (Line Items) ---
+    data['line_items'] = extract_line_items(text, spans)
+
+    # --- 5. Amounts in integer minor units ---
+    normalize_money(data)
+
+    return Invoice.from_dict(data)
+
+
+# Display-string field -> integer minor units key added by normalize_money
+MONEY_FIELDS = (('total_amount', 'total_cents'), ('subtotal', 'subtotal_cents'),
+                ('amount_remaining', 'remaining_cents'))
+
+
+def normalize_money(data):
+    """
+    Adds currency_code (ISO 4217) and the *_cents keys (integer minor units,
+    None when the amount is missing) to a parsed invoice and its line items.
+    The display strings are kept as extracted.
+    """
+    code = currency_code(data.get('currency'), data.get('total_amount'))
+    data['currency_code'] = code
+    for field, key in MONEY_FIELDS:
+        data[key] = to_minor_units(data.get(field), code)
+    for item in data['line_items']:
+        item['qty_value'] = parse_quantity(item['qty'])
+        item['unit_price_cents'] = to_minor_units(item['unit_price'], code)
+        item['amount_cents'] = to_minor_units(item['amount'], code)
+    return data
+
+# --- Line items ---
+
+# Row shapes. An item row ends with three value lines: qty, unit price, amount (_QTY, _MONEY).
+_PERIOD = r'(?i:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?[^\S\n]+\d[^\n]*'
+_QTY_RE = re.compile(_QTY)
+_MONEY_RE = re.compile(_MONEY)
+_PERIOD_RE = re.compile(_PERIOD)
+# Same shapes over a whole column of rows joined by newlines
+_QTY_COLUMN_RE = re.compile(rf'{_QTY}(?:\n{_QTY})*')
+_MONEY_COLUMN_RE = re.compile(rf'{_MONEY}(?:\n{_MONEY})*')
+_PERIOD_COLUMN_RE = re.compile(rf'{_PERIOD}(?:\n{_PERIOD})*')
+_TABLE_END_RE = re.compile(r'\n[^\S\n]*Subtotal[^\S\n]*(?=\n|$)', re.IGNORECASE)
+_TABLE_HEADER = ('description', 'qty', 'unit price', 'amount')
+
+# Description lines kept per row (guards against long runs of unrelated text)
+MAX_DESCRIPTION_LINES = 6
+
+
+def _row_head(lines):
+    """Splits the lines preceding a row's values into (description, period)."""
+    lines = lines[-MAX_DESCRIPTION_LINES:]
+    if len(lines) > 1 and _PERIOD_RE.fullmatch(lines[-1]):
+        return ' '.join(lines[:-1]), lines[-1]
+    return ' '.join(lines), ''
+
+
+# Rows per column check; bounds the regex backtracking stack on huge tables
+COLUMN_CHECK_ROWS = 256
+
+
+def _column_fits(column_re, body, offset):
+    """True when every 5th line of body, starting at offset, matches column_re."""
+    step = 5 * COLUMN_CHECK_ROWS
+    for start in range(offset, len(body), step):
+        if not column_re.fullmatch('\n'.join(body[start:start + step:5])):
+            return False
+    return True
+
+
+def _is_regular_table(body):
+    """True when body is a whole number of description/period/qty/unit price/amount rows."""
+    return (
+        _column_fits(_QTY_COLUMN_RE, body, 2)
+        and _column_fits(_MONEY_COLUMN_RE, body, 3)
+        and _column_fits(_MONEY_COLUMN_RE, body, 4)
+        and _column_fits(_PERIOD_COLUMN_RE, body, 1)
+    )
+
+
+def scan_line_items(text, start, end):
+    """
+    Single pass over the table in text[start:end] that recognises item rows by
+    shape: description line(s), an optional period, then qty / unit price /
+    amount. Each step first tries the usual 5-line row and only walks line by
+    line when that shape does not fit, so an odd-sized item cannot shift the
+    ones after it. The table ends at the Subtotal line, so the totals footer is
+    never mistaken for an item.
+    """
+    table_end = _TABLE_END_RE.search(text, start, end)
+    if table_end:
+        end = table_end.start()
+    lines = [line for line in map(str.strip, text[start:end].split('\n')) if line]
+
+    # Column headers (Description, Qty, Unit price, Amount) precede the first row
+    header = 0
+    while header < min(len(lines), len(_TABLE_HEADER)) and lines[header].lower() in _TABLE_HEADER:
+        header += 1
+    del lines[:header]
+
+    # Fast path: every row is the usual 5 lines, checked a column at a time
+    if lines and len(lines) % 5 == 0 and _is_regular_table(lines):
+        return [LineItem(d, p, q, u, a) for d, p, q, u, a in zip(*[iter(lines)] * 5)]
+
+    is_qty, is_money = _QTY_RE.fullmatch, _MONEY_RE.fullmatch
+    items = []
+    count = len(lines)
+    head = 0
+    while head < count:
+        # Usual row: description, period, qty, unit price, amount
+        row = head + 2
+        if not (row + 2 < count and is_qty(lines[row]) and is_money(lines[row + 1])
+                and is_money(lines[row + 2])):
+            row = head + 1
+            while row + 2 < count and not (is_qty(lines[row]) and is_money(lines[row + 1])
+                                           and is_money(lines[row + 2])):
+                row += 1
+            if row + 2 >= count:
+                break
+        description, period = _row_head(lines[head:row])
+        items.append(LineItem(description, period, lines[row], lines[row + 1], lines[row + 2]))
+        head = row + 3
+    return items
+
+
+def extract_line_items(text, spans=None):
+    """
+    Parses the line items table from the Description block.
+    """
+    if spans is None:
+        spans = find_block_spans(text)
+
     # We strictly use the description block to avoid false positives from other tables
-    desc_text = blocks.get('description', '')
-    if not desc_text:
+    desc_start, desc_end = spans.get('description', (0, 0))
+    if desc_start >= desc_end:
         # Fallback: try finding the header globally if block failed
         start_marker = re.search(r'Description\s*\n\s*Qty\s*\n\s*Unit price\s*\n\s*Amount', text, re.IGNORECASE)
         end_marker = re.search(r'\nSubtotal', text, re.IGNORECASE)
-        if start_marker and end_marker:
-             desc_text = text[start_marker.end():end_marker.start()]
-    
-    items = []
-    # If we have text (either from block or fallback), parse it
-    if desc_text:
-        # Basic parsing logic assuming 5 lines per item
-        # We need to be careful about not including the header itself if we grabbed it raw
-        # The block logic usually excludes the start marker, but let's be safe
-        
-        # Clean up lines
-        lines = [line.strip() for line in desc_text.split('\n') if line.strip()]
-        
-        # Filter out header row if present (Description, Qty...)
-        if lines and lines[0].lower() == 'description':
-             # Skip the 4 header lines: Description, Qty, Unit price, Amount
-             lines = lines[4:] if len(lines) >= 4 else []
-
-        chunk_size = 5
-        for i in range(0, len(lines), chunk_size):
-            chunk = lines[i:i+chunk_size]
-            if len(chunk) == 5:
-                # Basic validation: Qty should be a number or resemble one
-                # to avoid parsing garbage
-                items.append({
-                    'description': chunk[0],
-                    'period': chunk[1],
-                    'qty': chunk[2],
-                    'unit_price': chunk[3],
-                    'amount': chunk[4]
-                })
-    
-    data['line_items'] = items
-    
-    return data
+        if not (start_marker and end_marker):
+            return []
+        desc_start, desc_end = start_marker.end(), end_marker.start()
 
+    return scan_line_items(text, desc_start, desc_end)
+
+@_stage
 def format_to_csv_block(data):
     """
     Formats the extracted dictionary into the specific multi-line CSV block string.
@@ -244,6 +495,12 @@ def format_to_csv_block(data):
     return "\n".join(lines)
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # Batch mode: python extractor.py <dirs/globs/files> [options]
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+
     # Test with sample files
     files = ['sample1.txt', 'sample2.txt', 'sample3.txt', 'sample4.txt']
     for f_path in files:
@@ -1,22 +1,37 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import threading
+import os
 import sys
 from config_manager import load_config, save_config
-import setup
-import automation
-
-class RedirectText(object):
-    """Redirects print statements to a tkinter Text widget."""
-    def __init__(self, text_widget):
+from log_pump import INFO, LEVELS, LOG_MAX_LINES, LOG_POLL_MS, LogPump, new_log_path, set_log_pump
+from run_journal import JOURNAL_FILE
+# setup and automation (and through them the UI driver) are imported by the
+# button handlers, so the window shows without loading the automation stack.
+
+class LogView:
+    """
+    Shows a LogPump in a tkinter Text widget. Runs on the Tk main loop only:
+    drains the pump every poll_ms (sooner while a backlog remains) and keeps
+    the last max_lines lines; the full log is in the pump's file.
+    """
+    def __init__(self, root, text_widget, pump, max_lines=LOG_MAX_LINES, poll_ms=LOG_POLL_MS):
+        self.root = root
         self.output = text_widget
-
-    def write(self, string):
-        self.output.insert(tk.END, string)
-        self.output.see(tk.END)
-
-    def flush(self):
-        pass
+        self.pump = pump
+        self.max_lines = max_lines
+        self.poll_ms = poll_ms
+        self.root.after(self.poll_ms, self.poll)
+
+    def poll(self):
+        text, backlog = self.pump.drain()
+        if text:
+            self.output.insert(tk.END, text)
+            lines = int(self.output.index('end-1c').split('.')[0])
+            if lines > self.max_lines:
+                self.output.delete('1.0', f"{lines - self.max_lines + 1}.0")
+            self.output.see(tk.END)
+        self.root.after(1 if backlog else self.poll_ms, self.poll)
 
 class AutomationApp:
     def __init__(self, root):
@@ -65,10 +80,10 @@ class AutomationApp:
         self.coord_status = tk.Label(coord_frame, text="Ready", fg="gray")
         self.coord_status.pack(side="left")
 
-        # Extra File Path
+        # Extra File Path: ERP / ledger export the run is reconciled against (reconcile.py)
         file_frame = tk.Frame(frame)
         file_frame.pack(fill="x", pady=5)
-        tk.Label(file_frame, text="Extra File Path:", font=self.normal_font).pack(side="left")
+        tk.Label(file_frame, text="Reconcile Against (CSV):", font=self.normal_font).pack(side="left")
         
         self.file_entry = tk.Entry(file_frame, width=30)
         self.file_entry.insert(0, self.config.get("extra_file_path", ""))
@@ -88,6 +103,11 @@ class AutomationApp:
         self.btn_start = tk.Button(frame, text="START AUTOMATION", command=self.start_automation, 
                                    bg="#4CAF50", fg="white", font=("Helvetica", 14, "bold"), height=2)
         self.btn_start.pack(fill="x")
+
+        self.btn_resume = tk.Button(frame, text="RESUME INTERRUPTED RUN", command=self.resume_automation,
+                                    bg="#FF9800", fg="white", font=("Helvetica", 11, "bold"))
+        self.btn_resume.pack(fill="x", pady=(5, 0))
+        self.update_resume_button()
         
         tk.Label(frame, text="Ensure your browser is open and focused immediately after clicking Start.", 
                  fg="red", font=("Helvetica", 9)).pack(pady=5)
@@ -99,11 +119,23 @@ class AutomationApp:
         self.log_area = scrolledtext.ScrolledText(frame, height=10, state='normal', font=("Consolas", 9))
         self.log_area.pack(fill="both", expand=True)
 
-        # Redirect stdout to the log area
-        sys.stdout = RedirectText(self.log_area)
+        # Redirect stdout to the log pump; only the Tk main loop touches the widget
+        level = LEVELS.get(str(self.config.get("log_level", "info")).lower(), INFO)
+        self.log_pump = LogPump(new_log_path(), level=level)
+        set_log_pump(self.log_pump)
+        sys.stdout = self.log_pump
+        self.log_view = LogView(self.root, self.log_area, self.log_pump)
+        print(f"Full log: {self.log_pump.log_path}")
+
+    def on_close(self):
+        sys.stdout = sys.__stdout__
+        set_log_pump(None)
+        self.log_pump.close()
+        self.root.destroy()
 
     def browse_file(self):
-        filename = filedialog.askopenfilename(title="Select File")
+        filename = filedialog.askopenfilename(title="Select ERP / Ledger Export",
+                                              filetypes=[("CSV files", "*.csv *.txt"), ("All files", "*.*")])
         if filename:
             self.file_entry.delete(0, tk.END)
             self.file_entry.insert(0, filename)
@@ -131,6 +163,7 @@ class AutomationApp:
             
             def task():
                 try:
+                    import setup
                     new_config = setup.run_setup_wizard()
                     # Update internal config
                     self.config.update(new_config)
@@ -149,18 +182,37 @@ class AutomationApp:
         # Reload config to ensure we have latest
         self.config = load_config()
 
-    def start_automation(self):
+    def update_resume_button(self):
+        # A journal is left behind only by a run that did not complete
+        self.btn_resume.config(state="normal" if os.path.exists(JOURNAL_FILE) else "disabled")
+
+    def resume_automation(self):
+        self.start_automation(resume=True)
+
+    def start_automation(self, resume=False):
+        if not resume and os.path.exists(JOURNAL_FILE):
+            # Same question as `python automation.py`; starting over keeps the old output aside
+            answer = messagebox.askyesnocancel(
+                "Interrupted Run",
+                "An interrupted run can be resumed. Resume it?\n\n"
+                "No starts over; what the interrupted run extracted is kept in a separate file.")
+            if answer is None:
+                return
+            resume = answer
+
         # Save current UI settings first
         self.save_settings()
         
         row_count = self.config.get("row_count", 20)
         
         self.btn_start.config(state="disabled", text="Running...")
+        self.btn_resume.config(state="disabled")
         
         def task():
             try:
+                import automation
                 # We can pass a custom logger if we want, but stdout is already redirected
-                automation.run_automation_logic(row_count)
+                automation.run_automation_logic(row_count, resume=resume)
             except Exception as e:
                 print(f"Error during automation: {e}")
             finally:
@@ -170,9 +222,11 @@ class AutomationApp:
 
     def reset_ui(self):
         self.btn_start.config(state="normal", text="START AUTOMATION")
+        self.update_resume_button()
         messagebox.showinfo("Finished", "Automation cycle finished.")
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = AutomationApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     root.mainloop()
@@ -0,0 +1,104 @@
+"""
+Thread-safe log pipeline for the Tk dashboard.
+
+Worker threads never touch Tk: print() output (sys.stdout is redirected to
+the pump) and log() calls only put records on a queue. The Tk main loop
+drains the queue in batches on an after() timer (see gui_launcher.LogView).
+Every record goes to the log file; the widget only shows records at or above
+the pump's level and keeps the last LOG_MAX_LINES lines.
+
+Without a pump installed (console runs), log() just prints, so nothing is
+filtered.
+"""
+import os
+import queue
+import time
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR}
+LOG_DIR = "logs"
+LOG_MAX_LINES = 2000  # Lines kept in the dashboard widget
+LOG_POLL_MS = 100  # Queue drain interval of the Tk main loop
+LOG_DRAIN_MAX = 500  # Records handled per drain, so a burst cannot stall the UI
+
+
+def new_log_path(directory=LOG_DIR):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"dashboard-{time.strftime('%Y%m%d-%H%M%S')}.log")
+
+
+class LogPump:
+    """
+    Queue of (level, text) records. write() makes it usable as sys.stdout
+    (records at INFO); drain() must be called from a single consumer thread.
+    """
+
+    def __init__(self, log_path=None, level=INFO):
+        self.level = level
+        self.log_path = log_path
+        self.dropped = 0  # Records below the display level (still in the file)
+        self._queue = queue.SimpleQueue()
+        self._file = open(log_path, "a", encoding="utf-8") if log_path else None
+
+    def write(self, text):
+        if text:
+            self._queue.put((INFO, text))
+
+    def flush(self):
+        pass
+
+    def log(self, message, level=INFO):
+        self._queue.put((level, message + "\n"))
+
+    def drain(self, max_records=LOG_DRAIN_MAX):
+        """
+        Takes up to max_records records off the queue, appends them to the log
+        file and returns (text to display, more records waiting?).
+        """
+        shown = []
+        for _ in range(max_records):
+            try:
+                level, text = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self._file is not None:
+                self._file.write(text)
+            if level >= self.level:
+                shown.append(text)
+            else:
+                self.dropped += 1
+        if self._file is not None:
+            self._file.flush()
+        return "".join(shown), not self._queue.empty()
+
+    def close(self):
+        """Writes whatever is still queued to the file and closes it."""
+        while self.drain()[1]:
+            pass
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_pump = None
+
+
+def get_log_pump():
+    """Returns the installed LogPump, or None for console runs."""
+    return _pump
+
+
+def set_log_pump(pump):
+    """Installs a pump (None for console output); returns the previous one."""
+    global _pump
+    previous, _pump = _pump, pump
+    return previous
+
+
+def log(message, level=INFO):
+    """Logs through the installed pump, or prints when there is none."""
+    pump = _pump
+    if pump is not None:
+        pump.log(message, level)
+    else:
+        print(message)
@@ -0,0 +1,108 @@
+"""
+Money normalization: display strings such as "$1,700.00", "-€12.50" or
+"CA$5,000.00" to integer minor units (cents for USD, yen for JPY) of an ISO
+4217 currency code, so totals add up exactly without re-parsing text.
+
+Integer arithmetic only (no float, no Decimal): extractor.normalize_money
+runs this for every parsed invoice and each of its line items. Amounts with more decimals than the currency has (per-unit prices
+such as $0.0125) are rounded half up to the minor unit.
+"""
+import re
+
+DEFAULT_MINOR_DIGITS = 2
+# ISO 4217 exponents that differ from 2 (Stripe's zero-decimal and three-decimal currencies)
+MINOR_DIGITS = {
+    'BIF': 0, 'CLP': 0, 'DJF': 0, 'GNF': 0, 'ISK': 0, 'JPY': 0, 'KMF': 0, 'KRW': 0, 'MGA': 0,
+    'PYG': 0, 'RWF': 0, 'UGX': 0, 'VND': 0, 'VUV': 0, 'XAF': 0, 'XOF': 0, 'XPF': 0,
+    'BHD': 3, 'JOD': 3, 'KWD': 3, 'OMR': 3, 'TND': 3,
+}
+# Display symbols, used only when the page has no "Currency" field
+SYMBOL_CURRENCIES = {
+    '$': 'USD', 'US$': 'USD', '€': 'EUR', '£': 'GBP', 'CA$': 'CAD', 'A$': 'AUD', 'NZ$': 'NZD',
+    '¥': 'JPY', '₹': 'INR', 'MX$': 'MXN', 'R$': 'BRL', 'CHF': 'CHF',
+}
+
+# sign, currency prefix, integer part (with thousands separators), fraction, optional ISO suffix
+_AMOUNT_RE = re.compile(r'([-−])?\s*([^\d\s\-−]{0,4}?)\s*([-−])?(\d[\d,]*)(?:\.(\d+))?(?:\s?([A-Z]{3}))?')
+_CODE_RE = re.compile(r'\b([A-Z]{3})\b')
+
+
+def currency_code(currency_field, amount=None):
+    """
+    ISO code from the Currency field ("USD - US Dollar" -> "USD"). Falls back to
+    the symbol (or ISO suffix) of `amount`; "N/A" when neither tells.
+    """
+    if currency_field and currency_field != 'N/A':
+        match = _CODE_RE.search(currency_field.upper())
+        if match:
+            return match.group(1)
+    if amount:
+        match = _AMOUNT_RE.search(amount)
+        if match:
+            if match.group(6):
+                return match.group(6)
+            return SYMBOL_CURRENCIES.get(match.group(2), 'N/A')
+    return 'N/A'
+
+
+def minor_digits(code):
+    return MINOR_DIGITS.get(code, DEFAULT_MINOR_DIGITS)
+
+
+def to_minor_units(amount, code='N/A'):
+    """
+    "$1,700.00" -> 170000 for a two-decimal currency. None when `amount` holds
+    no number ("N/A", "-", "").
+    """
+    if not amount:
+        return None
+    match = _AMOUNT_RE.search(amount)
+    if match is None:
+        return None
+    negative = bool(match.group(1) or match.group(3))
+    whole, fraction = match.group(4), match.group(5) or ''
+    digits = minor_digits(code)
+    value = int(whole.replace(',', '')) * 10 ** digits
+    if fraction:
+        value += int(fraction[:digits].ljust(digits, '0') or 0)
+        if len(fraction) > digits and fraction[digits] >= '5':
+            value += 1
+    return -value if negative else value
+
+
+def parse_quantity(qty):
+    """"2,500" -> 2500, "1.5" -> 1.5; None when qty is not a number."""
+    if not qty:
+        return None
+    text = qty.replace(',', '').strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def decimal_string(value, code):
+    """170000, "USD" -> "1700.00" (no separators or code, for machine-readable output)."""
+    if value is None:
+        return ""
+    digits = minor_digits(code)
+    sign = "-" if value < 0 else ""
+    whole, fraction = divmod(abs(value), 10 ** digits)
+    return f"{sign}{whole}.{fraction:0{digits}d}" if digits else f"{sign}{whole}"
+
+
+def format_minor(value, code):
+    """170000, "USD" -> "1,700.00 USD" (for reports)."""
+    if value is None:
+        return "N/A"
+    digits = minor_digits(code)
+    sign = "-" if value < 0 else ""
+    whole, fraction = divmod(abs(value), 10 ** digits)
+    text = f"{sign}{whole:,}"
+    if digits:
+        text += f".{fraction:0{digits}d}"
+    return f"{text} {code}" if code and code != 'N/A' else text
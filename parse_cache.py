@@ -0,0 +1,206 @@
+"""
+Persistent, content-addressed cache of parse results.
+
+Entries are keyed by a digest of the raw capture plus extractor.PARSER_VERSION,
+so re-running extraction over unchanged captures skips parse_invoice_text,
+and a parser change invalidates everything simply by bumping the version.
+Records are stored as zlib-compressed compact JSON in one SQLite file, and the
+least recently used entries are evicted once the stored bytes exceed a limit.
+
+    python parse_cache.py stats
+    python parse_cache.py drop-stale     # entries from other parser versions
+    python parse_cache.py clear
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from extractor import PARSER_VERSION
+from records import Invoice
+
+PARSE_CACHE_DB = "parse_cache.db"
+MAX_CACHE_MB = 256
+COMMIT_EVERY = 200  # New entries per transaction
+EVICT_TO = 0.9  # Eviction trims the cache to this fraction of the limit
+
+
+def capture_digest(content):
+    """Fixed-size digest of a raw capture (the cache key and the pipeline's duplicate check)."""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+def encode_record(parsed_data):
+    return zlib.compress(json.dumps(parsed_data, ensure_ascii=False, separators=(',', ':'),
+                                    default=dict).encode('utf-8'))
+
+
+def decode_record(blob):
+    return Invoice.from_dict(json.loads(zlib.decompress(blob).decode('utf-8')))
+
+
+class ParseCache:
+    """
+    cache.get(digest, nbytes) returns the parsed record or None;
+    cache.put(digest, parsed_data) stores one. Thread-safe. A read-only cache
+    (used by batch worker processes) never writes, not even LRU timestamps.
+    """
+
+    def __init__(self, path=PARSE_CACHE_DB, max_mb=MAX_CACHE_MB, version=PARSER_VERSION, readonly=False):
+        self.path = path
+        self.max_bytes = int(max_mb * 2**20)
+        self.version = version
+        self.readonly = readonly
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # Raw capture bytes that did not need parsing
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._touched = {}
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self.total_bytes = 0
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            " digest BLOB NOT NULL,"
+            " version TEXT NOT NULL,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (digest, version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parsed_last_used ON parsed(last_used)")
+        self._conn.commit()
+        self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed").fetchone()[0]
+
+    def get(self, digest, nbytes=0):
+        """Returns the cached record for this capture digest, or None. nbytes: raw capture size, for stats."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM parsed WHERE digest = ? AND version = ?", (digest, self.version)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_saved += nbytes
+            if not self.readonly:
+                self._touched[digest] = time.time()
+        return decode_record(row[0])
+
+    def record(self, hit, nbytes=0):
+        """Counts a lookup made elsewhere (e.g. by a read-only cache in a worker process)."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += nbytes
+            else:
+                self.misses += 1
+
+    def put(self, digest, parsed_data):
+        blob = encode_record(parsed_data)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO parsed (digest, version, data, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (digest, self.version, blob, len(blob), time.time()))
+            if cur.rowcount:
+                self.total_bytes += len(blob)
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._commit()
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _commit(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE parsed SET last_used = ? WHERE digest = ? AND version = ?",
+                [(ts, digest, self.version) for digest, ts in self._touched.items()])
+            self._touched.clear()
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under EVICT_TO of its limit."""
+        self._commit()
+        target = int(self.max_bytes * EVICT_TO)
+        doomed = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM parsed ORDER BY last_used"):
+            if self.total_bytes <= target:
+                break
+            doomed.append((rowid,))
+            self.total_bytes -= size
+        self._conn.executemany("DELETE FROM parsed WHERE rowid = ?", doomed)
+        self._conn.commit()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def log_summary(self, logger=print):
+        logger(f"[Cache] hits {self.hits}/{self.hits + self.misses} ({self.hit_rate:.0%}) | "
+               f"parsing skipped for {self.bytes_saved / 2**20:.2f} MiB of captures | "
+               f"{self.total_bytes / 2**20:.2f} of {self.max_bytes / 2**20:.0f} MiB used")
+
+    def entry_stats(self):
+        """Returns [(version, entries, bytes)] for every parser version present."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT version, COUNT(*), SUM(size) FROM parsed GROUP BY version ORDER BY version").fetchall()
+
+    def drop_stale(self):
+        """Deletes entries written by other parser versions. Returns the count removed."""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM parsed WHERE version != ?", (self.version,)).rowcount
+            self._conn.commit()
+            self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed").fetchone()[0]
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM parsed")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self.total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if not self.readonly:
+                self._commit()
+            self._conn.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or maintain the parse cache.")
+    parser.add_argument('--db', default=PARSE_CACHE_DB, help=f"Cache file (default {PARSE_CACHE_DB})")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help="Entries and size per parser version")
+    sub.add_parser('drop-stale', help="Delete entries from other parser versions")
+    sub.add_parser('clear', help="Delete every entry")
+    args = parser.parse_args(argv)
+
+    cache = ParseCache(args.db)
+    try:
+        if args.command == 'stats':
+            print(f"Parser version {PARSER_VERSION}; {cache.total_bytes / 2**20:.1f} MiB in {args.db}")
+            for version, entries, size in cache.entry_stats():
+                current = " (current)" if version == PARSER_VERSION else ""
+                print(f"  version {version:<6} {entries:>8} entries {size / 2**20:>8.1f} MiB{current}")
+        elif args.command == 'drop-stale':
+            print(f"Dropped {cache.drop_stale()} stale entries.")
+        elif args.command == 'clear':
+            cache.clear()
+            print(f"Cleared {args.db}")
+    finally:
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Sliding-window tab prefetch for the extraction loop.
+
+Browsers only start rendering an opened background tab once it has been
+activated, so tabs have to be "touched" before the loop reaches them. Instead
+of activating every tab up front, TabPrefetcher keeps the `window` tabs after
+the one being processed touched. It moves forward past the edge of the window,
+then back, only when fewer than `low_water` touched tabs are left ahead.
+A tab that was still loading when the loop reached it widens the window by
+one (up to `max_window`): pages are loading slower than the loop moves.
+Every advance() nets exactly one tab forward, whatever the real number of tabs,
+so the loop still ends by wrapping around to the original page.
+"""
+from ui_driver import get_driver
+
+PREFETCH_WINDOW = 4  # Tabs kept touched (loading or loaded) ahead of the current one
+PREFETCH_LOW_WATER = 2  # Refill the window when fewer touched tabs than this remain ahead
+PREFETCH_MAX_WINDOW = 12  # Upper bound when the window widens for slow pages
+TAB_SWITCH_DELAY = 0.05  # After each tab switch, to let the browser register it
+
+
+class TabPrefetcher:
+    """
+    Tracks the active tab (0 = the original page, opened tabs follow) and the
+    furthest tab touched so far. tab_count: the number of tabs that were opened
+    (an estimate is fine; overshooting just wraps around harmlessly).
+    """
+
+    def __init__(self, tab_count, window=PREFETCH_WINDOW, low_water=PREFETCH_LOW_WATER,
+                 max_window=PREFETCH_MAX_WINDOW, switch_delay=TAB_SWITCH_DELAY):
+        self.tab_count = tab_count
+        self.window = max(1, window)
+        self.max_window = max(self.window, max_window)
+        self.low_water = max(1, min(low_water, self.window))
+        self.switch_delay = switch_delay
+        self.position = 0
+        self.touched = 0
+        self.hotkeys = 0
+        self.refills = 0
+
+    def _switch(self, *keys):
+        driver = get_driver()
+        driver.hotkey(*keys)
+        driver.sleep(self.switch_delay)
+        self.hotkeys += 1
+
+    def skip(self, count):
+        """Moves over `count` tabs that are already loaded (e.g. left open by an earlier batch)."""
+        for _ in range(count):
+            self._switch('ctrl', 'tab')
+        self.position += count
+        self.touched = max(self.touched, self.position)
+
+    def advance(self):
+        """
+        Moves to the next tab. When the window ahead of it has run low, first goes
+        forward to the window's far edge and back, touching the tabs in between.
+        Returns the number of tabs newly touched.
+        """
+        nxt = self.position + 1
+        edge = min(nxt + self.window, self.tab_count)
+        forward = 1
+        if self.touched - nxt < self.low_water and edge > max(self.touched, nxt):
+            forward = edge - self.position
+            self.refills += 1
+        for _ in range(forward):
+            self._switch('ctrl', 'tab')
+        for _ in range(forward - 1):
+            self._switch('ctrl', 'shift', 'tab')
+        newly_touched = max(0, self.position + forward - self.touched)
+        self.touched = max(self.touched, self.position + forward)
+        self.position = nxt
+        return newly_touched
+
+    def page_loaded(self, on_arrival):
+        """Feedback from the readiness wait: widens the window when a tab was not loaded yet."""
+        if not on_arrival and self.window < self.max_window:
+            self.window += 1
+
+    def log_summary(self, logger=print):
+        logger(f"[Prefetch] window {self.window} (refill below {self.low_water}) | "
+               f"{self.refills} refills | {self.hotkeys} tab switches for {self.position} tabs")
@@ -0,0 +1,170 @@
+"""
+Opt-in profiling of the extractor for batch runs, including single files
+(`python extractor.py capture.txt --profile`).
+
+Switched on with `batch.py --profile [DIR]` (add --profile-memory for
+tracemalloc, which slows parsing several-fold) or the INVOICE_PROFILE
+environment variable:
+    INVOICE_PROFILE=1        cProfile + per-stage counters
+    INVOICE_PROFILE=memory   the same plus tracemalloc samples
+A run then
+  * dumps a cProfile .pstats file into DIR (profiles/ by default) and logs the top functions,
+  * counts calls, total ns and characters in per stage (split_into_blocks,
+    parse_invoice_text, format_to_csv_block; the formatter counts characters out),
+  * with memory sampling, snapshots every SNAPSHOT_EVERY-th call of a stage just
+    before it returns and reports the top allocation sites still held by its result.
+
+When profiling is off the stages only check extractor._profiler, so the
+overhead is one extra function call per stage (well under a microsecond).
+
+    python -m pstats profiles/batch-20261017-093000.pstats
+
+inspect, pstats and tracemalloc are imported only once a profiled run starts:
+batch.py imports this module on every run, profiled or not.
+"""
+import cProfile
+import io
+import os
+import time
+from collections import Counter
+
+import extractor
+
+PROFILE_ENV = "INVOICE_PROFILE"
+PROFILE_DIR = "profiles"
+STAGES = ('split_into_blocks', 'parse_invoice_text', 'format_to_csv_block')
+SNAPSHOT_EVERY = 200  # Calls of a stage between tracemalloc samples
+TRACE_FRAMES = 16  # Traceback depth kept by tracemalloc (must reach the stage's frame)
+TOP_FUNCTIONS = 20
+TOP_SITES = 8
+
+
+def profile_settings(profile_dir=None, memory=False):
+    """
+    Resolves the command-line options against INVOICE_PROFILE.
+    Returns (output directory or None when profiling is off, memory sampling on?).
+    """
+    env = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if env and env not in ("0", "off", "false", "no"):
+        profile_dir = profile_dir or PROFILE_DIR
+        memory = memory or env in ("memory", "mem", "all")
+    return profile_dir, bool(profile_dir) and memory
+
+
+def _line_range(func):
+    import inspect
+    lines, first = inspect.getsourcelines(inspect.unwrap(func))
+    return first, first + len(lines)
+
+
+class Profiler:
+    """
+    One profiling session. start() / stop() bracket the profiled work (or use it
+    as a context manager); report() dumps the .pstats file and logs the results.
+    """
+
+    def __init__(self, out_dir=PROFILE_DIR, label="run", memory=False):
+        self.out_dir = out_dir
+        self.label = label
+        self.memory = memory
+        self.stages = {name: [0, 0, 0] for name in STAGES}  # calls, total ns, chars
+        self.samples = Counter()  # stage -> snapshots taken
+        self.sites = {name: Counter() for name in STAGES}  # stage -> (file, line) -> bytes
+        self.peak_bytes = 0
+        self._profile = cProfile.Profile()
+        self._source = None
+        self._ranges = {}
+        self._started_memory = False
+
+    def start(self):
+        if self.memory:
+            import inspect
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACE_FRAMES)
+                self._started_memory = True
+            self._source = inspect.getsourcefile(extractor)
+            self._ranges = {name: _line_range(getattr(extractor, name)) for name in STAGES}
+        extractor.set_profiler(self)
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        extractor.set_profiler(None)
+        if self._started_memory:
+            import tracemalloc
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self._started_memory = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def call(self, name, func, arg):
+        """Runs one stage call, counting it (called through the extractor hook)."""
+        start = time.perf_counter_ns()
+        result = func(arg)
+        entry = self.stages[name]
+        entry[1] += time.perf_counter_ns() - start
+        entry[0] += 1
+        entry[2] += len(arg) if isinstance(arg, str) else len(result)
+        if self._ranges and entry[0] % SNAPSHOT_EVERY == 1:
+            self._sample(name)
+        return result
+
+    def _sample(self, name):
+        """
+        Attributes every live allocation made under the stage's frame (its result
+        and whatever that references) to the innermost line that allocated it.
+        """
+        import tracemalloc
+        self._profile.disable()
+        try:
+            first, last = self._ranges[name]
+            sites = self.sites[name]
+            for trace in tracemalloc.take_snapshot().traces:
+                frames = trace.traceback
+                if any(f.filename == self._source and first <= f.lineno < last for f in frames):
+                    sites[(frames[-1].filename, frames[-1].lineno)] += trace.size
+            self.samples[name] += 1
+        finally:
+            self._profile.enable()
+
+    # --- Reporting ---
+
+    def dump(self):
+        """Writes the cProfile data; returns the .pstats path."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+        self._profile.dump_stats(path)
+        return os.path.abspath(path)
+
+    def report(self, logger=print):
+        """Dumps the .pstats file and logs stage counters, hot functions and memory sites."""
+        import pstats
+        logger(f"[Profile] cProfile data: {self.dump()}")
+        logger(f"  {'stage':<22}{'calls':>8}{'total ms':>11}{'avg us':>10}{'MiB chars':>11}")
+        for name, (calls, total_ns, chars) in self.stages.items():
+            avg_us = total_ns / calls / 1000 if calls else 0.0
+            logger(f"  {name:<22}{calls:>8}{total_ns / 1e6:>11.1f}{avg_us:>10.1f}{chars / 2**20:>11.2f}")
+
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        for line in stream.getvalue().strip().splitlines():
+            logger(f"  {line}")
+
+        if not self.memory:
+            return
+        logger(f"[Profile] tracemalloc peak {self.peak_bytes / 2**20:.2f} MiB; "
+               f"allocations held by a stage's result, averaged over samples:")
+        for name in STAGES:
+            if not self.samples[name]:
+                continue
+            logger(f"  {name} ({self.samples[name]} samples)")
+            for (filename, lineno), size in self.sites[name].most_common(TOP_SITES):
+                logger(f"    {size / self.samples[name] / 1024:>9.1f} KiB  {os.path.basename(filename)}:{lineno}")
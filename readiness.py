@@ -0,0 +1,138 @@
+import math
+import time
+
+# "Partial Load" thresholds: anything shorter is a blank or half-rendered page
+MIN_PAGE_CHARS = 250
+MIN_PAGE_LINES = 25
+
+
+def is_page_loaded(content):
+    """Checks for "Partial Load" (Too short or too few lines)."""
+    if not content:
+        return False
+    if len(content) < MIN_PAGE_CHARS:
+        return False
+    if content.count('\n') < MIN_PAGE_LINES:
+        return False
+    return True
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class PageReadiness:
+    """
+    Adaptive replacement for the fixed PAGE_LOAD_WAIT + retry schedule.
+
+    For each tab it waits a learned initial delay, then copies the page repeatedly
+    with short polls until a loaded capture comes back twice unchanged (stable).
+    The time at which a tab first looked loaded feeds an EWMA, which sets the next
+    tab's initial wait and retry back-off, always within [min_wait, max_wait].
+    ready_times keeps the full per-tab time-to-ready for the percentile report.
+    """
+
+    def __init__(self, min_wait=0.1, max_wait=2.0, initial_estimate=1.0, alpha=0.3,
+                 poll_interval=0.15, max_total=10.0, require_stable=True,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.poll_interval = poll_interval
+        self.max_total = max_total
+        self.require_stable = require_stable
+        self.estimate = initial_estimate
+        self.clock = clock
+        self.sleep = sleep
+        self.ready_times = []
+        self.failures = 0
+        self.last_attempts = 0  # Copies made for the most recent page
+        self.last_ready_on_arrival = False  # Whether the most recent page needed no retries
+
+    def _clamp(self, value):
+        return max(self.min_wait, min(self.max_wait, value))
+
+    @property
+    def initial_wait(self):
+        """Wait before the first copy: most of the expected ready time."""
+        return self._clamp(self.estimate * 0.75)
+
+    def learn(self, seconds):
+        """Feeds one load-time sample into the EWMA."""
+        self.estimate = self._clamp(self.alpha * seconds + (1 - self.alpha) * self.estimate)
+
+    def wait_for_page(self, copy_page, orig_pg, logger=print):
+        """
+        Returns the page content once it is loaded and stable, orig_pg as soon as the
+        original page shows up (stop condition), or "" after max_total seconds.
+        copy_page: callable performing Select All + Copy, returning the stripped text.
+        """
+        start = self.clock()
+        self.sleep(self.initial_wait)
+
+        previous = None
+        first_loaded = None
+        backoff = self._clamp(self.estimate * 0.25)
+        attempt = 0
+        self.last_ready_on_arrival = False
+        while True:
+            attempt += 1
+            self.last_attempts = attempt
+            content = copy_page()
+
+            # Immediate success if it matches original page (Stop condition)
+            if content and content == orig_pg:
+                return content
+
+            if is_page_loaded(content):
+                elapsed = self.clock() - start
+                if first_loaded is None:
+                    first_loaded = elapsed
+                    # Loaded on the very first probe: the real load time is unknown but
+                    # shorter than our wait, so aim to probe earlier next time.
+                    sample = self.initial_wait * 0.5 if attempt == 1 else elapsed
+                # A page that keeps changing is accepted once the time budget is spent
+                if not self.require_stable or content == previous or elapsed > self.max_total:
+                    self.ready_times.append(elapsed)
+                    self.learn(sample)
+                    self.last_ready_on_arrival = attempt <= (2 if self.require_stable else 1)
+                    return content
+                # Loaded but not yet confirmed: re-copy right away after a short poll
+                previous = content
+                self.sleep(self.poll_interval)
+                continue
+
+            previous = None
+            elapsed = self.clock() - start
+            if elapsed + backoff > self.max_total:
+                self.failures += 1
+                # A page that never loaded still teaches us pages are slow right now
+                self.estimate = self._clamp(self.estimate * 1.5)
+                return "" # Give up
+
+            logger(f"  -> Page not fully loaded (Partial/Blank). Retrying in {backoff:.2f}s (Attempt {attempt})...")
+            self.sleep(backoff)
+            backoff = self._clamp(backoff * 1.5)
+
+    def summary(self):
+        """Time-to-ready percentiles for the session."""
+        values = sorted(self.ready_times)
+        return {
+            'pages': len(values),
+            'failures': self.failures,
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': values[-1] if values else 0.0,
+            'estimate': self.estimate,
+        }
+
+    def log_summary(self, logger=print):
+        s = self.summary()
+        logger(f"[Readiness] {s['pages']} pages ready, {s['failures']} failed | time-to-ready "
+               f"p50 {s['p50']:.2f}s p90 {s['p90']:.2f}s p99 {s['p99']:.2f}s max {s['max']:.2f}s | "
+               f"final estimate {s['estimate']:.2f}s")
@@ -0,0 +1,342 @@
+"""
+Reconciliation of extracted invoices against a reference export (an ERP or
+ledger CSV of expected invoice numbers and amounts; the configured
+"extra_file_path").
+
+The reference is streamed once into hash indexes by invoice number and by
+internal in_ ID. Each extracted invoice is then one lookup, and the reference
+rows never matched are the missing ones, so a reconciliation is linear in
+reference rows + invoices. Its findings are written as a CSV diff, one row
+per finding (DIFF_COLUMNS):
+    missing             in the reference, not extracted
+    extra               extracted, not in the reference
+    amount_mismatch     total differs from the reference amount (difference = extracted - reference)
+    currency_mismatch   currencies differ (amounts are then not compared)
+    status_mismatch     statuses differ (only when the reference has a status)
+    duplicate_extracted a second extracted invoice matched the same reference row
+    duplicate_reference a reference row repeats an earlier row's number or ID
+    reference_without_key  a reference row with neither number nor ID
+
+Reference columns are found by header (case, spaces, "_" and "-" ignored;
+REFERENCE_COLUMNS lists the names tried). An invoice number or ID column is
+required; amount, currency and status are compared when present. Amounts use
+a decimal point, with optional symbol, thousands separators or (parentheses)
+for negatives.
+
+Runs reconcile at their end when "extra_file_path" is set (the diff goes next
+to the output, see reconciliation_path); batch.py takes --reconcile; and:
+    python reconcile.py ledger.csv extracted_data.jsonl [-o diff.csv]
+    python reconcile.py ledger.csv captures/2026-09/ --cache
+"""
+import csv
+import functools
+import os
+import sys
+
+from money import currency_code, decimal_string, to_minor_units
+from report_writer import AtomicFile
+
+RECONCILE_SUFFIX = "_reconciliation.csv"
+# Field -> header names tried, normalized (lower case, single spaces)
+REFERENCE_COLUMNS = {
+    'invoice_number': ('invoice number', 'invoice no', 'invoice #', 'invoice', 'number', 'document number'),
+    'internal_id': ('internal id', 'invoice id', 'stripe invoice id', 'stripe id'),
+    'amount': ('total', 'total amount', 'invoice total', 'amount total', 'amount', 'amount due'),
+    'currency': ('currency', 'currency code'),
+    'status': ('status', 'invoice status', 'state'),
+}
+STATUS_ALIASES = {'overdue': 'past due', 'voided': 'void'}
+SNIFF_BYTES = 64 * 1024
+# Extracted fields a reconciliation needs (also kept by the run journal for resumed runs)
+INVOICE_FIELDS = ('invoice_number', 'internal_id', 'status', 'currency_code', 'total_cents')
+DIFF_COLUMNS = ['kind', 'invoice_number', 'internal_id', 'reference_row',
+                'reference_amount', 'extracted_amount', 'difference',
+                'reference_status', 'extracted_status', 'reference_currency', 'extracted_currency']
+
+
+def reconciliation_path(output_path):
+    """Diff path next to a run's output (extracted_data.csv -> extracted_data_reconciliation.csv)."""
+    return os.path.splitext(output_path.rstrip("/\\"))[0] + RECONCILE_SUFFIX
+
+
+def invoice_fields(data):
+    """The INVOICE_FIELDS of a parsed invoice, as a plain dict."""
+    return {name: data.get(name) for name in INVOICE_FIELDS}
+
+
+def _header_key(name):
+    return ' '.join(name.replace('_', ' ').replace('-', ' ').lower().split())
+
+
+@functools.lru_cache(maxsize=256)
+def _status_key(status):
+    status = _header_key(status or '')
+    return STATUS_ALIASES.get(status, status)
+
+
+@functools.lru_cache(maxsize=256)
+def _reference_code(currency):
+    """ISO code of a reference currency cell; '' when empty or not a code ("US Dollar")."""
+    code = currency_code(currency) if currency else 'N/A'
+    return code if code != 'N/A' else ''
+
+
+def _reference_minor(amount, code):
+    """Reference amount text -> minor units; "(1,700.00)" is negative. None when not a number."""
+    amount = amount.strip()
+    negative = amount.startswith('(') and amount.endswith(')')
+    value = to_minor_units(amount.strip('()'), code)
+    return -value if negative and value is not None else value
+
+
+def _reference_text(amount, code):
+    """Reference amount as a plain decimal when it parses, else as found."""
+    value = _reference_minor(amount, code) if amount else None
+    return decimal_string(value, code) if value is not None else amount
+
+
+def find_columns(header, overrides=None):
+    """Maps each REFERENCE_COLUMNS field to its column index in `header` (None when absent)."""
+    positions = {}
+    for index, name in enumerate(header):
+        positions.setdefault(_header_key(name), index)
+    columns = {}
+    for field, names in REFERENCE_COLUMNS.items():
+        if overrides and overrides.get(field):
+            names = (_header_key(overrides[field]),)
+        columns[field] = next((positions[name] for name in names if name in positions), None)
+    if columns['invoice_number'] is None and columns['internal_id'] is None:
+        raise ValueError(f"no invoice number or ID column among {', '.join(header)}")
+    return columns
+
+
+class Reconciler:
+    """
+    Loads the reference at `path`, then add() one extracted invoice at a time
+    (a parsed record or its invoice_fields()), or mark_extracted() one that
+    de-duplication skipped; write_diff() at the end.
+    columns: optional header overrides, e.g. {'amount': 'Gross Total'}.
+    """
+
+    def __init__(self, path, columns=None, logger=print):
+        self.path = path
+        self.logger = logger
+        self.findings = []  # Tuples in DIFF_COLUMNS order, in the order found
+        self.extracted = 0
+        self.matched_count = 0
+        self.earlier = 0  # Matched by mark_extracted()
+        self.counts = dict.fromkeys(('missing', 'extra', 'amount_mismatch', 'currency_mismatch', 'status_mismatch',
+                                     'duplicate_extracted', 'duplicate_reference', 'reference_without_key'), 0)
+        self._load(columns)
+
+    def _finding(self, kind, *values):
+        self.counts[kind] += 1
+        self.findings.append((kind,) + values + ('',) * (len(DIFF_COLUMNS) - 1 - len(values)))
+
+    def _load(self, overrides):
+        self.rows = []  # File line of each reference row
+        self.by_number = {}
+        self.by_id = {}
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            sample = f.read(SNIFF_BYTES)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.reader(f, dialect)
+            try:
+                self._index(reader, overrides)
+            except csv.Error as e:
+                raise ValueError(f"line {reader.line_num}: {e}") from e
+        self.matched = bytearray(len(self.rows))
+
+    def _index(self, reader, overrides):
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("empty reference file")
+        self.columns = columns = find_columns(header, overrides)
+        # Columnar: one list per field the reference has (None when it has not), indexed by row
+        stores = {field: [] if columns[field] is not None else None for field in REFERENCE_COLUMNS}
+        self.numbers, self.ids, self.amounts, self.currencies, self.statuses = stores.values()
+        cells = [(columns[field], store, field in ('currency', 'status'))
+                 for field, store in stores.items() if store is not None]
+        for row in reader:
+            if not any(row):
+                continue
+            index = len(self.rows)
+            line = reader.line_num
+            self.rows.append(line)
+            for column, store, intern in cells:
+                value = row[column].strip() if column < len(row) else ''
+                store.append(sys.intern(value) if intern else value)
+            number = self._cell(self.numbers, index)
+            internal = self._cell(self.ids, index)
+            if not number and not internal:
+                self._finding('reference_without_key', '', '', line)
+                continue
+            duplicate = False
+            if number:
+                duplicate = self.by_number.setdefault(number, index) != index
+            if internal:
+                duplicate = self.by_id.setdefault(internal, index) != index or duplicate
+            if duplicate:
+                self._finding('duplicate_reference', number, internal, line)
+
+    @staticmethod
+    def _cell(store, index):
+        return store[index] if store is not None else ''
+
+    def add(self, data):
+        """Reconciles one extracted invoice. Returns its finding kinds (empty when it matches)."""
+        self.extracted += 1
+        # Written to the diff as '' when missing
+        number, internal, code = ('' if value in (None, 'N/A') else value for value in (
+            data.get('invoice_number'), data.get('internal_id'), data.get('currency_code')))
+        index = self.by_number.get(number) if number else None
+        if index is None and internal:
+            index = self.by_id.get(internal)
+        total = data.get('total_cents')
+        status = data.get('status', '')
+        if index is None or self.matched[index]:
+            kind = 'extra' if index is None else 'duplicate_extracted'
+            self._finding(kind, number, internal, self.rows[index] if index is not None else '', '',
+                          decimal_string(total, code), '', '', status, '', code)
+            return [kind]
+        self.matched[index] = 1
+        self.matched_count += 1
+
+        # Only the reference row's currency, amount and status are parsed on the matching path
+        ref_amount = self._cell(self.amounts, index)
+        ref_code = _reference_code(self._cell(self.currencies, index))
+        ref_status = self._cell(self.statuses, index)
+        kinds = []
+        expected = None
+        if ref_code and code and ref_code != code:
+            kinds.append('currency_mismatch')
+        elif ref_amount:
+            expected = _reference_minor(ref_amount, ref_code or code)
+            if expected is None or total is None or expected != total:
+                kinds.append('amount_mismatch')
+        if ref_status and _status_key(ref_status) != _status_key(status):
+            kinds.append('status_mismatch')
+        if kinds:
+            ref_text = _reference_text(ref_amount, ref_code or code)
+            amount = decimal_string(total, code)
+            for kind in kinds:
+                difference = ''
+                if kind == 'amount_mismatch' and None not in (expected, total):
+                    difference = decimal_string(total - expected, code)
+                self._finding(kind, number, internal, self.rows[index], ref_text, amount, difference,
+                              ref_status, status, ref_code, code)
+        return kinds
+
+    def mark_extracted(self, number=None, internal=None):
+        """
+        Marks the reference row of an invoice that was extracted before (a run
+        skipped it as a duplicate) as matched, so it is not reported missing.
+        Nothing is compared: the amounts and status were not read again.
+        """
+        number = number if number not in (None, 'N/A') else ''
+        internal = internal if internal not in (None, 'N/A') else ''
+        index = self.by_number.get(number) if number else None
+        if index is None and internal:
+            index = self.by_id.get(internal)
+        if index is None or self.matched[index]:
+            return False
+        self.matched[index] = 1
+        self.matched_count += 1
+        self.earlier += 1
+        return True
+
+    def missing(self):
+        """Yields the DIFF_COLUMNS rows of the reference rows no extracted invoice matched."""
+        for index, matched in enumerate(self.matched):
+            if matched:
+                continue
+            number = self._cell(self.numbers, index)
+            internal = self._cell(self.ids, index)
+            if not number and not internal:
+                continue  # Reported as reference_without_key
+            if self.by_number.get(number, index) != index or (not number and self.by_id.get(internal) != index):
+                continue  # Reported as duplicate_reference
+            currency = self._cell(self.currencies, index)
+            yield ('missing', number, internal, self.rows[index],
+                   _reference_text(self._cell(self.amounts, index), _reference_code(currency)), '', '',
+                   self._cell(self.statuses, index), '', currency, '')
+
+    def write_diff(self, path):
+        """Writes every finding, then the missing rows, as CSV; returns the absolute path."""
+        out = AtomicFile(path, newline='')
+        try:
+            writer = csv.writer(out.file)
+            writer.writerow(DIFF_COLUMNS)
+            writer.writerows(self.findings)
+            missing = 0
+            for row in self.missing():
+                writer.writerow(row)
+                missing += 1
+            self.counts['missing'] = missing
+        except BaseException:
+            out.discard(keep_partial=False)
+            raise
+        return out.publish()
+
+    def log_summary(self, logger=None):
+        logger = logger or self.logger
+        problems = ' | '.join(f"{kind} {count}" for kind, count in self.counts.items() if count)
+        logger(f"[Reconcile] {len(self.rows)} reference rows | {self.extracted} extracted | "
+               f"{self.matched_count} matched ({self.earlier} extracted before)"
+               + (f" | {problems}" if problems else " | no differences"))
+
+
+def load_reconciler(path, logger=print):
+    """Reconciler for the configured reference file, or None (not set, or unreadable: logged)."""
+    if not path:
+        return None
+    try:
+        reconciler = Reconciler(path, logger=logger)
+    except (OSError, ValueError) as e:
+        logger(f"[Reconcile] Reference {path} not used: {e}")
+        return None
+    logger(f"[Reconcile] {len(reconciler.rows)} reference rows loaded from {path}")
+    return reconciler
+
+
+def main(argv=None):
+    import argparse
+    from batch import iter_records
+
+    parser = argparse.ArgumentParser(description="Reconcile extracted invoices against a reference CSV.")
+    parser.add_argument('reference', help="ERP / ledger CSV of expected invoices")
+    parser.add_argument('inputs', nargs='+', help="Parsed .jsonl files, capture files, directories or globs")
+    parser.add_argument('-o', '--output', default=None,
+                        help=f"Diff CSV (default: the reference name + {RECONCILE_SUFFIX})")
+    parser.add_argument('--column', action='append', default=[], metavar='FIELD=HEADER',
+                        help=f"Reference header for a field ({', '.join(REFERENCE_COLUMNS)})")
+    parser.add_argument('--cache', nargs='?', const='parse_cache.db', default=None, metavar='DB',
+                        help="Parse cache for captures (default file parse_cache.db)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Parser processes for captures")
+    args = parser.parse_args(argv)
+
+    logger = lambda msg: print(msg, file=sys.stderr, flush=True)
+    overrides = {}
+    for item in args.column:
+        field, _, header = item.partition('=')
+        if field not in REFERENCE_COLUMNS or not header:
+            parser.error(f"--column {item}: expected FIELD=HEADER with FIELD one of {', '.join(REFERENCE_COLUMNS)}")
+        overrides[field] = header
+    try:
+        reconciler = Reconciler(args.reference, columns=overrides, logger=logger)
+    except (OSError, ValueError) as e:
+        parser.error(f"{args.reference}: {e}")
+    for data in iter_records(args.inputs, args.cache, args.workers, logger):
+        reconciler.add(data)
+    path = reconciler.write_diff(args.output or reconciliation_path(args.reference))
+    reconciler.log_summary()
+    logger(f"[Reconcile] Diff: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
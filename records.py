@@ -0,0 +1,165 @@
+"""
+Compact record types for parsed invoices.
+
+parse_invoice_text returns an Invoice holding a Dates and a list of LineItem.
+These are __slots__ records, so there is no per-object __dict__ and no
+per-record copy of the key table. Values that repeat across a batch are
+interned, so the batch holds one copy of each: status, currency, line item
+descriptions, periods and unit prices, and date labels. Measured by
+benchmarks/bench_records.py.
+
+Each record is also a Mapping view of itself, so code written against the
+old nested dicts keeps working: record['status'], record.get(...), .items(),
+'key' in record, dict(record), and == against a dict. Keys come in the old
+dict order. json.dumps needs default=dict. to_dict() returns the old
+plain-dict shape.
+"""
+import sys
+from collections.abc import Mapping
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Record(Mapping):
+    """
+    Base of the fixed-field records: fields are the subclass's __slots__ (in
+    output order), DEFAULTS their values when not given, INTERNED the fields
+    whose strings are interned. Fields can be assigned (record['qty_value'] = 3);
+    unknown keys raise KeyError, as a dict lookup would.
+    """
+
+    __slots__ = ()
+    DEFAULTS = ()
+    INTERNED = frozenset()
+
+    def __init__(self, *values):
+        if len(values) > len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes at most {len(self.__slots__)} values")
+        values += self.DEFAULTS[len(values):]
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, _intern(value) if name in self.INTERNED else value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record from a mapping of the same keys (e.g. a decoded JSON record)."""
+        return cls(*(data.get(name, default) for name, default in zip(cls.__slots__, cls.DEFAULTS)))
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, _intern(value) if key in self.INTERNED else value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def to_dict(self):
+        """Plain nested dicts and lists, as parse_invoice_text returned before records."""
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+
+def _plain(value):
+    if isinstance(value, (Record, Dates)):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class LineItem(Record):
+    __slots__ = ('description', 'period', 'qty', 'unit_price', 'amount',
+                 'qty_value', 'unit_price_cents', 'amount_cents')
+    DEFAULTS = ('', '', '', '', '', None, None, None)
+    INTERNED = frozenset(('description', 'period', 'unit_price'))
+
+    def __init__(self, description, period, qty, unit_price, amount,
+                 qty_value=None, unit_price_cents=None, amount_cents=None):
+        # Spelled out, with no type checks: one of these is built per table row
+        intern = sys.intern
+        self.description = intern(description)
+        self.period = intern(period)
+        self.qty = qty
+        self.unit_price = intern(unit_price)
+        self.amount = amount
+        self.qty_value = qty_value
+        self.unit_price_cents = unit_price_cents
+        self.amount_cents = amount_cents
+
+
+# One shared label tuple per distinct set of date events (a handful per corpus)
+_LABEL_SETS = {}
+
+
+class Dates(Mapping):
+    """Date event label ('Created', 'Due', ...) -> date, in extraction order. Read-only."""
+
+    __slots__ = ('_labels', '_values')
+
+    def __init__(self, dates=()):
+        dates = dict(dates)
+        labels = tuple(dates)
+        shared = _LABEL_SETS.get(labels)
+        if shared is None:
+            shared = _LABEL_SETS[labels] = tuple(map(sys.intern, labels))
+        self._labels = shared
+        self._values = tuple(dates.values())
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._labels.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __reduce__(self):
+        return Dates, (dict(zip(self._labels, self._values)),)
+
+    def __repr__(self):
+        return f"Dates({dict(self)!r})"
+
+    def to_dict(self):
+        return dict(zip(self._labels, self._values))
+
+
+class Invoice(Record):
+    """
+    One parsed invoice; fields follow extractor.FIELD_SPECS, then dates,
+    line_items and the normalized amounts (see extractor.normalize_money).
+    """
+
+    __slots__ = ('status', 'total_amount', 'payment_page', 'invoice_number', 'due_date',
+                 'billed_to_email', 'billed_to_name', 'currency', 'subtotal', 'amount_remaining',
+                 'internal_id', 'dates', 'line_items',
+                 'currency_code', 'total_cents', 'subtotal_cents', 'remaining_cents')
+    DEFAULTS = ('Unknown',) + ('N/A',) * 10 + (None, None) + ('N/A', None, None, None)
+    INTERNED = frozenset(('status', 'currency', 'currency_code'))
+
+    def __init__(self, *values):
+        super().__init__(*values)
+        if not isinstance(self.dates, Dates):
+            self.dates = Dates(self.dates or ())
+        items = self.line_items
+        if items is None:
+            self.line_items = []
+        elif items and not isinstance(items[0], LineItem):
+            self.line_items = [LineItem.from_dict(item) for item in items]
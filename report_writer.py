@@ -0,0 +1,350 @@
+"""
+Output sinks for parsed invoices. Every sink has the same interface:
+write(data), sync(), finalize() -> published path, abort(keep_partial=True),
+`count` (records written) and `synced` (how many of those are known to be on
+disk, i.e. survive a crash), and works as a context manager.
+
+    report  ReportWriter     the human-oriented INVOICE REPORT blocks (default)
+    csv     TidyCsvWriter    invoices.csv, line_items.csv, dates.csv in a directory
+    jsonl   ReportWriter     one JSON object per line
+    sqlite  SqliteWriter     invoices / line_items / dates tables
+"""
+import csv
+import json
+import os
+
+from extractor import FIELD_SPECS, MONEY_FIELDS, format_to_csv_block
+
+OUTPUT_FORMATS = ('report', 'csv', 'jsonl', 'sqlite')
+# Formats that can be streamed to stdout
+STREAM_FORMATS = ('report', 'jsonl')
+# Output path per format, derived from the report file name (csv is a directory)
+OUTPUT_SUFFIXES = {'report': '.csv', 'csv': '', 'jsonl': '.jsonl', 'sqlite': '.db'}
+
+# --- Tidy rows ---
+
+INVOICE_COLUMNS = (['invoice_number']
+                   + [spec.name for spec in FIELD_SPECS if spec.section is None and spec.name != 'invoice_number']
+                   + ['currency_code'] + [key for _field, key in MONEY_FIELDS])
+LINE_ITEM_COLUMNS = ['invoice_number', 'internal_id', 'line', 'description', 'period',
+                     'qty', 'unit_price', 'amount', 'qty_value', 'unit_price_cents', 'amount_cents']
+DATE_COLUMNS = ['invoice_number', 'internal_id', 'event', 'value']
+# Normalized amounts (integer minor units) and quantities; every other column is text
+NUMERIC_COLUMNS = {'qty_value': 'NUMERIC', 'unit_price_cents': 'INTEGER', 'amount_cents': 'INTEGER'}
+NUMERIC_COLUMNS.update((key, 'INTEGER') for _field, key in MONEY_FIELDS)
+
+
+def invoice_row(data):
+    return [data.get(column, '') for column in INVOICE_COLUMNS]
+
+
+def line_item_rows(data):
+    keys = (data.get('invoice_number', ''), data.get('internal_id', ''))
+    return [
+        keys + (line, item.get('description', ''), item.get('period', ''), item.get('qty', ''),
+                item.get('unit_price', ''), item.get('amount', ''), item.get('qty_value'),
+                item.get('unit_price_cents'), item.get('amount_cents'))
+        for line, item in enumerate(data.get('line_items', []), 1)
+    ]
+
+
+def date_rows(data):
+    keys = (data.get('invoice_number', ''), data.get('internal_id', ''))
+    return [keys + (event, value) for event, value in data.get('dates', {}).items()]
+
+
+def render_json(data):
+    return json.dumps(data, ensure_ascii=False, default=dict)
+
+
+RENDERERS = {'report': format_to_csv_block, 'jsonl': render_json}
+
+
+def output_path_for(fmt, report_path):
+    """Maps the report file name (e.g. extracted_data.csv) to the path used by `fmt`."""
+    if fmt == 'report':
+        return report_path
+    return os.path.splitext(report_path)[0] + OUTPUT_SUFFIXES[fmt]
+
+
+# --- Files published by atomic rename ---
+
+class AtomicFile:
+    """
+    Text file written as '<path>.partial' and moved onto `path` by publish().
+    append continues an existing partial file (a resumed run) instead of truncating it.
+    """
+
+    def __init__(self, path, newline=None, buffering=64 * 1024, append=False):
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.resumed = append and os.path.exists(self.partial_path) and os.path.getsize(self.partial_path) > 0
+        self.file = open(self.partial_path, "a" if append else "w", encoding="utf-8", newline=newline,
+                         buffering=buffering)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def publish(self):
+        """Syncs, closes and atomically moves the file into place. Returns its absolute path."""
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+        os.replace(self.partial_path, self.path)
+        return os.path.abspath(self.path)
+
+    def discard(self, keep_partial=True):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+        if not keep_partial and os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+class _Sink:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.abort()
+        return False
+
+
+class ReportWriter(_Sink):
+    """
+    Incremental, crash-safe report writer.
+
+    Each record is rendered and appended to '<path>.partial' as soon as it is
+    written, flushed to the OS right away and fsync'ed every `fsync_every`
+    records. finalize() syncs and atomically renames the partial file onto `path`.
+    If the run dies first, everything written so far stays in the .partial file.
+    """
+
+    def __init__(self, path, render=format_to_csv_block, fsync_every=10, buffering=64 * 1024, append=False):
+        self.path = path
+        self.render = render
+        self.fsync_every = max(1, fsync_every)
+        self.count = 0
+        self.synced = 0
+        self._unsynced = 0
+        self._out = AtomicFile(path, buffering=buffering, append=append)
+        self.partial_path = self._out.partial_path
+
+    def write(self, data):
+        """Renders one record and appends it to the partial file."""
+        self._out.file.write(self.render(data) + "\n")
+        self._out.file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """fsyncs everything written so far."""
+        self._out.sync()
+        self._unsynced = 0
+        self.synced = self.count
+
+    def finalize(self):
+        """Syncs, closes and atomically moves the report into place. Returns its absolute path."""
+        return self._out.publish()
+
+    def abort(self, keep_partial=True):
+        """Closes without publishing; the partial file is kept for recovery unless asked otherwise."""
+        self._out.discard(keep_partial)
+
+
+class TidyCsvWriter(_Sink):
+    """
+    Normalized CSV tables written through the csv module (proper quoting):
+    invoices.csv (one row per invoice), line_items.csv and dates.csv (one row
+    per item / date, keyed by invoice_number and internal_id).
+    Same crash-safety as ReportWriter, one .partial file per table.
+    """
+
+    TABLES = [
+        ('invoices.csv', INVOICE_COLUMNS, lambda data: [invoice_row(data)]),
+        ('line_items.csv', LINE_ITEM_COLUMNS, line_item_rows),
+        ('dates.csv', DATE_COLUMNS, date_rows),
+    ]
+
+    def __init__(self, directory, fsync_every=10, buffering=64 * 1024, append=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fsync_every = max(1, fsync_every)
+        self.count = 0
+        self.synced = 0
+        self._unsynced = 0
+        self._tables = []
+        for name, columns, rows in self.TABLES:
+            out = AtomicFile(os.path.join(directory, name), newline='', buffering=buffering, append=append)
+            table = csv.writer(out.file)
+            if not out.resumed:
+                table.writerow(columns)
+            self._tables.append((out, table, rows))
+
+    def write(self, data):
+        for out, table, rows in self._tables:
+            table.writerows(rows(data))
+            out.file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """fsyncs everything written so far, in all three tables."""
+        for out, _table, _rows in self._tables:
+            out.sync()
+        self._unsynced = 0
+        self.synced = self.count
+
+    def finalize(self):
+        """Publishes all three tables. Returns the directory's absolute path."""
+        for out, _table, _rows in self._tables:
+            out.publish()
+        return os.path.abspath(self.directory)
+
+    def abort(self, keep_partial=True):
+        for out, _table, _rows in self._tables:
+            out.discard(keep_partial)
+
+
+class SqliteWriter(_Sink):
+    """
+    Appends invoices to a SQLite database in batched transactions: rows are
+    buffered and inserted with executemany() every `batch_size` invoices.
+    invoices is indexed on invoice_number and status; line_items and dates
+    reference invoices.id. Repeated runs append to the same database.
+    """
+
+    # Columns after the id / invoice_id key, with their SQL types
+    TABLE_COLUMNS = {
+        'invoices': [(column, NUMERIC_COLUMNS.get(column, 'TEXT')) for column in INVOICE_COLUMNS],
+        'line_items': [('line', 'INTEGER')] + [(column, NUMERIC_COLUMNS.get(column, 'TEXT'))
+                                               for column in LINE_ITEM_COLUMNS[3:]],
+        'dates': [('event', 'TEXT'), ('value', 'TEXT')],
+    }
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS invoices (id INTEGER PRIMARY KEY, "
+        + ", ".join(f"{column} {sql_type}" for column, sql_type in TABLE_COLUMNS['invoices']) + ")",
+        "CREATE TABLE IF NOT EXISTS line_items (invoice_id INTEGER NOT NULL REFERENCES invoices(id), "
+        + ", ".join(f"{column} {sql_type}" for column, sql_type in TABLE_COLUMNS['line_items']) + ")",
+        "CREATE TABLE IF NOT EXISTS dates (invoice_id INTEGER NOT NULL REFERENCES invoices(id), "
+        + ", ".join(f"{column} {sql_type}" for column, sql_type in TABLE_COLUMNS['dates']) + ")",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_number ON invoices(invoice_number)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_status ON invoices(status)",
+        "CREATE INDEX IF NOT EXISTS idx_line_items_invoice ON line_items(invoice_id)",
+        "CREATE INDEX IF NOT EXISTS idx_dates_invoice ON dates(invoice_id)",
+    ]
+    INSERT_INVOICE = (f"INSERT INTO invoices (id, {', '.join(INVOICE_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' * (len(INVOICE_COLUMNS) + 1))})")
+    INSERT_LINE_ITEM = (f"INSERT INTO line_items (invoice_id, "
+                        f"{', '.join(column for column, _type in TABLE_COLUMNS['line_items'])}) "
+                        f"VALUES ({', '.join('?' * (len(TABLE_COLUMNS['line_items']) + 1))})")
+    INSERT_DATE = "INSERT INTO dates (invoice_id, event, value) VALUES (?, ?, ?)"
+
+    def __init__(self, path, batch_size=1000):
+        import sqlite3  # Only this sink needs it
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+        self.synced = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            self._add_missing_columns()
+        self._next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM invoices").fetchone()[0]
+        self._invoices, self._line_items, self._dates = [], [], []
+
+    def _add_missing_columns(self):
+        """Databases written by an older version get the newer columns (NULL for their rows)."""
+        for table, columns in self.TABLE_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column, sql_type in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+
+    def write(self, data):
+        invoice_id = self._next_id
+        self._next_id += 1
+        self._invoices.append([invoice_id] + invoice_row(data))
+        self._line_items.extend((invoice_id,) + row[2:] for row in line_item_rows(data))
+        self._dates.extend((invoice_id,) + row[2:] for row in date_rows(data))
+        self.count += 1
+        if len(self._invoices) >= self.batch_size:
+            self.sync()
+
+    def sync(self):
+        """Commits the buffered batch."""
+        if not self._invoices:
+            return
+        with self._conn:
+            self._conn.executemany(self.INSERT_INVOICE, self._invoices)
+            self._conn.executemany(self.INSERT_LINE_ITEM, self._line_items)
+            self._conn.executemany(self.INSERT_DATE, self._dates)
+        self._invoices, self._line_items, self._dates = [], [], []
+        self.synced = self.count
+
+    def finalize(self):
+        """Commits the last batch and closes. Returns the database's absolute path."""
+        self.sync()
+        self._conn.close()
+        return os.path.abspath(self.path)
+
+    def abort(self, keep_partial=True):
+        """Closes; the unflushed batch is committed only when keep_partial is set."""
+        if keep_partial:
+            self.sync()
+        self._conn.close()
+
+
+def set_aside_partial(fmt, path, tag):
+    """
+    Moves the partial output an interrupted run left for `fmt` at `path` to
+    '<stem>.<tag><ext>' (published as is), so that a new run does not truncate
+    it. Returns the kept path, or None when there is nothing to keep (sqlite
+    never needs it: every run appends to the same database).
+    """
+    stem, ext = os.path.splitext(path)
+    kept = f"{stem}.{tag}{ext}"
+    if fmt == 'sqlite':
+        return None
+    if fmt == 'csv':
+        partials = [name for name, _columns, _rows in TidyCsvWriter.TABLES
+                    if os.path.exists(os.path.join(path, name + ".partial"))]
+        if not partials:
+            return None
+        os.makedirs(kept, exist_ok=True)
+        for name in partials:
+            os.replace(os.path.join(path, name + ".partial"), os.path.join(kept, name))
+        return os.path.abspath(kept)
+    partial = path + ".partial"
+    if not os.path.exists(partial) or os.path.getsize(partial) == 0:
+        return None
+    os.replace(partial, kept)
+    return os.path.abspath(kept)
+
+
+def open_writer(fmt, path, fsync_every=10, append=False):
+    """
+    Returns the sink for output format `fmt` (one of OUTPUT_FORMATS) writing to `path`.
+    fsync_every: records per fsync (per committed batch for sqlite).
+    append: continue the partial output of an interrupted run (sqlite always appends).
+    """
+    if fmt == 'report':
+        return ReportWriter(path, fsync_every=fsync_every, append=append)
+    if fmt == 'jsonl':
+        return ReportWriter(path, render=render_json, fsync_every=fsync_every, append=append)
+    if fmt == 'csv':
+        return TidyCsvWriter(path, fsync_every=fsync_every, append=append)
+    if fmt == 'sqlite':
+        return SqliteWriter(path, batch_size=fsync_every)
+    raise ValueError(f"Unknown output format: {fmt!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
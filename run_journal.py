@@ -0,0 +1,147 @@
+"""
+Append-only journal of an automation run, so an interrupted session can be
+resumed without harvesting its finished tabs again.
+
+One JSON object per line, flushed to the OS as it is written (no fsync: a
+line lost to a power cut only means one tab is harvested twice, which
+de-duplication absorbs):
+    start       row_count, batch_size, output format and path
+    batch       the clicks of a batch are done: first_row, rows, clicks and the
+                loop state before it (tab_offset, open_tabs, scrolled_clicks)
+    tab         the extraction worker finished a tab: tab, outcome, key, written (invoices
+                written by the whole run, all resumed sessions included), and
+                for a written invoice its reconcile.INVOICE_FIELDS (invoice; for a
+                duplicate, when reconciling, only its invoice_number and internal_id). Held
+                back until the output sink has synced the tab's invoice (and those
+                of earlier tabs), so a tab is never journaled ahead of its output.
+    batch_done  the loop state after a batch: rows_done, tabs_seen, open_tabs, scrolled_clicks
+The journal is removed once the run completes. `python automation.py --resume`
+(or the dashboard's Resume button) continues from it.
+"""
+import json
+import os
+import threading
+import time
+
+JOURNAL_FILE = "run_journal.jsonl"
+
+
+class RunJournal:
+    """
+    Writer side; tab() is called from the extraction worker, the rest from the UI thread.
+    written: invoices the run wrote in earlier sessions (a resumed run), added to
+    each tab record's count of this session's.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, append=False, written=0):
+        self.path = path
+        self.written = written
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def _append(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def start(self, row_count, batch_size, output_format, output_path):
+        self._append({'type': 'start', 'row_count': row_count, 'batch_size': batch_size,
+                      'output_format': output_format, 'output_path': output_path,
+                      'started': time.strftime("%Y-%m-%d %H:%M:%S")})
+
+    def batch(self, first_row, rows, clicks, tab_offset, open_tabs, scrolled_clicks):
+        self._append({'type': 'batch', 'first_row': first_row, 'rows': rows, 'clicks': clicks,
+                      'tab_offset': tab_offset, 'open_tabs': open_tabs, 'scrolled_clicks': scrolled_clicks})
+
+    def tab(self, tab, outcome, key=None, written=0, invoice=None):
+        record = {'type': 'tab', 'tab': tab, 'outcome': outcome, 'key': key, 'written': self.written + written}
+        if invoice is not None:
+            record['invoice'] = invoice
+        self._append(record)
+
+    def batch_done(self, rows_done, tabs_seen, open_tabs, scrolled_clicks):
+        self._append({'type': 'batch_done', 'rows_done': rows_done, 'tabs_seen': tabs_seen,
+                      'open_tabs': open_tabs, 'scrolled_clicks': scrolled_clicks})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def complete(self):
+        """The run finished: closes and removes the journal."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ResumePoint:
+    """
+    Where an interrupted run stopped, replayed from its journal.
+    batch is the last batch event when its tabs were not all harvested (else
+    None); tabs_done counts its tabs the worker finished.
+    """
+
+    def __init__(self, start):
+        self.row_count = start['row_count']
+        self.batch_size = start['batch_size']
+        self.output_format = start['output_format']
+        self.output_path = start['output_path']
+        self.started = start.get('started', '')
+        self.rows_done = 0
+        self.tabs_seen = 0
+        self.open_tabs = 0
+        self.scrolled_clicks = 0
+        self.batch = None
+        self.tabs_done = 0
+        self.written = 0
+        self.keys = []  # Dedup keys of the invoices accepted so far
+        self.invoices = []  # Their reconcile fields, replayed into the resumed run's Reconciler
+        self.earlier = []  # Identifiers of the duplicates, replayed as Reconciler.mark_extracted()
+
+    def apply(self, record):
+        kind = record.get('type')
+        if kind == 'batch':
+            self.batch = record
+            self.tabs_done = 0
+        elif kind == 'tab':
+            if record.get('outcome') == 'new':
+                if record.get('key'):
+                    self.keys.append(record['key'])
+                if record.get('invoice'):
+                    self.invoices.append(record['invoice'])
+            elif record.get('outcome') == 'duplicate' and record.get('invoice'):
+                self.earlier.append(record['invoice'])
+            self.written = max(self.written, record.get('written', 0))
+            if self.batch is not None:
+                self.tabs_done = max(self.tabs_done, record['tab'] - self.batch['tab_offset'])
+        elif kind == 'batch_done':
+            self.batch = None
+            self.tabs_done = 0
+            self.rows_done = record['rows_done']
+            self.tabs_seen = record['tabs_seen']
+            self.open_tabs = record['open_tabs']
+            self.scrolled_clicks = record['scrolled_clicks']
+
+
+def load_journal(path=JOURNAL_FILE):
+    """Returns the ResumePoint of the journal at `path`, or None when there is nothing to resume."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    point = None
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break  # A torn last line (crash mid-write)
+        if record.get('type') == 'start':
+            point = ResumePoint(record)
+        elif point is not None:
+            point.apply(record)
+    return point
@@ -1,18 +1,30 @@
-import pyautogui
-import time
+import sys
 from config_manager import save_config, load_config
+from ui_driver import get_driver
 
 def get_mouse_position(prompt):
     print(prompt)
     print("Place your mouse over the target point in 5 seconds...")
     for i in range(5, 0, -1):
         print(f"{i}...", end=" ", flush=True)
-        time.sleep(1)
+        get_driver().sleep(1)
     print("Capture!")
-    x, y = pyautogui.position()
+    x, y = get_driver().position()
     print(f"Captured: ({x}, {y})")
     return x, y
 
+SCROLL_CALIBRATION_CLICKS = 3
+
+def calibrate_scroll():
+    """Measures how many pixels one mouse-wheel click scrolls the invoice list (for batched runs)."""
+    _, y_before = get_mouse_position("\nStep 3: Point at a row near the BOTTOM of the visible list.")
+    print(f"Scrolling the list down by {SCROLL_CALIBRATION_CLICKS} wheel clicks...")
+    get_driver().scroll(-SCROLL_CALIBRATION_CLICKS)
+    _, y_after = get_mouse_position("Point at the SAME row again (it has moved up).")
+    pixels = max(1.0, (y_before - y_after) / SCROLL_CALIBRATION_CLICKS)
+    print(f"Calibrated scroll: {pixels:.1f} pixels per wheel click. Scroll the list back to the top.")
+    return pixels
+
 def run_setup_wizard():
     print("--- Invoice Scraper Setup Wizard ---")
     print("This setup will configure the click coordinates.")
@@ -26,21 +38,39 @@ def run_setup_wizard():
     # Calculate spacing
     vertical_spacing = abs(end_y - start_y)
     print(f"\nCalculated vertical spacing: {vertical_spacing} pixels")
-    
+
     # Load existing config to preserve other settings like row_count or file path
     current_config = load_config()
     
-    config = {
+    config = dict(current_config)
+    config.update({
         "start_x": start_x,
         "start_y": start_y,
         "vertical_spacing": vertical_spacing,
-        "row_count": current_config.get("row_count", 20),
-        "extra_file_path": current_config.get("extra_file_path", "")
-    }
+    })
+
+    # 3. Scroll step, used to move the list between batches: only batched runs
+    # scroll, so otherwise the page is left alone and the saved value kept
+    if config.get("batch_size", 0) > 0:
+        config["scroll_pixels"] = calibrate_scroll()
+    else:
+        print("Batched mode is off (batch_size 0): skipping the scroll calibration "
+              "(run `python setup.py --scroll` after turning it on).")
     
     save_config(config)
     print("\nCoordinates saved!")
     return config
 
+def run_scroll_calibration():
+    """Calibrates only the scroll step (e.g. after turning batched mode on) and saves it."""
+    config = load_config()
+    config["scroll_pixels"] = calibrate_scroll()
+    save_config(config)
+    print("\nScroll step saved!")
+    return config
+
 if __name__ == "__main__":
-    run_setup_wizard()
+    if "--scroll" in sys.argv[1:]:
+        run_scroll_calibration()
+    else:
+        run_setup_wizard()
@@ -0,0 +1,229 @@
+"""
+Per-tab timing spans for the automation run.
+
+Instrumented code calls get_tracer().span(name, **attrs) as a context manager;
+the default tracer is a no-op, so instrumentation costs nothing unless a run
+installs a real Tracer with set_tracer(). A Tracer:
+  * streams every span and tab outcome to a JSONL trace file,
+  * summarises p50/p95/max per phase, tab outcomes and tabs/min at the end,
+  * writes a Prometheus text-format snapshot for node exporter's textfile collector.
+
+Timestamps come from a monotonic clock (the UI driver's, so simulated runs
+trace virtual time).
+"""
+import json
+import os
+import threading
+import time
+
+from readiness import percentile
+
+TRACE_DIR = "traces"
+METRICS_FILE = "invoice_automation.prom"
+METRIC_PREFIX = "invoice_automation"
+OUTCOMES = ('new', 'duplicate', 'failed', 'error', 'stop')
+
+
+class Span:
+    """One timed phase; attrs may be filled in while the span is open."""
+
+    __slots__ = ('name', 'attrs', 'start', 'end')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = self.end = 0.0
+
+    def __setitem__(self, key, value):
+        self.attrs[key] = value
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class _SpanContext:
+    def __init__(self, tracer, span):
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self):
+        self._span.start = self._tracer.clock()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        self._span.end = self._tracer.clock()
+        if exc_type is not None:
+            self._span.attrs['error'] = exc_type.__name__
+        self._tracer._finish(self._span)
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Default tracer: every call is a no-op."""
+
+    tab = None
+    trace_path = None
+
+    def span(self, name, **attrs):
+        return _NULL_SPAN
+
+    def outcome(self, tab, outcome, **attrs):
+        pass
+
+
+class Tracer:
+    """
+    Records spans (name, tab, start, end, duration, attrs) and tab outcomes.
+    `tab` is the tab currently handled by the UI thread; spans opened without an
+    explicit tab= attribute are attributed to it. Thread-safe.
+    """
+
+    def __init__(self, trace_path=None, clock=time.perf_counter):
+        self.clock = clock
+        self.tab = None
+        self.started = clock()
+        self.started_wall = time.time()
+        self.durations = {}  # phase -> [seconds]
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self._lock = threading.Lock()
+        self._file = None
+        self.trace_path = trace_path
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+            self._file = open(trace_path, "w", encoding="utf-8")
+            self._emit({'type': 'run', 'started_wall': self.started_wall, 'clock_start': self.started})
+
+    def _emit(self, record):
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+
+    def span(self, name, **attrs):
+        attrs.setdefault('tab', self.tab)
+        return _SpanContext(self, Span(name, attrs))
+
+    def _finish(self, span):
+        with self._lock:
+            self.durations.setdefault(span.name, []).append(span.duration)
+            record = {'type': 'span', 'name': span.name, 'start': span.start, 'end': span.end,
+                      'duration': span.duration}
+            record.update(span.attrs)
+            self._emit(record)
+
+    def outcome(self, tab, outcome, **attrs):
+        """Records how a tab ended: one of OUTCOMES."""
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            record = {'type': 'outcome', 'tab': tab, 'outcome': outcome, 'at': self.clock()}
+            record.update(attrs)
+            self._emit(record)
+            if self._file is not None:
+                self._file.flush()
+
+    # --- Reporting ---
+
+    def summary(self):
+        """Returns {'phases': {phase: {count, total, p50, p95, max}}, 'outcomes', 'tabs', 'tabs_per_min'}."""
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+            outcomes = dict(self.outcomes)
+        phases = {
+            name: {'count': len(values), 'total': sum(values), 'p50': percentile(values, 50),
+                   'p95': percentile(values, 95), 'max': values[-1]}
+            for name, values in durations.items()
+        }
+        tabs = sum(count for outcome, count in outcomes.items() if outcome != 'stop')
+        loop = phases.get('extraction_loop')
+        minutes = (loop['total'] if loop else self.clock() - self.started) / 60
+        return {'phases': phases, 'outcomes': outcomes, 'tabs': tabs,
+                'tabs_per_min': tabs / minutes if minutes > 0 else 0.0}
+
+    def log_summary(self, logger=print):
+        s = self.summary()
+        outcomes = ", ".join(f"{name} {count}" for name, count in s['outcomes'].items() if count)
+        logger(f"\n[Trace] {s['tabs']} tabs | {s['tabs_per_min']:.1f} tabs/min | {outcomes or 'no tabs'}")
+        logger(f"  {'phase':<16}{'count':>6}{'total s':>10}{'p50 s':>9}{'p95 s':>9}{'max s':>9}")
+        for name, p in s['phases'].items():
+            logger(f"  {name:<16}{p['count']:>6}{p['total']:>10.2f}{p['p50']:>9.3f}{p['p95']:>9.3f}{p['max']:>9.3f}")
+        if self.trace_path:
+            logger(f"  trace: {os.path.abspath(self.trace_path)}")
+
+    def write_prometheus(self, path):
+        """
+        Writes the run summary in Prometheus text format. The file is replaced
+        atomically, as the textfile collector requires.
+        """
+        s = self.summary()
+        m = METRIC_PREFIX
+        lines = [
+            f"# HELP {m}_phase_seconds Duration of automation phases in the last run.",
+            f"# TYPE {m}_phase_seconds summary",
+        ]
+        for name, p in s['phases'].items():
+            lines.append(f'{m}_phase_seconds{{phase="{name}",quantile="0.5"}} {p["p50"]:.6f}')
+            lines.append(f'{m}_phase_seconds{{phase="{name}",quantile="0.95"}} {p["p95"]:.6f}')
+            lines.append(f'{m}_phase_seconds_sum{{phase="{name}"}} {p["total"]:.6f}')
+            lines.append(f'{m}_phase_seconds_count{{phase="{name}"}} {p["count"]}')
+        lines += [
+            f"# HELP {m}_phase_max_seconds Slowest occurrence of each phase in the last run.",
+            f"# TYPE {m}_phase_max_seconds gauge",
+        ]
+        lines += [f'{m}_phase_max_seconds{{phase="{name}"}} {p["max"]:.6f}' for name, p in s['phases'].items()]
+        lines += [
+            f"# HELP {m}_tabs Tabs handled in the last run, by outcome.",
+            f"# TYPE {m}_tabs gauge",
+        ]
+        lines += [f'{m}_tabs{{outcome="{name}"}} {count}' for name, count in s['outcomes'].items()]
+        lines += [
+            f"# HELP {m}_tabs_per_minute Tab throughput of the last run.",
+            f"# TYPE {m}_tabs_per_minute gauge",
+            f"{m}_tabs_per_minute {s['tabs_per_min']:.3f}",
+            f"# HELP {m}_last_run_timestamp_seconds Unix time the last run started.",
+            f"# TYPE {m}_last_run_timestamp_seconds gauge",
+            f"{m}_last_run_timestamp_seconds {self.started_wall:.0f}",
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return os.path.abspath(path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    """Returns the active tracer (a no-op NullTracer unless one was installed)."""
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Installs a tracer (None restores the no-op one); returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer or NullTracer()
+    return previous
+
+
+def new_trace_path(directory=TRACE_DIR):
+    return os.path.join(directory, time.strftime("%Y%m%d-%H%M%S") + ".jsonl")
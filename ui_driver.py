@@ -0,0 +1,254 @@
+"""
+UI driver layer: every hotkey, click, clipboard access and sleep made by the
+automation goes through the active driver.
+
+PyAutoGuiDriver drives the real browser (default).
+SimulatedBrowser is an in-memory browser with a virtual clock, so the whole
+automation loop can run on any OS in milliseconds for benchmarks and for
+reproducing stop-condition / dedup behaviour deterministically.
+"""
+import random
+import time
+
+
+class PyAutoGuiDriver:
+    """Real keyboard/mouse/clipboard via pyautogui + pyperclip (imported on first use)."""
+
+    def __init__(self):
+        import pyautogui
+        import pyperclip
+        self._gui = pyautogui
+        self._clip = pyperclip
+
+    def hotkey(self, *keys):
+        self._gui.hotkey(*keys)
+
+    def key_down(self, key):
+        self._gui.keyDown(key)
+
+    def key_up(self, key):
+        self._gui.keyUp(key)
+
+    def move_to(self, x, y, duration=0.0):
+        self._gui.moveTo(x, y, duration=duration)
+
+    def click(self):
+        self._gui.click()
+
+    def scroll(self, clicks):
+        self._gui.scroll(clicks)
+
+    def position(self):
+        return self._gui.position()
+
+    def copy(self, text):
+        self._clip.copy(text)
+
+    def paste(self):
+        return self._clip.paste()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def now(self):
+        return time.perf_counter()
+
+    def beep(self):
+        """Plays a system beep using winsound (Windows-specific)."""
+        try:
+            import winsound
+            winsound.MessageBeep()
+        except Exception:
+            pass
+
+
+class VirtualClock:
+    """Monotonic clock that only moves when something sleeps."""
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def now(self):
+        return self.t
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.t += seconds
+
+
+class SimulatedTab:
+    def __init__(self, content, opened_at, latency):
+        self.content = content
+        self.opened_at = opened_at
+        self.latency = latency
+        self.load_started = None
+
+    def start_loading(self, now):
+        if self.load_started is None:
+            self.load_started = now
+
+    def visible_text(self, now, partial_mode):
+        """What Ctrl+A / Ctrl+C returns at time `now`."""
+        if self.load_started is None:
+            return ""
+        progress = (now - self.load_started) / self.latency if self.latency > 0 else 1.0
+        if progress >= 1.0:
+            return self.content
+        if partial_mode == 'blank' or progress <= 0:
+            return ""
+        lines = self.content.split('\n')
+        return '\n'.join(lines[:int(len(lines) * progress)])
+
+
+class SimulatedBrowser:
+    """
+    In-memory browser for the automation loop.
+
+    Tab 0 is the invoice list page (`list_page`). Ctrl+Clicking on row i of the
+    list (rows start at `start_y`, one every `row_height` pixels) opens a new tab
+    at the end of the strip holding `rows[i]`.
+    load_latency: seconds (or (min, max) for a seeded uniform draw) from the
+    moment a tab starts loading until it is fully rendered.
+    background_loading: tabs start loading when opened (True), or only once
+    activated (False, the behaviour prefetch.TabPrefetcher works around).
+    partial_mode: 'partial' returns a growing prefix while loading, 'blank' returns "".
+    action_cost: virtual seconds each hotkey/click/move costs (pyautogui.PAUSE is 0.1).
+    """
+
+    def __init__(self, rows, list_page="Invoices list page", start_y=0, row_height=23.5,
+                 load_latency=0.8, background_loading=False, partial_mode='partial',
+                 action_cost=0.1, seed=None, clock=None):
+        self.rows = list(rows)
+        self.start_y = start_y
+        self.row_height = row_height
+        self.load_latency = load_latency
+        self.background_loading = background_loading
+        self.partial_mode = partial_mode
+        self.action_cost = action_cost
+        self.clock = clock or VirtualClock()
+        self._rng = random.Random(seed)
+        self._held = set()
+        self._mouse = (0, 0)
+        self.clipboard = ""
+        self.scroll_offset = 0.0
+        list_tab = SimulatedTab(list_page, 0.0, 0.0)
+        list_tab.start_loading(0.0)
+        self.tabs = [list_tab]
+        self.active = 0
+        self.counters = {'hotkeys': 0, 'clicks': 0, 'copies': 0, 'tabs_opened': 0, 'tabs_closed': 0,
+                         'max_open_tabs': 1}
+
+    @classmethod
+    def from_capture_files(cls, paths, **kwargs):
+        rows = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                rows.append(f.read())
+        return cls(rows, **kwargs)
+
+    # --- Internals ---
+
+    def _spend(self):
+        self.clock.sleep(self.action_cost)
+
+    def _latency(self):
+        if isinstance(self.load_latency, (tuple, list)):
+            return self._rng.uniform(*self.load_latency)
+        return self.load_latency
+
+    def _activate(self, index):
+        self.active = index % len(self.tabs)
+        self.tabs[self.active].start_loading(self.clock.now())
+
+    def _row_at(self, y):
+        index = round((y + self.scroll_offset - self.start_y) / self.row_height)
+        return index if 0 <= index < len(self.rows) else None
+
+    # --- Driver interface ---
+
+    def hotkey(self, *keys):
+        self.counters['hotkeys'] += 1
+        keys = tuple(k.lower() for k in keys)
+        if keys == ('ctrl', 'tab'):
+            self._activate(self.active + 1)
+        elif keys == ('ctrl', 'shift', 'tab'):
+            self._activate(self.active - 1)
+        elif keys == ('ctrl', 'c'):
+            self.counters['copies'] += 1
+            self.clipboard = self.tabs[self.active].visible_text(self.clock.now(), self.partial_mode)
+        elif keys == ('ctrl', 'w'):
+            if len(self.tabs) > 1 and self.active != 0:
+                del self.tabs[self.active]
+                self.counters['tabs_closed'] += 1
+                self._activate(min(self.active, len(self.tabs) - 1))
+        elif len(keys) == 2 and keys[0] == 'ctrl' and keys[1].isdigit():
+            # Ctrl+1..8 jump to that tab, Ctrl+9 to the last one (Chrome behaviour)
+            n = int(keys[1])
+            self._activate(len(self.tabs) - 1 if n == 9 else min(n, len(self.tabs)) - 1)
+        self._spend()
+
+    def key_down(self, key):
+        self._held.add(key.lower())
+        self._spend()
+
+    def key_up(self, key):
+        self._held.discard(key.lower())
+        self._spend()
+
+    def move_to(self, x, y, duration=0.0):
+        self._mouse = (x, y)
+        self.clock.sleep(duration)
+        self._spend()
+
+    def click(self):
+        self.counters['clicks'] += 1
+        row = self._row_at(self._mouse[1]) if self.active == 0 else None
+        if row is not None and 'ctrl' in self._held:
+            tab = SimulatedTab(self.rows[row], self.clock.now(), self._latency())
+            if self.background_loading:
+                tab.start_loading(self.clock.now())
+            self.tabs.append(tab)
+            self.counters['tabs_opened'] += 1
+            self.counters['max_open_tabs'] = max(self.counters['max_open_tabs'], len(self.tabs))
+        self._spend()
+
+    def scroll(self, clicks):
+        # pyautogui: positive scrolls up; one click ~ 100 px in most browsers
+        self.scroll_offset = max(0.0, self.scroll_offset - clicks * 100)
+        self._spend()
+
+    def position(self):
+        return self._mouse
+
+    def copy(self, text):
+        self.clipboard = text
+
+    def paste(self):
+        return self.clipboard
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+    def now(self):
+        return self.clock.now()
+
+    def beep(self):
+        pass
+
+
+_driver = None
+
+
+def get_driver():
+    """Returns the active driver, creating the pyautogui one on first use."""
+    global _driver
+    if _driver is None:
+        _driver = PyAutoGuiDriver()
+    return _driver
+
+
+def set_driver(driver):
+    """Installs a driver (e.g. a SimulatedBrowser); returns the previous one."""
+    global _driver
+    previous, _driver = _driver, driver
+    return previous